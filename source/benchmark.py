@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# coding=utf-8
+# -----------------------------------------------------------------------------
+# Name:        benchmark.py
+# Purpose:     Manual benchmarks of the jdf library
+# Author:      Damian Chrzanowski
+# Created:     19/10/26
+# Modified:    19/10/26
+# Copyright:   pjdamian.chrzanowski@gmail.com
+# License:     GNU Public License v3
+# Version:     1.0
+# Revision:    N/A
+# -----------------------------------------------------------------------------
+# benchmark, compares the speed and the memory use of the jdf_lib's code paths
+# Copyright (C) 2016 Damian Chrzanowski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------
+# Usage:  python benchmark.py <name> [size in MB]
+#         python benchmark.py xml 1024
+#         python benchmark.py open 20     (up to 200k rows)
+# Every measured function runs in its own process, so that the peak memory reported is its own.
+# The test files are created in a temporary directory, which is removed at the end.
+from __future__ import print_function
+
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import jdf_lib
+
+BENCHMARK_FIELDS = ['Name', 'Damage', 'Speed', 'Boss']
+BENCHMARK_TYPES = ['str', 'int', 'float', 'bool']
+DEFAULT_SIZE = 1024   # MB
+
+
+def sample_rows(size):
+    """Generate rows until roughly size bytes of xml/json text are made.
+
+    (int) -> generator
+    """
+    idx = 0
+    written = 0
+    while written < size:
+        row = ['Monster number ' + str(idx), idx % 1000, idx * 0.25, idx % 7 == 0]
+        written += 100   # about the size of a row in xml, json rows are a bit smaller
+        idx += 1
+        yield row
+
+
+def _peak_memory():
+    """Return the peak memory use of the current process in MB.
+
+    (None) -> float
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':   # bytes on mac, kilobytes elsewhere
+        return peak / 1024.0 / 1024.0
+    return peak / 1024.0
+
+
+def _measured(queue, function, args):
+    start = time.time()
+    function(*args)
+    queue.put((time.time() - start, _peak_memory()))
+
+
+def measure(label, function, *args):
+    """Run a function in a separate process and print the time taken and the peak memory used.
+
+    (str, function, ...) -> None
+
+    The function's result is thrown away inside of the process, it is not copied back.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measured, args=(queue, function, args))
+    process.start()
+    seconds, peak = queue.get()
+    process.join()
+    print('{0:<40} {1:>8.2f} s {2:>10.1f} MB peak'.format(label, seconds, peak))
+
+
+def xml_load_all(xml_name):
+    """Parse the whole xml document at once and read the rows out of it.
+
+    (str) -> int
+    """
+    rows = list()
+    for elem in jdf_lib.ElementTree.parse(xml_name).getroot().iter(jdf_lib.XML_ROW_TAG):
+        rows.append([child.text or '' for child in elem])
+    return len(rows)
+
+
+def xml_stream(xml_name):
+    """Read the rows with jdf_lib.stream_xml().
+
+    (str) -> int
+    """
+    rows = 0
+    for each in jdf_lib.stream_xml(xml_name)[1]:
+        rows += 1
+    return rows
+
+
+def bench_xml(directory, size):
+    """iterparse() streaming versus load-all parsing of an xml file."""
+    xml_name = os.path.join(directory, 'benchmark.xml')
+    rows = jdf_lib.write_xml(xml_name, BENCHMARK_FIELDS, sample_rows(size))
+    print('xml file: {0} rows, {1:.1f} MB'.format(rows, os.path.getsize(xml_name) / 1024.0 / 1024.0))
+    measure('ElementTree.parse() (load all)', xml_load_all, xml_name)
+    measure('jdf_lib.stream_xml()', xml_stream, xml_name)
+    measure('jdf_lib.xml_to_jdf()', jdf_lib.xml_to_jdf, xml_name, os.path.join(directory, 'benchmark.jdf'))
+    measure('jdf_lib.jdf_to_xml()', jdf_lib.jdf_to_xml, os.path.join(directory, 'benchmark.jdf'), xml_name)
+
+
+def bench_jsonl(directory, size):
+    """Loading a JSONL file (sequential and with a process pool) versus loading a JDF file."""
+    jdf_name = os.path.join(directory, 'benchmark.jdf')
+    jsonl_name = os.path.join(directory, 'benchmark.jsonl')
+    jdf_lib.save_database(jdf_name, BENCHMARK_FIELDS, BENCHMARK_TYPES, sample_rows(size))
+    rows = jdf_lib.jdf_to_jsonl(jdf_name, jsonl_name)
+    print('jsonl file: {0} rows, {1:.1f} MB, {2} cpus'.format(rows, os.path.getsize(jsonl_name) / 1024.0 / 1024.0,
+                                                              multiprocessing.cpu_count()))
+    measure('jdf_lib.load_database()', jdf_lib.load_database, jdf_name)
+    measure('jdf_lib.load_jsonl(processes=1)', jdf_lib.load_jsonl, jsonl_name, 1)
+    measure('jdf_lib.load_jsonl()', jdf_lib.load_jsonl, jsonl_name)
+
+
+def bench_arrow(directory, size):
+    """Round trip through Arrow IPC and Parquet files versus saving and loading a JDF file."""
+    if jdf_lib.arrow is None:
+        print('pyarrow is not installed, nothing to benchmark')
+        return
+    jdf_name = os.path.join(directory, 'benchmark.jdf')
+    jdf_lib.save_database(jdf_name, BENCHMARK_FIELDS, BENCHMARK_TYPES, sample_rows(size))
+    print('jdf file: {0:.1f} MB'.format(os.path.getsize(jdf_name) / 1024.0 / 1024.0))
+    measure('jdf_lib.load_database()', jdf_lib.load_database, jdf_name)
+    for name, save, load in (('arrow', jdf_lib.arrow.to_arrow, jdf_lib.arrow.from_arrow),
+                             ('parquet', jdf_lib.arrow.to_parquet, jdf_lib.arrow.from_parquet)):
+        file_name = os.path.join(directory, 'benchmark.' + name)
+        measure('jdf_lib.arrow.to_' + name + '()', save, jdf_name, file_name)
+        measure('jdf_lib.arrow.from_' + name + '()', load, file_name, jdf_name + '.' + name)
+        print('  {0} file: {1:.1f} MB, round trip {2}'.format(
+            name, os.path.getsize(file_name) / 1024.0 / 1024.0,
+            'ok' if jdf_lib.load_database(jdf_name + '.' + name) == jdf_lib.load_database(jdf_name) else 'FAILED'))
+
+
+def rows_in_lists(jdf_name):
+    """Hold a database as a list of rows, the way jdf_lib.load_database() returns it.
+
+    (str) -> None
+    """
+    data_base = list(jdf_lib.stream_database(jdf_name)[2])
+    del data_base
+
+
+def rows_in_columns(jdf_name):
+    """Hold a database in a jdf_lib.ColumnStore, the way the editor's tabs do.
+
+    (str) -> None
+    """
+    field_names, field_types, rows = jdf_lib.stream_database(jdf_name)
+    store = jdf_lib.ColumnStore(field_types)
+    for row in rows:
+        store.append(row)
+    del store
+
+
+def bench_columnstore(directory, size):
+    """Memory taken by a database held as a list of rows versus a jdf_lib.ColumnStore."""
+    jdf_name = os.path.join(directory, 'benchmark.jdf')
+    jdf_lib.save_database(jdf_name, BENCHMARK_FIELDS, BENCHMARK_TYPES, sample_rows(size))
+    print('jdf file: {0:.1f} MB'.format(os.path.getsize(jdf_name) / 1024.0 / 1024.0))
+    measure('list of rows', rows_in_lists, jdf_name)
+    measure('jdf_lib.ColumnStore', rows_in_columns, jdf_name)
+
+
+def liststore_append(header_types, rows):
+    """Fill a Gtk.ListStore the way the first versions of the editor did (exec, records mutated, one append() per row).
+
+    (list, list) -> None
+    """
+    from gi.repository import Gtk
+    namespace = {'Gtk': Gtk}
+    exec('liststore = Gtk.ListStore(int, ' + ', '.join(header_types) + ')', namespace)
+    liststore = namespace['liststore']
+    for idx, val in enumerate(rows):
+        val.insert(0, idx)
+    for each in rows:
+        liststore.append(each)
+
+
+def liststore_bulk(header_types, rows):
+    """Fill a Gtk.ListStore with insert_with_valuesv(), the way the editor did before its tabs got a TableModel.
+
+    (list, list) -> None
+
+    Kept as a historical comparison, the editor no longer fills a Gtk.ListStore (see table_model_open()).
+    """
+    from gi.repository import Gtk
+    column_types = {'str': str, 'int': int, 'float': float, 'bool': bool}
+    liststore = Gtk.ListStore(*[column_types[each] for each in ['int'] + header_types])
+    columns = list(range(len(header_types) + 1))
+    insert_row = liststore.insert_with_valuesv
+    for idx, val in enumerate(rows):
+        insert_row(-1, columns, [idx] + val)
+
+
+def table_model_open(header_types, rows):
+    """Open a table the way DataCells.set_input_data() does (a jdf_lib.ColumnStore shown through a TableModel).
+
+    (list, list) -> None
+
+    The first screen of rows is read through the model as well, like the view does once the tab is shown.
+    """
+    import jdf_editor
+    model = jdf_editor.TableModel(jdf_lib.ColumnStore.from_rows(header_types, rows))
+    for row in range(min(50, len(model))):
+        for column in range(len(header_types)):   # the '#' column is the row's index, it is not read
+            model.cell(row, column)
+
+
+def bench_open(directory, size):
+    """Time taken to open a table in the editor as the amount of rows grows (size sets the largest amount).
+
+    The editor's TableModel is compared with the two ways it used to fill a Gtk.ListStore.
+    """
+    try:
+        import gi
+        gi.require_version('Gtk', '3.0')
+        from gi.repository import Gtk
+        Gtk.ListStore(int)
+    except (ImportError, ValueError):
+        print('PyGObject (Gtk 3) is not installed, nothing to benchmark')
+        return
+    largest = size // 100   # sample_rows() makes a row per 100 bytes
+    rows = 25000
+    while rows <= largest:
+        data = list(sample_rows(rows * 100))
+        measure('ListStore append() x ' + str(rows), liststore_append, BENCHMARK_TYPES, data)
+        measure('ListStore insert_with_valuesv() x ' + str(rows), liststore_bulk, BENCHMARK_TYPES, data)
+        measure('ColumnStore + TableModel x ' + str(rows), table_model_open, BENCHMARK_TYPES, data)
+        rows *= 2
+
+
+BENCHMARKS = {'xml': bench_xml, 'jsonl': bench_jsonl, 'arrow': bench_arrow, 'open': bench_open,
+              'columnstore': bench_columnstore}
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print('usage: python benchmark.py <' + '|'.join(sorted(BENCHMARKS)) + '> [size in MB]')
+        sys.exit(1)
+    size_mb = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_SIZE
+    temp_dir = tempfile.mkdtemp(prefix='jdf_benchmark')
+    try:
+        BENCHMARKS[sys.argv[1]](temp_dir, size_mb * 1024 * 1024)
+    finally:
+        shutil.rmtree(temp_dir)
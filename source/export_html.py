@@ -27,32 +27,131 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 # --------------------------------------------
+from __future__ import unicode_literals
+
+import hashlib
+import io
+import json
+import multiprocessing
 import os
 
+try:
+    from html import escape   # python 3
+except ImportError:
+    from cgi import escape   # python 2
+
+try:
+    text_type = unicode   # python 2
+except NameError:
+    text_type = str   # python 3
+
 if os.name == 'nt':  # different os'es use different file path separators.
     SEPARATOR = '\\'  # for windows
 else:
     SEPARATOR = '/'  # for linux and os x
 
+EXPORT_BATCH = 1000   # amount of rows formatted before they are written to the file in one go
+WRITE_BUFFER = 1024 * 1024   # size of the output file's buffer (bytes)
+ROW_COLORS = ('#111111', '#222222')   # background colors of the even and the odd rows
+# row of the index page of a paginated export: background color, page file, page number, first row, last row
+INDEX_ROW = '<tr style="background: %s"><td><a href="%s" style="color: #28ADB5">Page %d</a></td><td>%d - %d</td></tr>\n'
+MANIFEST_EXTENSION = '.manifest'   # added to the index page's path, holds the page hashes of an incremental export
+PAGE_STYLE = """<style>
+.nav {margin: 15px;}
+.nav a {color: #28ADB5; margin: 0 15px;}
+</style>
+"""
+VIRTUAL_ROW_HEIGHT = 28   # height (px) of a row of the virtual scrolling export, every row has the same height
+VIRTUAL_STYLE = """<style>
+.tools {margin: 10px;}
+.tools input {background: #222; color: #FFF; border: 1px solid white; padding: 4px; width: 300px;}
+#view {height: 75vh; overflow-y: auto; width: 95%; margin-left: auto; margin-right: auto;}
+#view table {table-layout: fixed; width: 100%;}
+#view th {position: sticky; top: 0; background: #111; cursor: pointer; padding: 6px;}
+#view td {height: """ + str(VIRTUAL_ROW_HEIGHT - 13) + """px; white-space: nowrap; overflow: hidden;
+          text-overflow: ellipsis;}
+</style>
+"""
+# renders only the rows that are visible inside of #view, sorts on a header click and filters on typing
+VIRTUAL_SCRIPT = """<script>
+(function () {
+    var ROW_HEIGHT = """ + str(VIRTUAL_ROW_HEIGHT) + """;
+    var data = JSON.parse(document.getElementById('jdf-data').textContent);
+    var columns = data.columns, names = data.names, types = data.types;
+    var total = columns.length ? columns[0].length : 0;
+    var view = new Array(total), sortColumn = -1, sortAscending = true, pending = null;
+    var box = document.getElementById('view'), filter = document.getElementById('filter');
+    var counter = document.getElementById('counter'), head = '<tr><th style="color: #1CFF00; width: 70px">#</th>';
+    for (var i = 0; i < total; i++) { view[i] = i; }
+    for (var c = 0; c < names.length; c++) {
+        head += '<th data-column="' + c + '">' + escape(names[c] + ' - ' + types[c]) + '</th>';
+    }
+    head += '</tr>';
+    function escape(text) {
+        return (text === null ? '' : String(text)).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;');
+    }
+    function render() {
+        var first = Math.max(0, Math.floor(box.scrollTop / ROW_HEIGHT) - 5);
+        var last = Math.min(view.length, first + Math.ceil(box.clientHeight / ROW_HEIGHT) + 10);
+        var out = [head, '<tr style="height: ' + (first * ROW_HEIGHT) + 'px"></tr>'];
+        for (var r = first; r < last; r++) {
+            var row = view[r];
+            out.push('<tr style="background: ' + (r % 2 ? '#222222' : '#111111') + '">' +
+                     '<td style="color: #1CFF00;">' + row + '</td>');
+            for (var c = 0; c < columns.length; c++) { out.push('<td>' + escape(columns[c][row]) + '</td>'); }
+            out.push('</tr>');
+        }
+        out.push('<tr style="height: ' + ((view.length - last) * ROW_HEIGHT) + 'px"></tr>');
+        box.firstChild.innerHTML = out.join('');
+        counter.textContent = view.length + ' of ' + total + ' rows';
+    }
+    function sort() {
+        if (sortColumn < 0) { return; }
+        var values = columns[sortColumn], order = sortAscending ? 1 : -1;
+        view.sort(function (a, b) {
+            return values[a] < values[b] ? -order : (values[a] > values[b] ? order : a - b);
+        });
+    }
+    function applyFilter() {
+        var text = filter.value.toLowerCase();
+        view = [];
+        for (var r = 0; r < total; r++) {
+            if (text === '') { view.push(r); continue; }
+            for (var c = 0; c < columns.length; c++) {
+                if (columns[c][r] !== null && String(columns[c][r]).toLowerCase().indexOf(text) !== -1) {
+                    view.push(r);
+                    break;
+                }
+            }
+        }
+        sort();
+        box.scrollTop = 0;
+        render();
+    }
+    box.addEventListener('scroll', render);
+    window.addEventListener('resize', render);
+    box.addEventListener('click', function (event) {
+        var column = event.target.getAttribute('data-column');
+        if (column === null) { return; }
+        column = parseInt(column, 10);
+        sortAscending = column === sortColumn ? !sortAscending : true;
+        sortColumn = column;
+        sort();
+        render();
+    });
+    filter.addEventListener('input', function () {
+        clearTimeout(pending);
+        pending = setTimeout(applyFilter, 200);
+    });
+    render();
+})();
+</script>
+"""
 
-def build_html(file_name, path, header_names, header_types, database, prog_version):
-    """Build a html file.
-
-    (str, list, list, list, str) -> None
-
-    :param file_name: input file name
-    :param path: path to the html file
-    :param header_names: a list of the header name
-    :param header_types: a list of the types of headers
-    :param database: content of the database, list type
-    :param prog_version: name of the program and its version
-
-    Build a html file that contains a table with the all the records of the database.
-    """
-    # out_str is the output string for the html file
-    out_str = """<!DOCTYPE html>
+HTML_HEAD = """<!DOCTYPE html>
 <html>
 <head>
+<meta charset="utf-8">
 <style>
 body {text-align: center; background: #111; color: #FFF;}
 .header {font-size: 13px; color: white; position: fixed; top: 10px; right: 20px;}
@@ -82,32 +181,357 @@ td {
 </head>
 <body>
 <p class="header">Created with %s</p>
-<br><h1>Database: <span style="color:#28ADB5">%s</span></h1>""" % (prog_version, file_name)
-    out_str += '<table>'  # add a table
-    # add the first row with header names
-    out_str += '<tr>'
-    out_str += '<th style="color: #1CFF00;">#</th>'  # make the number counter column
+<br><h1>Database: <span style="color:#28ADB5">%s</span></h1>"""
+
+
+def html_text(value):
+    """Convert a cell's value to escaped html text.
+
+    (object) -> str
+
+    Byte strings (the utf-8 str cells of python 2) are decoded first, nulls (None) become empty cells.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    return escape(text_type(value), True)
+
+
+def header_row(header_names, header_types):
+    """Build the table's header row.
+
+    (list, list) -> str
+    """
+    out_str = '<tr><th style="color: #1CFF00;">#</th>'  # make the number counter column
     for idx, val in enumerate(header_names):
-        out_str += '<th>' + str(val) + ' - ' + header_types[idx] + '</th>'
-    # close header names row
-    out_str += '</tr>'
-    # add the remaining rows (actual data)
-    row_color = '#FFFFFF'
-    for idx, row in enumerate(database):
-        if idx % 2 == 0:
-            row_color = '#111111'
-        else:
-            row_color = '#222222'
-        out_str += '<tr style="background: %s">' % row_color  # add a row
-        out_str += '<td style="color: #1CFF00;">' + str(idx) + '</td>'   # number the row after the index
-        for each_column in row:
-            out_str += '<td>' + str(each_column) + '</td>'   # add the data to each of the column
-
-    out_str += '</table></body></html>'
-
-    out_file = open(path, 'w')  # open file for saving, wiping its content if it already exists
-    out_file.write(out_str)  # save the html source to the file
-    out_file.close()  # close the file
+        out_str += '<th>' + html_text(val) + ' - ' + html_text(header_types[idx]) + '</th>'
+    return out_str + '</tr>\n'
+
+
+def row_templates(column_count):
+    """Build the templates of the even and the odd rows.
+
+    (int) -> tuple
+
+    A template takes the row number followed by the escaped text of every cell.
+    """
+    cells = '<td>%s</td>' * column_count
+    return tuple('<tr style="background: ' + color + '"><td style="color: #1CFF00;">%d</td>' + cells + '</tr>\n'
+                 for color in ROW_COLORS)
+
+
+def write_rows(out_file, database, column_count, first_index=0):
+    """Write the table's rows.
+
+    (object, iterable, int, int) -> int
+
+    :param out_file: the opened output file
+    :param database: any iterable of rows
+    :param column_count: amount of columns of the rows, a row with fewer or more cells gets as many as it has
+    :param first_index: number of the first row
+
+    The rows are formatted EXPORT_BATCH at a time and each batch is written with a single write.
+    Returns the amount of rows written.
+    """
+    templates = {column_count: row_templates(column_count)}   # by the amount of cells
+    batch = list()
+    idx = first_index
+    for row in database:
+        cells = tuple(html_text(each) for each in row)
+        if len(cells) not in templates:   # a ragged row
+            templates[len(cells)] = row_templates(len(cells))
+        batch.append(templates[len(cells)][idx % 2] % ((idx,) + cells))
+        idx += 1
+        if len(batch) == EXPORT_BATCH:
+            out_file.write(''.join(batch))
+            batch = list()
+    out_file.write(''.join(batch))
+    return idx - first_index
+
+
+def build_html(file_name, path, header_names, header_types, database, prog_version):
+    """Build a html file.
+
+    (str, str, list, list, iterable, str) -> None
+
+    :param file_name: input file name
+    :param path: path to the html file
+    :param header_names: a list of the header name
+    :param header_types: a list of the types of headers
+    :param database: content of the database, a list or any other iterable of rows (e.g. a generator)
+    :param prog_version: name of the program and its version
+
+    Build a html file that contains a table with the all the records of the database.
+    The rows are written to the file as they come, so the memory used does not grow with the size of the database.
+    """
+    out_file = io.open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER)  # wipes the file if it already exists
+    try:
+        out_file.write(HTML_HEAD % (html_text(prog_version), html_text(file_name)))
+        out_file.write('<table>\n' + header_row(header_names, header_types))
+        write_rows(out_file, database, len(header_names))
+        out_file.write('</table></body></html>\n')
+    finally:
+        out_file.close()  # close the file
+
+
+def page_path(path, page):
+    """Path of a page file of a paginated export.
+
+    (str, int) -> str
+
+    :param path: path to the export's index page
+    :param page: page number (counted from 0)
+    """
+    base, extension = os.path.splitext(path)
+    return base + '_page' + str(page + 1) + (extension or '.html')
+
+
+def navigation(page, index_name, prev_name, next_name):
+    """Build the navigation links of a page.
+
+    (int, str, str, str) -> str
+
+    prev_name/next_name are None for the first/last page.
+    """
+    out_str = '<div class="nav">'
+    if prev_name is not None:
+        out_str += '<a href="' + html_text(prev_name) + '">&laquo; Previous</a>'
+    out_str += '<a href="' + html_text(index_name) + '">Index</a> Page ' + str(page + 1)
+    if next_name is not None:
+        out_str += '<a href="' + html_text(next_name) + '">Next &raquo;</a>'
+    return out_str + '</div>\n'
+
+
+def write_page(task):
+    """Write a single page of a paginated export.
+
+    (tuple) -> None
+
+    :param task: (path, file_name, prog_version, header_names, header_types, rows, page, first_index,
+                  index_name, prev_name, next_name)
+
+    Runs inside of the worker processes, which is why all of its arguments come in a single picklable tuple.
+    """
+    (path, file_name, prog_version, header_names, header_types, rows, page, first_index,
+     index_name, prev_name, next_name) = task
+    nav = navigation(page, index_name, prev_name, next_name)
+    out_file = io.open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER)
+    try:
+        out_file.write(HTML_HEAD % (html_text(prog_version), html_text(file_name)))
+        out_file.write(PAGE_STYLE + nav + '<table>\n' + header_row(header_names, header_types))
+        write_rows(out_file, rows, len(header_names), first_index)
+        out_file.write('</table>\n' + nav + '</body></html>\n')
+    finally:
+        out_file.close()
+
+
+def write_index(file_name, path, prog_version, page_ranges):
+    """Write the index page of a paginated export.
+
+    (str, str, str, list) -> None
+
+    :param page_ranges: a (first row, last row) tuple for every page
+    """
+    out_file = io.open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER)
+    try:
+        out_file.write(HTML_HEAD % (html_text(prog_version), html_text(file_name)))
+        out_file.write(PAGE_STYLE + '<table>\n<tr><th>Page</th><th>Rows</th></tr>\n')
+        for page, (first_row, last_row) in enumerate(page_ranges):
+            page_name = os.path.basename(page_path(path, page))
+            out_file.write(INDEX_ROW % (ROW_COLORS[page % 2], html_text(page_name), page + 1, first_row, last_row))
+        out_file.write('</table></body></html>\n')
+    finally:
+        out_file.close()
+
+
+def split_pages(database, page_size):
+    """Split an iterable of rows into pages.
+
+    (iterable, int) -> generator
+
+    Yields (page number, rows of the page, is last page). One page is read ahead,
+    which is how the last page is recognized without knowing the amount of rows up front.
+    """
+    rows = iter(database)
+    page = 0
+    current = list()
+    for row in rows:
+        current.append(row)
+        if len(current) == page_size:
+            break
+    while current:
+        following = list()
+        for row in rows:
+            following.append(row)
+            if len(following) == page_size:
+                break
+        yield page, current, not following
+        page += 1
+        current = following
+
+
+def page_hash(task):
+    """Hash the content of a page.
+
+    (tuple) -> str
+
+    :param task: the page's write_page() task
+
+    Everything that ends up in the page takes part in the hash (except for the page's path),
+    including the navigation links, which change when pages are added or removed.
+    """
+    return hashlib.sha1(json.dumps(task[1:], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def read_manifest(path):
+    """Read the manifest of a paginated export.
+
+    (str) -> list
+
+    Returns the page hashes of the previous export, or an empty list if there is no (valid) manifest.
+    """
+    try:
+        manifest_file = io.open(path + MANIFEST_EXTENSION, 'r', encoding='utf-8')
+        try:
+            return json.load(manifest_file)['pages']
+        finally:
+            manifest_file.close()
+    except (IOError, OSError, ValueError, KeyError):
+        return list()
+
+
+def write_manifest(path, hashes):
+    """Write the manifest of a paginated export.
+
+    (str, list) -> None
+    """
+    manifest_file = io.open(path + MANIFEST_EXTENSION, 'w', encoding='utf-8')
+    try:
+        manifest_file.write(text_type(json.dumps({'pages': hashes})))
+    finally:
+        manifest_file.close()
+
+
+def build_html_pages(file_name, path, header_names, header_types, database, prog_version, page_size,
+                     processes=None, incremental=False):
+    """Build a paginated html export.
+
+    (str, str, list, list, iterable, str, int, int, bool) -> int
+
+    :param file_name: input file name
+    :param path: path to the index page, the pages are saved next to it as <name>_page1.html, <name>_page2.html...
+    :param header_names: a list of the header name
+    :param header_types: a list of the types of headers
+    :param database: content of the database, a list or any other iterable of rows
+    :param prog_version: name of the program and its version
+    :param page_size: amount of rows per page
+    :param processes: amount of worker processes writing the pages (defaults to the amount of cpus)
+    :param incremental: only rewrite the pages that have changed since the previous export to the same path
+
+    Splits the table into pages of page_size rows with previous/next links on every page, plus an index page
+    with a link and the row range of every page. The pages are written by a pool of worker processes,
+    at most two pages per worker are waiting in memory at any time. Returns the amount of pages.
+
+    An incremental export keeps a manifest with a hash of every page next to the index page (<path>.manifest).
+    A page is written only if its hash differs from the manifest's (or its file is missing), pages left over
+    from a longer previous export are removed. The index page is always rewritten.
+    """
+    index_name = os.path.basename(path)
+    page_ranges = list()
+    old_hashes = read_manifest(path) if incremental else list()
+    hashes = list()
+    pool = None
+    pending = list()
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    try:
+        for page, rows, last_page in split_pages(database, page_size):
+            first_index = page * page_size
+            page_ranges.append((first_index, first_index + len(rows) - 1))
+            prev_name = os.path.basename(page_path(path, page - 1)) if page > 0 else None
+            next_name = None if last_page else os.path.basename(page_path(path, page + 1))
+            task = (page_path(path, page), file_name, prog_version, header_names, header_types, rows, page,
+                    first_index, index_name, prev_name, next_name)
+            if incremental:
+                hashes.append(page_hash(task))
+                if page < len(old_hashes) and old_hashes[page] == hashes[-1] and os.path.exists(task[0]):
+                    continue   # page unchanged since the last export
+            if processes < 2 or (page == 0 and last_page):   # a single page is not worth starting the workers
+                write_page(task)
+                continue
+            if pool is None:
+                pool = multiprocessing.Pool(processes)
+            pending.append(pool.apply_async(write_page, (task,)))
+            if len(pending) >= processes * 2:   # wait for the oldest page, keeps the memory use bounded
+                pending.pop(0).get()
+        for each in pending:
+            each.get()   # re-raises the errors of the workers
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    write_index(file_name, path, prog_version, page_ranges)
+    if incremental:
+        for page in range(len(page_ranges), len(old_hashes)):   # remove the pages the table no longer has
+            if os.path.exists(page_path(path, page)):
+                os.remove(page_path(path, page))
+        write_manifest(path, hashes)
+    return len(page_ranges)
+
+
+def write_columns(out_file, rows, column_count):
+    """Write the rows as compact, column oriented json.
+
+    (object, list, int) -> None
+
+    Writes a json list holding one list of values per column. The values of a column are encoded
+    EXPORT_BATCH at a time, '</' is escaped so that the data cannot close the <script> tag it is embedded in.
+    """
+    out_file.write('[')
+    for column in range(column_count):
+        if column:
+            out_file.write(',')
+        out_file.write('[')
+        for start in range(0, len(rows), EXPORT_BATCH):
+            values = json.dumps([row[column] for row in rows[start:start + EXPORT_BATCH]], separators=(',', ':'))
+            if start:
+                out_file.write(',')
+            out_file.write(values[1:-1].replace('</', '<\\/'))
+        out_file.write(']')
+    out_file.write(']')
+
+
+def build_html_virtual(file_name, path, header_names, header_types, database, prog_version):
+    """Build a virtual scrolling html file.
+
+    (str, str, list, list, iterable, str) -> None
+
+    :param file_name: input file name
+    :param path: path to the html file
+    :param header_names: a list of the header name
+    :param header_types: a list of the types of headers
+    :param database: content of the database, a list or any other iterable of rows
+    :param prog_version: name of the program and its version
+
+    Instead of a <td> for every cell, the data is embedded once as compact column oriented json.
+    A small script renders only the rows that are visible while scrolling, and offers sorting (click a header)
+    and filtering (type into the filter box). The file stays small and opens quickly even for millions of rows.
+    """
+    if not isinstance(database, list):   # the columns are written one after another, the rows are read many times
+        database = list(database)
+    out_file = io.open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER)
+    try:
+        out_file.write(HTML_HEAD % (html_text(prog_version), html_text(file_name)))
+        out_file.write(VIRTUAL_STYLE + '<div class="tools"><input id="filter" placeholder="Filter...">'
+                       ' <span id="counter"></span></div>\n<div id="view"><table></table></div>\n')
+        header = json.dumps({'names': header_names, 'types': header_types}, separators=(',', ':'))
+        out_file.write('<script type="application/json" id="jdf-data">' + header[:-1].replace('</', '<\\/') +
+                       ',"columns":')
+        write_columns(out_file, database, len(header_names))
+        out_file.write('}</script>\n' + VIRTUAL_SCRIPT + '</body></html>\n')
+    finally:
+        out_file.close()
 
 
 if __name__ == '__main__':
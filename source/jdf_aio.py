@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# coding=utf-8
+# -----------------------------------------------------------------------------
+# Name:        jdf_aio.py
+# Purpose:     asyncio interface of the jdf library
+# Author:      Damian Chrzanowski
+# Created:     19/10/26
+# Modified:    19/10/26
+# Copyright:   pjdamian.chrzanowski@gmail.com
+# License:     GNU Public License v3
+# Version:     1.0
+# Revision:    N/A
+# -----------------------------------------------------------------------------
+# jdf_aio, asyncio interface of jdf_lib (available as jdf_lib.aio)
+# Copyright (C) 2016 Damian Chrzanowski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------
+import asyncio
+import concurrent.futures
+import os
+import weakref
+from itertools import islice
+
+import jdf_lib
+
+MAX_WORKERS = 4   # threads that do the file i/o and parsing
+MAX_LARGE_LOADS = 2   # large files loaded at the same time, per event loop
+LARGE_FILE_SIZE = 16 * 1024 * 1024   # files of this size (in bytes) and above count as large
+ROW_CHUNK = 1000   # rows handed out by iter_rows() between giving control back to the event loop
+
+_executor = None   # the thread pool is created on first use
+_large_loads = weakref.WeakKeyDictionary()   # a semaphore for every running event loop
+
+
+def _get_executor():
+    """Return the shared thread pool.
+
+    (None) -> object
+    """
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+def _large_load_slot():
+    """Return the semaphore that limits the large loads of the running event loop.
+
+    (None) -> object
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _large_loads:
+        _large_loads[loop] = asyncio.Semaphore(MAX_LARGE_LOADS)
+    return _large_loads[loop]
+
+
+async def _run(function, *args, **kwargs):
+    """Run a blocking function in the thread pool.
+
+    (function, ...) -> object
+
+    If the awaiting task is cancelled the function still runs to its end inside of its thread,
+    but its result is thrown away and the task is released straight away.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), lambda: function(*args, **kwargs))
+
+
+async def _run_large(function, *args):
+    """Run a blocking function that holds a large file in memory in the thread pool.
+
+    (function, ...) -> object
+
+    Waits for a free slot of the running event loop (see MAX_LARGE_LOADS). The slot is given back once
+    the function is done inside of its thread, not when the awaiting task is cancelled, so a cancelled load
+    keeps its slot until the file it parses is let go.
+    """
+    loop = asyncio.get_running_loop()
+    slot = _large_load_slot()
+    await slot.acquire()
+    try:
+        future = _get_executor().submit(function, *args)
+    except BaseException:
+        slot.release()
+        raise
+
+    def release(done):
+        try:
+            loop.call_soon_threadsafe(slot.release)   # the semaphore belongs to the event loop's thread
+        except RuntimeError:   # the event loop is closed, nothing waits for the slot any more
+            pass
+
+    future.add_done_callback(release)
+    return await asyncio.wrap_future(future)
+
+
+async def load_database(file_name):
+    """Load database from a file.
+
+    (str) -> tuple
+
+    :param file_name: file name or path to the file that will be loaded
+
+    Same as jdf_lib.load_database(), returns (field_names, field_types, data_base) or -1 on a load error.
+    Files of LARGE_FILE_SIZE and above wait for a free slot, so that only MAX_LARGE_LOADS of them
+    are held in memory while being parsed at the same time (cancelled loads included, see _run_large()).
+    """
+    try:
+        size = os.path.getsize(file_name)
+    except OSError:
+        return -1
+    if size >= LARGE_FILE_SIZE:
+        return await _run_large(jdf_lib.load_database, file_name)
+    return await _run(jdf_lib.load_database, file_name)
+
+
+async def save_database(file_name, field_names, field_types, data_base, metadata=False):
+    """Save database to a file.
+
+    (str, list, list, list, bool) -> None
+
+    Same as jdf_lib.save_database(), the data is serialized and written inside of the thread pool.
+    """
+    await _run(jdf_lib.save_database, file_name, field_names, field_types, data_base, metadata=metadata)
+
+
+async def iter_rows(file_name, chunk_size=ROW_CHUNK):
+    """Iterate through the rows of a database.
+
+    (str, int) -> async generator
+
+    :param file_name: file name or path to the file that will be loaded
+    :param chunk_size: amount of rows read (inside of the thread pool) at a time
+
+    Usage:  async for row in jdf_lib.aio.iter_rows('sample_data.jdf'): ...
+    The rows are streamed with jdf_lib.stream_database(), only chunk_size of them are held in memory at once.
+    Raises IOError if the file cannot be loaded, ValueError on a corrupted data line.
+    """
+    loaded_data = await _run(jdf_lib.stream_database, file_name)
+    if loaded_data == -1:
+        raise IOError('Error while loading file: ' + file_name)
+    rows = loaded_data[2]
+    try:
+        while True:
+            chunk = await _run(lambda: list(islice(rows, chunk_size)))
+            if not chunk:
+                return
+            for row in chunk:
+                yield row
+    finally:
+        try:
+            rows.close()   # closes the file if the iteration stopped early
+        except ValueError:   # cancelled while a thread reads a chunk, the file is closed once it is let go
+            pass
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# coding=utf-8
+# -----------------------------------------------------------------------------
+# Name:        jdf_arrow.py
+# Purpose:     Apache Arrow and Parquet interchange of the jdf library
+# Author:      Damian Chrzanowski
+# Created:     19/10/26
+# Modified:    19/10/26
+# Copyright:   pjdamian.chrzanowski@gmail.com
+# License:     GNU Public License v3
+# Version:     1.0
+# Revision:    N/A
+# -----------------------------------------------------------------------------
+# jdf_arrow, converts databases to and from Arrow IPC and Parquet files (available as jdf_lib.arrow)
+# Copyright (C) 2016 Damian Chrzanowski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------
+# Needs the pyarrow package, jdf_lib.arrow is None if it is not installed.
+# str, int, float and bool columns map to Arrow's string, int64, float64 and bool types, columns of any other type
+# are stored as json text. The JDF column types are kept in the schema's metadata (TYPES_KEY), so that they come back
+# unchanged. Files written by other programs are mapped the other way round (integers -> int, and so on).
+import json
+from itertools import islice
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+try:
+    import pyarrow.parquet as pq
+except ImportError:   # pyarrow can be built without parquet support
+    pq = None
+
+import jdf_lib
+
+ARROW_BATCH = 64 * 1024   # rows per record batch
+ARROW_TYPES = {'str': pa.string(), 'int': pa.int64(), 'float': pa.float64(), 'bool': pa.bool_()}
+TYPES_KEY = b'jdf_types'   # schema metadata key that holds the JDF column types
+
+
+def arrow_schema(field_names, field_types):
+    """Return the Arrow schema of a database.
+
+    (list, list) -> object
+    """
+    fields = [pa.field(name, ARROW_TYPES.get(field_types[idx], pa.string())) for idx, name in enumerate(field_names)]
+    return pa.schema(fields, metadata={TYPES_KEY: json.dumps(field_types).encode('utf-8')})
+
+
+def field_types_of(schema):
+    """Return the JDF column types of an Arrow schema.
+
+    (object) -> list
+
+    The types kept in the schema's metadata are used if there are any, otherwise they are mapped from the Arrow
+    types: integers -> int, floating point -> float, bool -> bool, anything else -> str.
+    """
+    if schema.metadata and TYPES_KEY in schema.metadata:
+        field_types = json.loads(schema.metadata[TYPES_KEY].decode('utf-8'))
+        if len(field_types) == len(schema):
+            return field_types
+    field_types = list()
+    for each in schema:
+        if pa.types.is_integer(each.type):
+            field_types.append('int')
+        elif pa.types.is_floating(each.type):
+            field_types.append('float')
+        elif pa.types.is_boolean(each.type):
+            field_types.append('bool')
+        else:
+            field_types.append('str')
+    return field_types
+
+
+def record_batches(field_names, field_types, rows, batch_size=ARROW_BATCH):
+    """Turn rows into Arrow record batches.
+
+    (list, list, iterable, int) -> generator
+
+    :param rows: any iterable of rows
+    :param batch_size: rows per record batch
+
+    Only batch_size rows are held in memory (as lists and as a batch) at a time.
+    """
+    schema = arrow_schema(field_names, field_types)
+    json_columns = [idx for idx, each in enumerate(field_types) if each not in ARROW_TYPES]
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        columns = [list(each) for each in zip(*batch)]
+        for idx in json_columns:
+            columns[idx] = [None if value is None else json.dumps(value) for value in columns[idx]]
+        arrays = [pa.array(each, type=schema.field(idx).type) for idx, each in enumerate(columns)]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def batch_rows(batch, field_types):
+    """Turn an Arrow record batch into rows.
+
+    (object, list) -> list
+
+    :param field_types: the JDF column types (see field_types_of())
+    """
+    columns = list()
+    for idx, column in enumerate(batch.columns):
+        values = column.to_pylist()
+        if field_types[idx] not in ARROW_TYPES:   # json text
+            values = [None if value is None else json.loads(value) for value in values]
+        elif field_types[idx] == 'str' and not pa.types.is_string(column.type) \
+                and not pa.types.is_large_string(column.type):   # dates and such of files written by other programs
+            values = [None if value is None else str(value) for value in values]
+        columns.append(values)
+    return [list(row) for row in zip(*columns)]
+
+
+def _write_database(schema, batches, jdf_path, metadata):
+    """Write record batches to a JDF file.
+
+    (object, iterable, str, bool) -> int
+
+    Returns the amount of rows written.
+    """
+    field_types = field_types_of(schema)
+    writer = jdf_lib.DatabaseWriter(jdf_path, schema.names, field_types, metadata=metadata)
+    try:
+        for batch in batches:
+            writer.write_rows(batch_rows(batch, field_types))
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def _read_database(schema, batches):
+    """Read record batches into a database.
+
+    (object, iterable) -> tuple
+
+    Returns (field_names, field_types, data_base) like jdf_lib.load_database() does.
+    """
+    field_types = field_types_of(schema)
+    data_base = list()
+    for batch in batches:
+        data_base.extend(batch_rows(batch, field_types))
+    return schema.names, field_types, data_base
+
+
+def is_arrow(file_name):
+    """Check if a file is an Arrow IPC file (Feather version 2 files are Arrow IPC files).
+
+    (str) -> bool
+    """
+    return _starts_with(file_name, b'ARROW1')
+
+
+def is_parquet(file_name):
+    """Check if a file is a Parquet file.
+
+    (str) -> bool
+    """
+    return _starts_with(file_name, b'PAR1')
+
+
+def _starts_with(file_name, magic):
+    try:
+        with open(file_name, 'rb') as f_handle:
+            return f_handle.read(len(magic)) == magic
+    except (IOError, OSError):
+        return False
+
+
+def _open_arrow(arrow_path):
+    """Open an Arrow IPC file (or stream).
+
+    (str) -> tuple
+
+    Returns (schema, record batches, memory mapped file) or -1 if the file cannot be read.
+    """
+    try:
+        source = pa.memory_map(arrow_path)
+    except (IOError, OSError):
+        return -1
+    try:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(idx) for idx in range(reader.num_record_batches))
+        except pa.ArrowInvalid:   # not the file format, try the stream format
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            batches = reader
+    except pa.ArrowInvalid:
+        source.close()
+        return -1
+    return reader.schema, batches, source
+
+
+def _open_parquet(parquet_path, batch_size):
+    """Open a Parquet file.
+
+    (str, int) -> tuple
+
+    Returns (schema, record batches, parquet file) or -1 if the file cannot be read.
+    Raises ImportError if pyarrow has no parquet support.
+    """
+    if pq is None:
+        raise ImportError('pyarrow was built without parquet support')
+    try:
+        parquet_file = pq.ParquetFile(parquet_path)
+    except (IOError, OSError, pa.ArrowInvalid):
+        return -1
+    return parquet_file.schema_arrow, parquet_file.iter_batches(batch_size), parquet_file
+
+
+def save_arrow(arrow_path, field_names, field_types, data_base, batch_size=ARROW_BATCH):
+    """Save database to an Arrow IPC file.
+
+    (str, list, list, iterable, int) -> int
+
+    :param arrow_path: path to the Arrow file that will be saved
+    :param field_names: a list of databases' column names
+    :param field_types: a list of databases' column types
+    :param data_base: any iterable of rows
+    :param batch_size: rows per record batch
+
+    The rows are written a record batch at a time. Returns the amount of rows written.
+    """
+    count = 0
+    with pa.OSFile(arrow_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, arrow_schema(field_names, field_types)) as writer:
+            for batch in record_batches(field_names, field_types, data_base, batch_size):
+                writer.write_batch(batch)
+                count += batch.num_rows
+    return count
+
+
+def load_arrow(arrow_path):
+    """Load database from an Arrow IPC file (or stream).
+
+    (str) -> tuple
+
+    Returns (field_names, field_types, data_base) like jdf_lib.load_database() does, or -1 on a load error.
+    """
+    opened = _open_arrow(arrow_path)
+    if opened == -1:
+        return -1
+    try:
+        return _read_database(opened[0], opened[1])
+    finally:
+        opened[2].close()
+
+
+def to_arrow(jdf_path, arrow_path, batch_size=ARROW_BATCH):
+    """Convert a JDF file to an Arrow IPC file.
+
+    (str, str, int) -> int
+
+    :param jdf_path: path to the JDF file
+    :param arrow_path: path to the Arrow file that will be saved
+    :param batch_size: rows per record batch
+
+    The rows are streamed from the JDF file (see jdf_lib.stream_database()) and written a record batch at a time.
+    Returns the amount of rows written or -1 if the JDF file cannot be loaded.
+    """
+    loaded_data = jdf_lib.stream_database(jdf_path)
+    if loaded_data == -1:
+        return -1
+    return save_arrow(arrow_path, loaded_data[0], loaded_data[1], loaded_data[2], batch_size)
+
+
+def from_arrow(arrow_path, jdf_path, metadata=True):
+    """Convert an Arrow IPC file (or stream) to a JDF file.
+
+    (str, str, bool) -> int
+
+    :param arrow_path: path to the Arrow file
+    :param jdf_path: path to the JDF file that will be saved
+    :param metadata: add a metadata record to the JDF file (see jdf_lib.inspect())
+
+    The file is memory mapped and read a record batch at a time.
+    Returns the amount of rows written or -1 if the Arrow file cannot be read.
+    """
+    opened = _open_arrow(arrow_path)
+    if opened == -1:
+        return -1
+    try:
+        return _write_database(opened[0], opened[1], jdf_path, metadata)
+    finally:
+        opened[2].close()
+
+
+def save_parquet(parquet_path, field_names, field_types, data_base, batch_size=ARROW_BATCH):
+    """Save database to a Parquet file.
+
+    (str, list, list, iterable, int) -> int
+
+    Same as save_arrow(), every record batch becomes a row group.
+    Raises ImportError if pyarrow has no parquet support.
+    """
+    if pq is None:
+        raise ImportError('pyarrow was built without parquet support')
+    count = 0
+    with pq.ParquetWriter(parquet_path, arrow_schema(field_names, field_types)) as writer:
+        for batch in record_batches(field_names, field_types, data_base, batch_size):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    return count
+
+
+def load_parquet(parquet_path, batch_size=ARROW_BATCH):
+    """Load database from a Parquet file (files written by pandas' DataFrame.to_parquet() included).
+
+    (str, int) -> tuple
+
+    Returns (field_names, field_types, data_base) like jdf_lib.load_database() does, or -1 on a load error.
+    Raises ImportError if pyarrow has no parquet support.
+    """
+    opened = _open_parquet(parquet_path, batch_size)
+    if opened == -1:
+        return -1
+    try:
+        return _read_database(opened[0], opened[1])
+    finally:
+        opened[2].close()
+
+
+def to_parquet(jdf_path, parquet_path, batch_size=ARROW_BATCH):
+    """Convert a JDF file to a Parquet file.
+
+    (str, str, int) -> int
+
+    :param jdf_path: path to the JDF file
+    :param parquet_path: path to the Parquet file that will be saved
+    :param batch_size: rows per record batch (and per row group)
+
+    Same as to_arrow(). Raises ImportError if pyarrow has no parquet support.
+    """
+    loaded_data = jdf_lib.stream_database(jdf_path)
+    if loaded_data == -1:
+        return -1
+    return save_parquet(parquet_path, loaded_data[0], loaded_data[1], loaded_data[2], batch_size)
+
+
+def from_parquet(parquet_path, jdf_path, batch_size=ARROW_BATCH, metadata=True):
+    """Convert a Parquet file to a JDF file.
+
+    (str, str, int, bool) -> int
+
+    :param parquet_path: path to the Parquet file
+    :param jdf_path: path to the JDF file that will be saved
+    :param batch_size: rows per record batch read from the file
+    :param metadata: add a metadata record to the JDF file (see jdf_lib.inspect())
+
+    Same as from_arrow(). Raises ImportError if pyarrow has no parquet support.
+    """
+    opened = _open_parquet(parquet_path, batch_size)
+    if opened == -1:
+        return -1
+    try:
+        return _write_database(opened[0], opened[1], jdf_path, metadata)
+    finally:
+        opened[2].close()
+
+
+def _shared_validity(nulls, rows):
+    """Turn a shared table's null mask (1 = null) into an Arrow validity bitmap.
+
+    (memoryview, int) -> object
+    """
+    if nulls is None:
+        return None
+    mask = pa.Array.from_buffers(pa.uint8(), rows, [None, pa.py_buffer(nulls)])
+    return pc.equal(mask, 0).buffers()[1]
+
+
+def table_from_shared(table):
+    """Wrap a shared memory table (see jdf_lib.shm.attach_table()) into an Arrow table.
+
+    (SharedTable) -> object
+
+    int and float columns and the text of str columns are not copied, the Arrow arrays point straight into the
+    shared memory (str columns become large_string arrays). Only the bool columns and the null masks are converted,
+    Arrow packs them into bits. The Arrow table has to be released before the shared table is closed.
+    """
+    arrays = list()
+    for kind, data, heap, nulls in table.columns:
+        validity = _shared_validity(nulls, table.rows)
+        if kind == 'bool':
+            values = pa.Array.from_buffers(pa.uint8(), table.rows, [None, pa.py_buffer(data)])
+            array = pc.not_equal(values, 0)
+            if validity is not None:
+                array = pa.Array.from_buffers(pa.bool_(), table.rows, [validity, array.buffers()[1]])
+        elif kind in jdf_lib.shm.NUMBER_FORMATS:
+            array = pa.Array.from_buffers(ARROW_TYPES[kind], table.rows, [validity, pa.py_buffer(data)])
+        else:
+            array = pa.Array.from_buffers(pa.large_string(), table.rows,
+                                          [validity, pa.py_buffer(data), pa.py_buffer(heap)])
+        arrays.append(array)
+    schema = pa.schema([pa.field(name, arrays[idx].type) for idx, name in enumerate(table.field_names)],
+                       metadata={TYPES_KEY: json.dumps(table.field_types).encode('utf-8')})
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _array_buffer(array, item_size, items):
+    """Return the bytes of an array's values (or offsets) buffer, without copying.
+
+    (object, int, int) -> memoryview
+    """
+    return memoryview(array.buffers()[1])[array.offset * item_size:(array.offset + items) * item_size]
+
+
+def publish_arrow(table, name=None):
+    """Publish an Arrow table into shared memory (see jdf_lib.shm.publish_table()).
+
+    (object, str) -> object
+
+    :param table: a pyarrow Table (or RecordBatch)
+    :param name: name of the shared memory block, a random name is picked if it is None
+
+    The Arrow buffers are copied into the shared memory as they are, the values are never turned into python
+    objects. Returns the multiprocessing.shared_memory.SharedMemory object that holds the table.
+    """
+    field_types = field_types_of(table.schema)
+    columns = list()
+    for idx, column in enumerate(table.columns):
+        if isinstance(column, pa.ChunkedArray):
+            column = column.combine_chunks()
+        nulls = None
+        if column.null_count:
+            nulls = _array_buffer(pc.is_null(column).cast(pa.uint8()), 1, len(column))
+        if field_types[idx] in jdf_lib.shm.NUMBER_FORMATS:
+            kind = field_types[idx]
+            column = column.fill_null(jdf_lib.TYPE_DEFAULTS[kind]).cast(ARROW_TYPES[kind] if kind != 'bool'
+                                                                        else pa.uint8())
+            columns.append((kind, _array_buffer(column, column.type.byte_width, len(column)), b'', nulls))
+            continue
+        if not pa.types.is_large_string(column.type):
+            try:
+                column = column.cast(pa.large_string())
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):   # dates and such of files of other programs
+                column = pa.array([None if value is None else str(value) for value in column.to_pylist()],
+                                  type=pa.large_string())
+        column = pa.concat_arrays([column.fill_null('')])   # the offsets of a sliced array do not start at 0
+        kind = 'str' if field_types[idx] == 'str' else 'json'
+        offsets = _array_buffer(column, 8, len(column) + 1)
+        heap = memoryview(column.buffers()[2] or b'')[:offsets.cast('q')[-1]]
+        columns.append((kind, offsets, heap, nulls))
+    return jdf_lib.shm.publish_columns(table.schema.names, field_types, table.num_rows, columns, name=name)
@@ -29,19 +29,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 # --------------------------------------------
-from gi.repository import Gdk, GdkPixbuf, Gtk
+from gi.repository import Gdk, GdkPixbuf, GLib, GObject, Gtk
 
+import ast
+import bisect
 import export_html
+import itertools
+import jdf_journal
 import jdf_lib
 import os
+import shutil
+import tempfile
+import threading
 import webbrowser
+from array import array
 
 if os.name == 'nt':
     PATH_BREAK = '\\'  # set the windows style path breaker = '\'
 else:
     PATH_BREAK = '/'   # set the Linux / Mac OS X style path breaker = '/'
+UMASK = os.umask(0)   # the umask can only be read by setting it, new files saved by write_atomically() respect it
+os.umask(UMASK)
 
 VERSION = 'v 1.2'   # current version
+# GObject type of each cell type, as reported by the TableModel's columns
+COLUMN_TYPES = {'str': GObject.TYPE_STRING, 'int': GObject.TYPE_INT64, 'float': GObject.TYPE_DOUBLE,
+                'bool': GObject.TYPE_BOOLEAN}
+# python types of the values that can be pasted into each cell type
+PASTE_TYPES = {'str': (str, type(u'')), 'int': (int, type(2 ** 64)), 'float': (int, type(2 ** 64), float),
+               'bool': (bool,)}
+LOAD_CHUNK = 20000   # rows handed over by the loading thread to the main loop at a time
+LOAD_PENDING = 2   # chunks handed over that the main loop has not added yet, the loading thread waits for it then
+SAVE_PROGRESS = 50000   # rows written between the updates of the save progress in the status bar
+HTML_PAGE_SIZES = ['All rows in one page', '1000', '10000', '50000']   # page size choices of the html export
+HTML_FORMATS = ['Static table', 'Virtual scrolling']   # format choices of the html export
+# file types of the import and export entries: filter name, file pattern, jdf_lib function
+IMPORT_FORMATS = {'csv': ('CSV file', '*.csv', jdf_lib.csv_to_jdf), 'xml': ('XML file', '*.xml', jdf_lib.xml_to_jdf)}
+EXPORT_FORMATS = {'csv': ('CSV file', '*.csv', jdf_lib.write_csv), 'xml': ('XML file', '*.xml', jdf_lib.write_xml)}
 
 
 class MainWindow(object):
@@ -109,6 +133,11 @@ class MainWindow(object):
         self.menuitem.connect('activate', lambda q: clipboard_manager('paste'))
         self.menu.append(self.menuitem)
 
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('icons/16/insert_row.png', 'Duplicate rows', from_file=True))
+        self.menuitem.connect('activate', lambda q: duplicate_rows())
+        self.menu.append(self.menuitem)
+
         self.separator = Gtk.SeparatorMenuItem()
         self.menu.append(self.separator)
 
@@ -118,7 +147,7 @@ class MainWindow(object):
         self.menu.append(self.menuitem)
 
         self.menuitem = Gtk.MenuItem()
-        self.menuitem.add(make_menu_item('icons/16/delete_row.png', 'Delete a row here', from_file=True))
+        self.menuitem.add(make_menu_item('icons/16/delete_row.png', 'Delete selected rows', from_file=True))
         self.menuitem.connect('activate', lambda q: delete_row('delete-here'))
         self.menu.append(self.menuitem)
 
@@ -254,6 +283,30 @@ class MainMenu(object):
         self.separator = Gtk.SeparatorMenuItem()
         self.menu1.append(self.separator)
 
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('document-import', 'Import CSV...'))
+        self.menuitem.connect("activate", lambda q: import_file('csv'))
+        self.menuitem.connect('select', lambda q: status_msg('Convert a csv file into a JDF file and open it'))
+        self.menu1.append(self.menuitem)
+
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('document-import', 'Import XML...'))
+        self.menuitem.connect("activate", lambda q: import_file('xml'))
+        self.menuitem.connect('select', lambda q: status_msg('Convert an xml file (<row> elements) into a JDF file'))
+        self.menu1.append(self.menuitem)
+
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('x-office-spreadsheet', 'Export as CSV'))
+        self.menuitem.connect("activate", lambda q: export_file('csv'))
+        self.menuitem.connect('select', lambda q: status_msg('Export current database as a csv file'))
+        self.menu1.append(self.menuitem)
+
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('text-xml', 'Export as XML'))
+        self.menuitem.connect("activate", lambda q: export_file('xml'))
+        self.menuitem.connect('select', lambda q: status_msg('Export current database as an xml file'))
+        self.menu1.append(self.menuitem)
+
         self.menuitem = Gtk.MenuItem()
         self.menuitem.add(make_menu_item('text-html', 'Export as HTML'))
         self.menuitem.connect("activate", lambda q: export_to_html())
@@ -276,22 +329,24 @@ class MainMenu(object):
         self.menu1 = Gtk.Menu()
         self.menuitem.set_submenu(self.menu1)
 
-        # self.menuitem = Gtk.MenuItem()
-        # self.menuitem.add(make_menu_item('edit-undo', 'Undo', accel='Ctrl+Z'))
-        # self.menuitem.add_accelerator('activate', self.MAINWINDOW.accelgroup, Gdk.keyval_from_name(
-        #     "z"), Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        # self.menuitem.connect('select', lambda q: status_msg('Undo recent changes'))
-        # self.menu1.append(self.menuitem)
-        #
-        # self.menuitem = Gtk.MenuItem()
-        # self.menuitem.add(make_menu_item('edit-redo', 'Redo', accel='Ctrl+Y'))
-        # self.menuitem.add_accelerator('activate', self.MAINWINDOW.accelgroup, Gdk.keyval_from_name(
-        #     "y"), Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
-        # self.menuitem.connect('select', lambda q: status_msg('Redo recent changes'))
-        # self.menu1.append(self.menuitem)
-        #
-        # self.separator = Gtk.SeparatorMenuItem()
-        # self.menu1.append(self.separator)
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('edit-undo', 'Undo', accel='Ctrl+Z'))
+        self.menuitem.add_accelerator('activate', self.MAINWINDOW.accelgroup, Gdk.keyval_from_name(
+            "z"), Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
+        self.menuitem.connect("activate", lambda q: undo_redo('undo'))
+        self.menuitem.connect('select', lambda q: status_msg('Undo recent changes'))
+        self.menu1.append(self.menuitem)
+
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('edit-redo', 'Redo', accel='Ctrl+Y'))
+        self.menuitem.add_accelerator('activate', self.MAINWINDOW.accelgroup, Gdk.keyval_from_name(
+            "y"), Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
+        self.menuitem.connect("activate", lambda q: undo_redo('redo'))
+        self.menuitem.connect('select', lambda q: status_msg('Redo recent changes'))
+        self.menu1.append(self.menuitem)
+
+        self.separator = Gtk.SeparatorMenuItem()
+        self.menu1.append(self.separator)
 
         self.menuitem = Gtk.MenuItem()
         self.menuitem.add(make_menu_item('edit-cut', 'Cut', accel='Ctrl+X'))
@@ -317,6 +372,22 @@ class MainMenu(object):
         self.menuitem.connect('select', lambda q: status_msg('Paste in data from the clipboard into the database'))
         self.menu1.append(self.menuitem)
 
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('icons/16/insert_row.png', 'Duplicate rows', accel='Ctrl+D', from_file=True))
+        self.menuitem.add_accelerator('activate', self.MAINWINDOW.accelgroup, Gdk.keyval_from_name(
+            "d"), Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
+        self.menuitem.connect('activate', lambda q: duplicate_rows())
+        self.menuitem.connect('select', lambda q: status_msg('Insert copies of the selected rows below them'))
+        self.menu1.append(self.menuitem)
+
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('edit-find', 'Filter rows', accel='Ctrl+F'))
+        self.menuitem.add_accelerator('activate', self.MAINWINDOW.accelgroup, Gdk.keyval_from_name(
+            "f"), Gdk.ModifierType.CONTROL_MASK, Gtk.AccelFlags.VISIBLE)
+        self.menuitem.connect('activate', lambda q: focus_filter())
+        self.menuitem.connect('select', lambda q: status_msg('Show only the rows that contain the words typed'))
+        self.menu1.append(self.menuitem)
+
         self.menuitem = Gtk.MenuItem(label="_Tabs", use_underline=True)
         self.menubar.append(self.menuitem)
         self.menu = Gtk.Menu()
@@ -386,6 +457,12 @@ class MainMenu(object):
         self.menuitem.connect('select', lambda q: status_msg('Insert a row at the currently highlighted area'))
         self.menu.append(self.menuitem)
 
+        self.menuitem = Gtk.MenuItem()
+        self.menuitem.add(make_menu_item('icons/16/insert_row.png', 'Duplicate rows', from_file=True))
+        self.menuitem.connect('activate', lambda q: duplicate_rows())
+        self.menuitem.connect('select', lambda q: status_msg('Insert copies of the selected rows below them'))
+        self.menu.append(self.menuitem)
+
         self.separator = Gtk.SeparatorMenuItem()
         self.menu.append(self.separator)
 
@@ -413,7 +490,7 @@ class MainMenu(object):
         self.menuitem = Gtk.MenuItem()
         self.menuitem.add(make_menu_item('icons/16/delete_row.png', 'Delete row here', from_file=True))
         self.menuitem.connect('activate', lambda q: delete_row('delete-here'))
-        self.menuitem.connect('select', lambda q: status_msg('Delete a row from the currently highlighted area'))
+        self.menuitem.connect('select', lambda q: status_msg('Delete the selected rows'))
         self.menu.append(self.menuitem)
 
         self.separator = Gtk.SeparatorMenuItem()
@@ -711,13 +788,458 @@ class MainToolbar(object):
         self.grid.remove_column(1)
 
 
+class TableModel(GObject.GObject, Gtk.TreeModel):
+    """Virtual table model.
+
+    (jdf_lib.ColumnStore) -> None
+
+    A Gtk.TreeModel that reads the cells straight out of a jdf_lib.ColumnStore when the view asks for them,
+    instead of holding a copy of every cell like a Gtk.ListStore does. Every row's index is kept in its
+    Gtk.TreeIter. Used like a Gtk.ListStore: model[path][column] = value, append(), prepend(), insert(),
+    remove(), len(model) and iteration through the rows.
+    Column 0 is the row numbers ('#'). They are not stored, the column reads as the row's index, so rows can be
+    added and removed without renumbering the ones after them. Column n of the model is column n - 1 of the store.
+    """
+
+    def __init__(self, store):
+        """Class constructor.
+
+        (self, jdf_lib.ColumnStore) -> None
+
+        :param store: the database (without the '#' column)
+        """
+        GObject.GObject.__init__(self)
+        self.store = store
+        self.on_edit = None   # called with the operation's name and arguments before a cell or row is changed
+
+    @staticmethod
+    def _iter(row):
+        """Make an iterator pointing to a row.
+
+        (int) -> Gtk.TreeIter
+        """
+        tree_iter = Gtk.TreeIter()
+        tree_iter.user_data = row
+        return tree_iter
+
+    @staticmethod
+    def _row(tree_iter):
+        """Return the index of the row an iterator points to.
+
+        (Gtk.TreeIter) -> int
+        """
+        return tree_iter.user_data or 0   # a null pointer (row 0) reads as None
+
+    def do_get_flags(self):
+        return Gtk.TreeModelFlags.LIST_ONLY   # the iterators are row indices, they do not survive inserts and removals
+
+    def do_get_n_columns(self):
+        return len(self.store.field_types) + 1
+
+    def do_get_column_type(self, column):
+        if column == 0:
+            return GObject.TYPE_INT64
+        return COLUMN_TYPES.get(self.store.field_types[column - 1], GObject.TYPE_STRING)
+
+    def do_get_iter(self, path):
+        row = path.get_indices()[0]
+        if 0 <= row < len(self.store):
+            return True, self._iter(row)
+        return False, None
+
+    def do_get_path(self, tree_iter):
+        return Gtk.TreePath.new_from_indices([self._row(tree_iter)])
+
+    def do_get_value(self, tree_iter, column):
+        if column == 0:   # the row numbers
+            return self._row(tree_iter)
+        return self.cell(self._row(tree_iter), column - 1)
+
+    def cell(self, row, column):
+        """Return a cell's value as the view shows it.
+
+        (self, int, int) -> object
+
+        :param column: index of the column within the store
+
+        A null (None) shows as its column type's default, the store keeps it as a null until the cell is edited.
+        """
+        value = self.store.value(row, column)
+        if value is None:
+            return jdf_lib.TYPE_DEFAULTS.get(self.store.field_types[column], '')
+        return value
+
+    def do_iter_next(self, tree_iter):
+        row = self._row(tree_iter) + 1
+        if row < len(self.store):
+            tree_iter.user_data = row
+            return True
+        return False
+
+    def do_iter_previous(self, tree_iter):
+        row = self._row(tree_iter) - 1
+        if row >= 0:
+            tree_iter.user_data = row
+            return True
+        return False
+
+    def do_iter_children(self, parent):
+        if parent is None and len(self.store):
+            return True, self._iter(0)
+        return False, None
+
+    def do_iter_has_child(self, tree_iter):
+        return False
+
+    def do_iter_n_children(self, tree_iter):
+        if tree_iter is None:   # the amount of top level rows
+            return len(self.store)
+        return 0
+
+    def do_iter_nth_child(self, parent, n):
+        if parent is None and 0 <= n < len(self.store):
+            return True, self._iter(n)
+        return False, None
+
+    def do_iter_parent(self, child):
+        return False, None
+
+    def set_value(self, tree_iter, column, value):
+        """Change a cell's value.
+
+        (self, Gtk.TreeIter, int, object) -> None
+
+        Values set in column 0 (the row numbers) are ignored.
+        """
+        if column == 0:
+            return
+        row = self._row(tree_iter)
+        if self.on_edit is not None:
+            self.on_edit('set', row, column, value)
+        self.store.set_value(row, column - 1, value)
+        self.row_changed(Gtk.TreePath.new_from_indices([row]), tree_iter)
+
+    def insert(self, position, row=None):
+        """Insert a row.
+
+        (self, int, list) -> Gtk.TreeIter
+
+        :param position: index of the new row, -1 or an index past the last row adds it at the end
+        :param row: the row's values (starting with the '#' column), the column type defaults are used if it is None
+        """
+        position = int(position)
+        if position < 0 or position > len(self.store):
+            position = len(self.store)
+        if row is None:
+            row = [jdf_lib.TYPE_DEFAULTS.get(each) for each in self.store.field_types]
+        else:
+            row = list(row)[1:]
+        if self.on_edit is not None:
+            self.on_edit('insert_row', position, row)
+        self.store.insert(position, row)
+        tree_iter = self._iter(position)
+        self.row_inserted(Gtk.TreePath.new_from_indices([position]), tree_iter)
+        return tree_iter
+
+    def append(self, row=None):
+        """Add a row at the end.
+
+        (self, list) -> Gtk.TreeIter
+        """
+        return self.insert(-1, row)
+
+    def prepend(self, row=None):
+        """Add a row at the beginning.
+
+        (self, list) -> Gtk.TreeIter
+        """
+        return self.insert(0, row)
+
+    def insert_rows(self, rows, columns, emit=True):
+        """Insert several rows at once.
+
+        (self, list, list, bool) -> None
+
+        :param rows: indices the new rows get, in ascending order
+        :param columns: the new rows' values, column by column and without the '#' column
+        :param emit: emit the row-inserted signals, not needed while no view shows the model
+
+        Same as jdf_lib.ColumnStore.insert_rows(). The signals are emitted once the rows are in the store.
+        """
+        if self.on_edit is not None:
+            self.on_edit('insert_rows', rows, columns)
+        self.store.insert_rows(rows, columns)
+        if emit:
+            for row in rows:
+                self.row_inserted(Gtk.TreePath.new_from_indices([row]), self._iter(row))
+
+    def set_rows(self, row, columns, emit=True):
+        """Change the values of consecutive rows.
+
+        (self, int, list, bool) -> None
+
+        :param row: index of the first row, the rows have to exist
+        :param columns: the new values, column by column and without the '#' column
+
+        Same as jdf_lib.ColumnStore.set_rows().
+        """
+        if self.on_edit is not None:
+            self.on_edit('set_rows', row, columns)
+        self.store.set_rows(row, columns)
+        if emit:
+            for each in range(row, row + len(columns[0])):
+                self.row_changed(Gtk.TreePath.new_from_indices([each]), self._iter(each))
+
+    def remove_rows(self, rows, emit=True):
+        """Remove several rows at once.
+
+        (self, list, bool) -> None
+
+        :param rows: indices of the rows, in ascending order and without repeats
+
+        Same as jdf_lib.ColumnStore.remove_rows(). The signals are emitted once the rows are out of the store,
+        last row first, so that every path is still valid when the view gets it.
+        """
+        if self.on_edit is not None:
+            self.on_edit('remove_rows', rows)
+        self.store.remove_rows(rows)
+        if emit:
+            for row in reversed(rows):
+                self.row_deleted(Gtk.TreePath.new_from_indices([row]))
+
+    def insert_column(self, column, field_type, value, values=None):
+        """Insert a column.
+
+        (self, int, str, object, object) -> None
+
+        :param column: index of the new column within the model (1 and above)
+
+        Same as jdf_lib.ColumnStore.insert_column(). The view's columns have to be bound to the new indices
+        (see DataCells.insert_column()).
+        """
+        self.store.insert_column(column - 1, field_type, value, values)
+
+    def remove_column(self, column):
+        """Remove a column.
+
+        (self, int) -> object
+
+        Returns the column's values (see jdf_lib.ColumnStore.remove_column()).
+        """
+        return self.store.remove_column(column - 1)
+
+    def set_column(self, column, field_type, values):
+        """Replace a column's values and type.
+
+        (self, int, str, object) -> object
+
+        Same as jdf_lib.ColumnStore.set_column().
+        """
+        return self.store.set_column(column - 1, field_type, values)
+
+    def convert_column(self, column, field_type, convert):
+        """Change the type of a column.
+
+        (self, int, str, function) -> None
+        """
+        self.store.convert_column(column - 1, field_type, convert)
+
+    def remove(self, tree_iter):
+        """Remove a row.
+
+        (self, Gtk.TreeIter) -> bool
+
+        Returns True if the iterator points to the next row afterwards (like Gtk.ListStore.remove()).
+        """
+        row = self._row(tree_iter)
+        if self.on_edit is not None:
+            self.on_edit('remove_row', row)
+        self.store.remove(row)
+        self.row_deleted(Gtk.TreePath.new_from_indices([row]))
+        return row < len(self.store)
+
+
+class FilterModel(GObject.GObject, Gtk.TreeModel):
+    """Rows of a TableModel that match a filter.
+
+    (TableModel, array) -> None
+
+    Plays the part of a Gtk.TreeModelFilter, but the shown rows are handed to it as a list (worked out by
+    jdf_lib.SearchIndex) instead of being tested one by one, so filtering costs the amount of matching rows,
+    not the amount of rows of the table. Column 0 reads as the rows' indices within the table model.
+    Cells changed through the table model are passed on, rows the table model inserts or deletes one at a time
+    are added or taken out. Changes of many rows are taken in with rows_inserted() and rows_removed().
+    """
+
+    def __init__(self, child, rows):
+        """Class constructor.
+
+        (self, TableModel, array) -> None
+
+        :param child: the table model
+        :param rows: indices of the shown rows within the table model, in ascending order
+        """
+        GObject.GObject.__init__(self)
+        self.child = child
+        self.rows = rows
+        self.handlers = [child.connect('row-changed', self.child_row_changed),
+                         child.connect('row-inserted', self.child_row_inserted),
+                         child.connect('row-deleted', self.child_row_deleted)]
+
+    def release(self):
+        """Stop following the table model.
+
+        (self) -> None
+        """
+        for each in self.handlers:
+            self.child.disconnect(each)
+        self.handlers = list()
+
+    def child_row(self, row):
+        """Return the index within the table model of a shown row.
+
+        (self, int) -> int
+        """
+        return self.rows[row]
+
+    def view_row(self, child_row):
+        """Return the index of a table model's row among the shown rows.
+
+        (self, int) -> int
+
+        Returns -1 if the row is not shown.
+        """
+        idx = bisect.bisect_left(self.rows, child_row)
+        if idx < len(self.rows) and self.rows[idx] == child_row:
+            return idx
+        return -1
+
+    def rows_inserted(self, rows):
+        """Take in rows inserted into the table model without its signals (see DataCells.insert_rows()).
+
+        (self, list) -> None
+
+        :param rows: indices the new rows got, in ascending order. They are shown as well.
+
+        Must be called while no view shows the model.
+        """
+        shifted = list()
+        idx = 0   # new rows in front of the shown row
+        for row in self.rows:
+            while idx < len(rows) and rows[idx] <= row + idx:
+                idx += 1
+            shifted.append(row + idx)
+        self.rows = array('i', sorted(shifted + list(rows)))
+
+    def rows_removed(self, rows):
+        """Take in rows removed from the table model without its signals (see DataCells.remove_rows()).
+
+        (self, list) -> None
+
+        :param rows: indices of the removed rows (before the removal), in ascending order
+
+        Must be called while no view shows the model.
+        """
+        kept = list()
+        idx = 0   # removed rows in front of the shown row
+        for row in self.rows:
+            while idx < len(rows) and rows[idx] < row:
+                idx += 1
+            if idx < len(rows) and rows[idx] == row:
+                continue
+            kept.append(row - idx)
+        self.rows = array('i', kept)
+
+    def child_row_changed(self, child, path, tree_iter):
+        row = self.view_row(path.get_indices()[0])
+        if row != -1:
+            self.row_changed(Gtk.TreePath.new_from_indices([row]), TableModel._iter(row))
+
+    def child_row_inserted(self, child, path, tree_iter):
+        child_row = path.get_indices()[0]
+        row = bisect.bisect_left(self.rows, child_row)
+        for idx in range(row, len(self.rows)):   # the rows after it move down
+            self.rows[idx] += 1
+        self.rows.insert(row, child_row)   # a new row is shown, whether it matches the filter or not
+        self.row_inserted(Gtk.TreePath.new_from_indices([row]), TableModel._iter(row))
+
+    def child_row_deleted(self, child, path):
+        child_row = path.get_indices()[0]
+        row = self.view_row(child_row)
+        if row != -1:
+            del self.rows[row]
+        for idx in range(bisect.bisect_left(self.rows, child_row), len(self.rows)):   # the rows after it move up
+            self.rows[idx] -= 1
+        if row != -1:
+            self.row_deleted(Gtk.TreePath.new_from_indices([row]))
+
+    def do_get_flags(self):
+        return Gtk.TreeModelFlags.LIST_ONLY   # the iterators are row indices, they do not survive inserts and removals
+
+    def do_get_n_columns(self):
+        return self.child.do_get_n_columns()
+
+    def do_get_column_type(self, column):
+        return self.child.do_get_column_type(column)
+
+    def do_get_iter(self, path):
+        row = path.get_indices()[0]
+        if 0 <= row < len(self.rows):
+            return True, TableModel._iter(row)
+        return False, None
+
+    def do_get_path(self, tree_iter):
+        return Gtk.TreePath.new_from_indices([TableModel._row(tree_iter)])
+
+    def do_get_value(self, tree_iter, column):
+        child_row = self.rows[TableModel._row(tree_iter)]
+        if column == 0:   # the row numbers of the table
+            return child_row
+        return self.child.cell(child_row, column - 1)
+
+    def do_iter_next(self, tree_iter):
+        row = TableModel._row(tree_iter) + 1
+        if row < len(self.rows):
+            tree_iter.user_data = row
+            return True
+        return False
+
+    def do_iter_previous(self, tree_iter):
+        row = TableModel._row(tree_iter) - 1
+        if row >= 0:
+            tree_iter.user_data = row
+            return True
+        return False
+
+    def do_iter_children(self, parent):
+        if parent is None and len(self.rows):
+            return True, TableModel._iter(0)
+        return False, None
+
+    def do_iter_has_child(self, tree_iter):
+        return False
+
+    def do_iter_n_children(self, tree_iter):
+        if tree_iter is None:   # the amount of top level rows
+            return len(self.rows)
+        return 0
+
+    def do_iter_nth_child(self, parent, n):
+        if parent is None and 0 <= n < len(self.rows):
+            return True, TableModel._iter(n)
+        return False, None
+
+    def do_iter_parent(self, child):
+        return False, None
+
+
 class DataCells(object):
     """Data Cells hold all the information about the database"""
 
-    def __init__(self, MAINWINDOW, file_name, list_of_records, header_types, header_names, position):
+    def __init__(self, MAINWINDOW, file_name, list_of_records, header_types, header_names, position, loading=False):
         """Constructor of the class
 
-        (self, object, str, list, list, list, int) -> None
+        (self, object, str, list, list, list, int, bool) -> None
 
         :param MAINWINDOW: is the class instance of the main window.
         :param file_name: is the entire path of the filename
@@ -725,47 +1247,375 @@ class DataCells(object):
         :param header_types: is a list of strings containing the types of each of the columns
         :param header_names: is a list of strings containing the names of each of the columns
         :param position: is the current spot (index) occupied by the class within the windows
+        :param loading: the file is still being loaded (see open_in_background()), the tab shows a progress bar
+                        until finish_loading() is called
 
         This class is the main body of the cells displayed.
         Holds all the mechanisms of the cell edits and any associated manipulations.
         """
         self.MAINWINDOW = MAINWINDOW
-        self.list_of_records = list_of_records
         self.header_types = header_types
         self.header_names = header_names
         self.file_edited = False  # becomes True is a modification occures within the database
         self.file_name = file_name
         self.position = position
-        self.set_input_data()  # prepare the list for the table (give it field types str,float etc.)
+        self.loading = loading   # rows are still being added by open_in_background()
+        self.saving = False   # a save_in_background() of this tab is running
+        self.edit_count = 0   # increased on every edit, tells if the tab was edited while it was being saved
+        self.journal = None   # crash recovery journal of the edits, made on the first edit (see log_edit())
+        self.journal_failed = False   # the journal could not be written, the tab's edits are not journaled any more
+        self.replaying = False   # edits replayed from a journal are not logged again
+        self.undo_log = jdf_journal.UndoLog()   # undo and redo history of the edits (see log_edit())
+        self.load_cancelled = False   # the user cancelled the loading (or closed the tab)
+        self.filter_model = None   # FilterModel shown by the view while the filter bar holds a search
+        self.filter_waiting = False   # a search waits for the index to be built
+        self.index = None   # jdf_lib.SearchIndex of the text columns, None while it is being built
+        self.index_generation = 0   # increased whenever the index has to be built again, see build_index()
+        self.index_building = False   # a thread is building the index
+        self.index_scheduled = False   # start_index() is waiting for the main loop
+        self.index_pending = None   # cell edits made while the index is being built
+        self.set_input_data(list_of_records)  # prepare the model for the table (give it field types str,float etc.)
         self.add_table()  # add the table to the window from the records (liststore)
-        self.currently_selected_row = 0  # currently selected row (for copy,cut,paste purpose)
+        self.currently_selected_row = 0  # highlighted row (the cursor's), rows are added and pasted there
         self.selector = self.treeview.get_selection()   # allows for selections control (cut,copy,paste)
-        # self.selector.set_mode(Gtk.SelectionMode.MULTIPLE)  # allow to select multiple rows
-        self.selector.connect('changed', self.selector_changed)  # handler for the selector
+        self.selector.set_mode(Gtk.SelectionMode.MULTIPLE)  # allow to select multiple rows (ctrl and shift click)
+        self.selector_handler = self.selector.connect('changed', self.selector_changed)  # handler for the selector
+        if not loading:   # a loaded tab is indexed once all of its rows are in, see finish_loading()
+            self.build_index()
 
-    def set_input_data(self):
-        """Prepare the Gtk.Liststore() for the Gtk.Treeview() class
+    def set_input_data(self, list_of_records):
+        """Prepare the model for the Gtk.Treeview() class
 
-        (self) -> None
+        (self, list) -> None
+
+        :param list_of_records: is the entire database record
+
+        The records are moved into a jdf_lib.ColumnStore (int, float and bool columns become typed arrays)
+        and shown through a TableModel, which hands the cells to the view as they get scrolled into sight.
+        No copy of the records is kept, the store is the only copy of the data.
+        The '#' column is not stored, the model numbers the rows (see TableModel).
         """
-        # make the ListStore
-        exec_string = 'int'
-        for each in self.header_types:  # add the header names to the string
-            exec_string += ', ' + each
-        exec('self.liststore = Gtk.ListStore(' + exec_string + ')')  # execute the string
-        # enumerate the records inputed to the class (add incremental numbers at index 0)
-        for idx, val in enumerate(self.list_of_records):
-            val.insert(0, idx)
+        self.liststore = TableModel(jdf_lib.ColumnStore.from_rows(self.header_types, list_of_records))
+        self.liststore.on_edit = self.log_edit   # the model reports the cell and row edits
         self.header_types.insert(0, 'int')   # add the first row as int
         self.header_names.insert(0, '#')   # add the first row's label as '#'
-        for each in self.list_of_records:  # add the database to the table
-            self.liststore.append(each)
 
         self.treeview = Gtk.TreeView(model=self.liststore)
         self.treeview.set_property('enable-grid-lines', Gtk.TreeViewGridLines(3))
         self.treeview.set_property('activate-on-single-click', True)
         self.set_tooltip_if_column_is_name()  # launche the method, set the tooltip (if possible)
         self.treeview.set_headers_clickable(True)
+        self.treeview.set_enable_search(False)   # the filter bar searches the rows instead (see apply_filter())
+
+    def make_column(self, each):
+        """Make the view column of a database column.
+
+        (self, int) -> Gtk.TreeViewColumn
+
+        :param each: index of the column within the model
+
+        Picks the cell type based on the type of the column (str, float, int, bool).
+        """
+        if each == 0:       # the first column is special (doesn't expand)
+            treeviewcolumn = Gtk.TreeViewColumn(self.header_names[each])
+            treeviewcolumn.set_expand(False)
+        else:
+            treeviewcolumn = Gtk.TreeViewColumn(self.header_names[each] + ' - ' + self.header_types[each])
+            treeviewcolumn.set_expand(True)
+            treeviewcolumn.set_alignment(0.5)
+        treeviewcolumn.set_clickable(True)
+        treeviewcolumn.set_resizable(True)
+        treeviewcolumn.set_sizing(Gtk.TreeViewColumnSizing.FIXED)   # needed by the fixed height mode
+        if each == 0:   # first column has special settings (non-editable, set width, etc.)
+            treeviewcolumn.set_min_width(40)
+            treeviewcolumn.set_alignment(0.5)
+            adjustment = Gtk.Adjustment(0, 0, 100000, 1, 1, 2)
+            cellrenderer = Gtk.CellRendererSpin()
+            cellrenderer.set_property("editable", False)
+            cellrenderer.set_property("adjustment", adjustment)
+            cellrenderer.set_property("digits", False)
+        elif self.header_types[each] == 'str':  # if the column is of str type
+            treeviewcolumn.set_min_width(90)
+            cellrenderer = Gtk.CellRendererText()   # text entry cell
+            cellrenderer.set_property("editable", True)  # is editable
+        elif self.header_types[each] == 'bool':  # if the column is of bool type
+            treeviewcolumn.set_min_width(70)
+            cellrenderer = Gtk.CellRendererToggle()  # toggle type cell
+        elif self.header_types[each] == 'float':  # if the column is of float type
+            treeviewcolumn.set_min_width(110)
+            adjustment = Gtk.Adjustment(0, -100000, 100000, 1, 1, 2)
+            cellrenderer = Gtk.CellRendererSpin()   # spin type cell (numbers)
+            cellrenderer.set_property("editable", True)
+            cellrenderer.set_property("adjustment", adjustment)
+            cellrenderer.set_property("digits", 6)   # display/edit with a 6 decimal place accuracy
+        else:   # otherwise the column is an int type
+            treeviewcolumn.set_min_width(80)
+            adjustment = Gtk.Adjustment(0, -100000, 100000, 1, 1, 2)
+            cellrenderer = Gtk.CellRendererSpin()   # spin type cell (numbers)
+            cellrenderer.set_property("editable", True)
+            cellrenderer.set_property("adjustment", adjustment)
+            cellrenderer.set_property("digits", False)   # no decimal places
+        treeviewcolumn.pack_start(cellrenderer, True)   # add to the treeviewcolumn
+        treeviewcolumn.set_fixed_width(treeviewcolumn.get_min_width())
+        self.bind_column(treeviewcolumn, each)
+        return treeviewcolumn
+
+    def bind_column(self, treeviewcolumn, each):
+        """Bind a view column to a database column.
+
+        (self, Gtk.TreeViewColumn, int) -> None
+
+        :param each: index of the column within the model
+
+        Points the cell at the model's column and connects the edit and header click handlers, which get
+        the column's index. Handlers bound before are disconnected first, so the columns that shift
+        when another column is added or deleted are simply bound again.
+        """
+        for widget, handler in self.column_handlers.pop(treeviewcolumn, []):
+            widget.disconnect(handler)
+        cellrenderer = treeviewcolumn.get_cells()[0]
+        treeviewcolumn.clear_attributes(cellrenderer)
+        handlers = [(treeviewcolumn, treeviewcolumn.connect('clicked', self.column_clicked, each))]
+        if each == 0:   # the row numbers are worked out from the row's path, see row_number()
+            treeviewcolumn.set_cell_data_func(cellrenderer, self.row_number)
+        elif self.header_types[each] == 'str':
+            handlers.append((cellrenderer, cellrenderer.connect("edited", self.cell_edited_str, each)))
+            treeviewcolumn.add_attribute(cellrenderer, "text", each)  # capture data from the model
+        elif self.header_types[each] == 'bool':
+            handlers.append((cellrenderer, cellrenderer.connect("toggled", self.cell_edited_bool, each)))
+            treeviewcolumn.add_attribute(cellrenderer, "active", each)
+        elif self.header_types[each] == 'float':
+            handlers.append((cellrenderer, cellrenderer.connect("edited", self.cell_edited_float, each)))
+            treeviewcolumn.add_attribute(cellrenderer, "text", each)
+        else:
+            handlers.append((cellrenderer, cellrenderer.connect("edited", self.cell_edited_int, each)))
+            treeviewcolumn.add_attribute(cellrenderer, "text", each)
+        self.column_handlers[treeviewcolumn] = handlers
+
+    def row_number(self, treeviewcolumn, cellrenderer, model, tree_iter, data):
+        """Cell data function of the '#' column.
+
+        (self, object, object, object, object, object) -> None
+
+        Shows the row's index within the table (column 0 of the model, see TableModel and FilterModel).
+        """
+        cellrenderer.set_property('text', str(model.get_value(tree_iter, 0)))
+
+    def rebind_columns(self, first):
+        """Bind the view columns again, starting at a given index.
+
+        (self, int) -> None
+
+        Used after a column has been added or deleted, the columns after it change their index.
+        """
+        for idx, treeviewcolumn in enumerate(self.treeview.get_columns()[first:]):
+            self.bind_column(treeviewcolumn, first + idx)
+        self.set_tooltip_if_column_is_name()   # the 'name' column may have moved
+        self.treeview.queue_draw()
+
+    def selected_rows(self):
+        """Return the indices of the selected rows.
+
+        (self) -> list
+
+        In ascending order. The highlighted row is returned if no row is selected.
+        """
+        rows = sorted(self.store_row(path) for path in self.selector.get_selected_rows()[1])
+        if not rows and self.currently_selected_row < len(self.liststore):
+            rows = [self.currently_selected_row]
+        return rows
+
+    def detach_view(self, rows):
+        """Get the view ready for a change of many rows.
+
+        (self, int) -> bool
+
+        :param rows: amount of rows that are inserted or removed
+
+        The selection is cleared first, so that it does not report every selected row that goes away.
+        The view is detached from the model if more rows change than are left, attaching it again costs
+        a pass over every row, which is then cheaper than a signal per row. It is always detached while
+        the rows are filtered, the FilterModel takes in all of the rows at once then. Returns True if
+        it was detached, the model's signals are not needed then and the view is attached again by attach_view().
+        """
+        self.selector.unselect_all()
+        if self.filter_model is None and rows * 2 <= len(self.liststore):
+            return False
+        self.treeview.set_model(None)
+        return True
+
+    def attach_view(self):
+        """Attach the view to the model again, see detach_view().
+
+        (self) -> None
+
+        The view shows the FilterModel while the rows are filtered.
+        """
+        self.treeview.set_model(self.filter_model if self.filter_model is not None else self.liststore)
+
+    def store_row(self, path):
+        """Return the index within the table of a row of the view.
+
+        (self, object) -> int
+
+        :param path: the row's path in the view (a Gtk.TreePath or a string), it is not the row's index
+                     within the table while the rows are filtered
+        """
+        if not isinstance(path, Gtk.TreePath):
+            path = Gtk.TreePath.new_from_string(str(path))
+        row = path.get_indices()[0]
+        if self.filter_model is not None:
+            return self.filter_model.child_row(row)
+        return row
+
+    def insert_rows(self, rows, columns):
+        """Insert several rows at once.
+
+        (self, list, list) -> None
+
+        :param rows: indices the new rows get, in ascending order
+        :param columns: the new rows' values, column by column and without the '#' column
+
+        The new rows are selected afterwards.
+        """
+        detached = self.detach_view(len(rows))
+        self.liststore.insert_rows(rows, columns, emit=not detached)
+        if self.filter_model is not None:
+            self.filter_model.rows_inserted(rows)
+        if detached:
+            self.attach_view()
+        self.select_rows(rows)
+
+    def set_rows(self, row, columns):
+        """Change the values of consecutive rows.
+
+        (self, int, list) -> None
+
+        :param row: index of the first row, the rows have to exist
+        :param columns: the new values, column by column and without the '#' column
+        """
+        self.liststore.set_rows(row, columns)
+        self.select_rows(range(row, row + len(columns[0])))
+
+    def remove_rows(self, rows):
+        """Remove several rows at once.
+
+        (self, list) -> None
+
+        :param rows: indices of the rows, in ascending order and without repeats
+        """
+        detached = self.detach_view(len(rows))
+        self.liststore.remove_rows(rows, emit=not detached)
+        if self.filter_model is not None:
+            self.filter_model.rows_removed(rows)
+        if detached:
+            self.attach_view()
+        self.currently_selected_row = max(0, min(rows[0], len(self.liststore) - 1))
+
+    def select_rows(self, rows):
+        """Select rows (and nothing else).
+
+        (self, iterable) -> None
+
+        :param rows: indices of the rows, in ascending order
+
+        Each run of consecutive rows is selected as a range. selector_changed() is called once at the end,
+        not once per range. Rows the filter hides are left out.
+        """
+        if self.filter_model is not None:
+            rows = [row for row in (self.filter_model.view_row(each) for each in rows) if row != -1]
+        self.selector.handler_block(self.selector_handler)
+        self.selector.unselect_all()
+        start = previous = None
+        for row in itertools.chain(rows, [None]):
+            if row is not None and previous is not None and row == previous + 1:
+                previous = row
+                continue
+            if start is not None:
+                self.selector.select_range(Gtk.TreePath.new_from_indices([start]),
+                                           Gtk.TreePath.new_from_indices([previous]))
+            start = previous = row
+        self.selector.handler_unblock(self.selector_handler)
+        self.selector_changed(self.selector)
+
+    def insert_column(self, position, name, field_type, value, values=None):
+        """Insert a column.
+
+        (self, int, str, str, object, object) -> None
+
+        :param position: index of the new column within the model (0 is the '#' column)
+        :param value: the value every row gets in the new column
+        :param values: the column's values instead (a deleted column put back by an undo)
+
+        Only the new column is made, the rest of the table is left as it is.
+        """
+        if values is None:
+            self.log_edit('insert_column', position, name, field_type, value)
+        else:   # the journal writes the values later on, it gets a copy that the later edits do not change
+            self.log_edit('insert_column', position, name, field_type, value, values[:])
+        self.liststore.insert_column(position, field_type, value, values)
+        self.header_names.insert(position, name)
+        self.header_types.insert(position, field_type)
+        self.treeview.insert_column(self.make_column(position), position)
+        self.rebind_columns(position + 1)
+
+    def remove_column(self, position):
+        """Delete a column.
+
+        (self, int) -> None
+
+        :param position: index of the column within the model (0 is the '#' column)
+        """
+        self.log_edit('remove_column', position)
+        treeviewcolumn = self.treeview.get_column(position)
+        for widget, handler in self.column_handlers.pop(treeviewcolumn, []):
+            widget.disconnect(handler)
+        self.treeview.remove_column(treeviewcolumn)
+        self.liststore.remove_column(position)
+        del self.header_names[position]
+        del self.header_types[position]
+        self.rebind_columns(position)
+
+    def convert_column(self, position, field_type, convert):
+        """Change the type of a column.
+
+        (self, int, str, function) -> None
+
+        :param position: index of the column within the model (0 is the '#' column)
+        :param convert: function that turns one of the column's values into a value of the new type
+
+        The column's values are converted and its view column is replaced with one of the new type.
+        """
+        self.log_edit('convert_column', position, field_type)
+        self.liststore.convert_column(position, field_type, convert)
+        self.replace_view_column(position, field_type)
+
+    def set_column(self, position, field_type, values):
+        """Replace a column's values and type.
+
+        (self, int, str, object) -> None
+
+        :param position: index of the column within the model (0 is the '#' column)
+        :param values: the new values, one per row
+
+        Used to undo a conversion, the column's values from before it are put back as they are.
+        """
+        self.log_edit('set_column', position, field_type, values[:])   # a copy for the journal, see insert_column()
+        self.liststore.set_column(position, field_type, values)
+        self.replace_view_column(position, field_type)
+
+    def replace_view_column(self, position, field_type):
+        """Replace a view column with one of a new type.
+
+        (self, int, str) -> None
+        """
+        self.header_types[position] = field_type
+        treeviewcolumn = self.treeview.get_column(position)
+        for widget, handler in self.column_handlers.pop(treeviewcolumn, []):
+            widget.disconnect(handler)
+        self.treeview.remove_column(treeviewcolumn)
+        self.treeview.insert_column(self.make_column(position), position)
+        self.treeview.queue_draw()
 
     def set_tooltip_if_column_is_name(self):
         """Find a column with 'name' inside of it
@@ -778,6 +1628,7 @@ class DataCells(object):
         diplay tooltips when a mouse hovers over a row.
         Therefore, a good idea is to hava a column that has the string 'name' in it.
         """
+        self.treeview.set_property('tooltip-column', -1)   # no tooltips unless a 'name' column is found
         for idx, val in enumerate(self.header_names):   # set the tooltip column if one of the columns is called 'name'
             if 'name' in val.lower():
                 self.treeview.set_property('tooltip-column', idx)
@@ -788,65 +1639,15 @@ class DataCells(object):
 
         (self) -> None
 
-        Sets the cells based on the type of input (str, float, int, bool).
+        Sets the cells based on the type of input (str, float, int, bool), see make_column().
         Wraps it all up and adds it to the window's tabs.
+        The columns have fixed widths and the rows a fixed height, so the view only reads the rows on screen
+        (it would otherwise measure every row of the database).
         """
-        for each in range(len(self.list_of_records[0])):   # iterate through the list's columns
-            if each == 0:       # the first column is special (doesn't expand)
-                self.treeviewcolumn = Gtk.TreeViewColumn(self.header_names[each])
-                self.treeviewcolumn.set_expand(False)
-            else:
-                self.treeviewcolumn = Gtk.TreeViewColumn(self.header_names[each] + ' - ' + self.header_types[each])
-                self.treeviewcolumn.set_expand(True)
-                self.treeviewcolumn.set_alignment(0.5)
-            self.treeview.append_column(self.treeviewcolumn)  # add the column to the treeview
-            self.treeviewcolumn.set_clickable(True)
-            self.treeviewcolumn.set_resizable(True)
-            # self.treeviewcolumn.set_sizing(Gtk.TreeViewColumnSizing(2)) # autosize
-            self.treeviewcolumn.connect('clicked', self.column_clicked, each)  # handler for the header click
-            if each == 0:   # first column has special settings (non-editable, set width, etc.)
-                self.treeviewcolumn.set_min_width(40)
-                self.treeviewcolumn.set_alignment(0.5)
-                self.adjustment = Gtk.Adjustment(0, 0, 100000, 1, 1, 2)
-                self.cellrendererspin = Gtk.CellRendererSpin()
-                self.cellrendererspin.set_property("editable", False)
-                self.cellrendererspin.set_property("adjustment", self.adjustment)
-                self.cellrendererspin.set_property("digits", False)
-                self.treeviewcolumn.pack_start(self.cellrendererspin, True)
-                self.treeviewcolumn.add_attribute(self.cellrendererspin, "text", each)
-            elif self.header_types[each] == 'str':  # if the column is of str type
-                self.treeviewcolumn.set_min_width(90)
-                self.cellrenderertext = Gtk.CellRendererText()   # text entry cell
-                self.cellrenderertext.set_property("editable", True)  # is editable
-                self.cellrenderertext.connect("edited", self.cell_edited_str, each)  # bind the handler to the cell
-                self.treeviewcolumn.pack_start(self.cellrenderertext, True)   # add to the treeviewcolumn
-                self.treeviewcolumn.add_attribute(self.cellrenderertext, "text", each)  # capture data from liststore
-            elif self.header_types[each] == 'bool':  # if the column is of bool type
-                self.treeviewcolumn.set_min_width(70)
-                self.cellrenderertoggle = Gtk.CellRendererToggle()  # toggle type cell
-                self.cellrenderertoggle.connect("toggled", self.cell_edited_bool, each)
-                self.treeviewcolumn.pack_start(self.cellrenderertoggle, True)
-                self.treeviewcolumn.add_attribute(self.cellrenderertoggle, "active", each)
-            elif self.header_types[each] == 'float':  # if the column is of float type
-                self.treeviewcolumn.set_min_width(110)
-                self.adjustment = Gtk.Adjustment(0, -100000, 100000, 1, 1, 2)
-                self.cellrendererspin = Gtk.CellRendererSpin()   # spin type cell (numbers)
-                self.cellrendererspin.set_property("editable", True)
-                self.cellrendererspin.set_property("adjustment", self.adjustment)
-                self.cellrendererspin.set_property("digits", 6)   # display/edit with a 6 decimal place accuracy
-                self.cellrendererspin.connect("edited", self.cell_edited_float, each)
-                self.treeviewcolumn.pack_start(self.cellrendererspin, True)
-                self.treeviewcolumn.add_attribute(self.cellrendererspin, "text", each)
-            else:   # otherwise the column is an int type
-                self.treeviewcolumn.set_min_width(80)
-                self.adjustment = Gtk.Adjustment(0, -100000, 100000, 1, 1, 2)
-                self.cellrendererspin = Gtk.CellRendererSpin()   # spin type cell (numbers)
-                self.cellrendererspin.set_property("editable", True)
-                self.cellrendererspin.set_property("adjustment", self.adjustment)
-                self.cellrendererspin.set_property("digits", False)   # no decimal places
-                self.cellrendererspin.connect("edited", self.cell_edited_int, each)
-                self.treeviewcolumn.pack_start(self.cellrendererspin, True)
-                self.treeviewcolumn.add_attribute(self.cellrendererspin, "text", each)
+        self.column_handlers = dict()   # signal handlers bound to every view column, see bind_column()
+        for each in range(len(self.header_types)):   # iterate through the list's columns
+            self.treeview.append_column(self.make_column(each))  # add the column to the treeview
+        self.treeview.set_fixed_height_mode(True)   # every row is as high as the first one
 
         self.scrolled_window = Gtk.ScrolledWindow()   # the database is inside a scrolled window
         self.scrolled_window.add(self.treeview)   # add the cells(treeview) to the scrolled window
@@ -879,13 +1680,430 @@ class DataCells(object):
         # then add that event box to the tab with the box(image+label) as the header of the tab
         self.eventbox = Gtk.EventBox()
         self.eventbox.connect("button-release-event", self.right_click_menu)
-        self.eventbox.add(self.scrolled_window)
+        self.tab_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)   # holds the progress bar while loading
+        self.tab_box.pack_end(self.scrolled_window, True, True, 0)
+        self.add_filter_bar()
+        self.eventbox.add(self.tab_box)
         self.MAINWINDOW.notebook_tabs.insert_page(self.eventbox, self.notebook_box, self.position)
+        if self.loading:
+            self.show_loading()
         # if self.MAINWINDOW.notebook_tabs.get_n_pages() > 1:     # show tabs if there is more than one pane
         #     self.MAINWINDOW.notebook_tabs.set_show_tabs(True)
         # else:
         #     self.MAINWINDOW.notebook_tabs.set_show_tabs(False)
 
+    def add_filter_bar(self):
+        """Add the filter bar above the table.
+
+        (self) -> None
+
+        A search entry, a choice of the text column searched and the amount of rows shown, see apply_filter().
+        """
+        self.filter_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        self.filter_entry = Gtk.SearchEntry()   # 'search-changed' is sent once the typing pauses
+        self.filter_entry.set_placeholder_text('Filter rows')
+        self.filter_entry.connect('search-changed', lambda q: self.apply_filter())
+        self.filter_box.pack_start(self.filter_entry, True, True, 5)
+        self.filter_column = Gtk.ComboBoxText()
+        self.filter_column_handler = self.filter_column.connect('changed', lambda q: self.apply_filter())
+        self.filter_box.pack_start(self.filter_column, False, False, 0)
+        self.filter_label = Gtk.Label(label='')   # amount of rows shown
+        self.filter_box.pack_start(self.filter_label, False, False, 5)
+        self.tab_box.pack_start(self.filter_box, False, False, 2)
+        self.fill_filter_columns()
+
+    def fill_filter_columns(self, active=None):
+        """List the text columns in the filter bar's choice of columns.
+
+        (self, str) -> None
+
+        :param active: id of the column to choose, if it is None the column of the same name as the chosen one
+                       is chosen (the columns may have moved), or all of them if there is no such column
+
+        The ids are the columns' indices within the model.
+        """
+        if active is None and self.filter_column.get_active_id() not in (None, 'all'):
+            name = self.filter_column.get_active_text()
+            for idx in range(1, len(self.header_types)):
+                if self.header_types[idx] == 'str' and self.header_names[idx] == name:
+                    active = str(idx)
+                    break
+        self.filter_column.handler_block(self.filter_column_handler)
+        self.filter_column.remove_all()
+        self.filter_column.append('all', 'All text columns')
+        for idx in range(1, len(self.header_types)):
+            if self.header_types[idx] == 'str':
+                self.filter_column.append(str(idx), self.header_names[idx])
+        if active is None or not self.filter_column.set_active_id(active):
+            self.filter_column.set_active_id('all')
+        self.filter_column.handler_unblock(self.filter_column_handler)
+
+    def apply_filter(self):
+        """Show only the rows that match the filter bar.
+
+        (self) -> None
+
+        The rows are looked up in the search index (see jdf_lib.SearchIndex.search()), the cells are not read.
+        The view gets a FilterModel of the matching rows, an empty filter shows every row again.
+        A search made while the index is being built waits for it, see index_done().
+        """
+        if self.loading:
+            return
+        text = self.filter_entry.get_text()
+        rows = None
+        self.filter_waiting = False
+        if text.strip():
+            if self.index is None:
+                self.filter_waiting = True
+                self.filter_label.set_text('Indexing...')
+                return
+            column = self.filter_column.get_active_id()
+            rows = self.index.search(text, None if column in (None, 'all') else int(column) - 1)
+        self.treeview.set_model(None)
+        self.selector.unselect_all()
+        if self.filter_model is not None:
+            self.filter_model.release()
+            self.filter_model = None
+        if rows is None:   # no words to look for, show every row
+            self.filter_label.set_text('')
+        else:
+            self.filter_model = FilterModel(self.liststore, rows)
+            self.filter_label.set_text(str(len(rows)) + ' of ' + str(len(self.liststore)) + ' rows')
+        self.attach_view()
+
+    def build_index(self):
+        """Build the search index of the table in the background.
+
+        (self) -> None
+
+        The current index is dropped straight away. The new one is started from the main loop (see start_index()),
+        edits call this before they change the table and the index has to be built from the changed table.
+        If the rows or columns change while it is being built it is built once more.
+        """
+        self.index = None
+        self.index_pending = None   # the edits up to the copy of the table are in the copy
+        self.index_generation += 1
+        if not self.index_scheduled:
+            self.index_scheduled = True
+            GLib.idle_add(self.start_index)
+
+    def start_index(self):
+        """Start building the search index, see build_index().
+
+        (self) -> bool
+
+        The index is built from a copy of the table, inside of a thread, and handed over by index_done().
+        Cell edits made in the meantime are kept in index_pending and taken in once it is built.
+        Returns False, so that GLib.idle_add() calls it only once.
+        """
+        self.index_scheduled = False
+        if self.index_building or self not in DATA:   # index_done() starts it again, or the tab was closed
+            return False
+        self.index_building = True
+        self.index_pending = list()
+        snapshot = self.liststore.store.copy()
+        generation = self.index_generation
+
+        def worker():
+            index = jdf_lib.SearchIndex.build(snapshot)
+            GLib.idle_add(self.index_done, index, generation)
+
+        thread = threading.Thread(target=worker)
+        thread.daemon = True
+        thread.start()
+        return False
+
+    def index_done(self, index, generation):
+        """Take in a search index built by build_index().
+
+        (self, SearchIndex, int) -> bool
+
+        Returns False, so that GLib.idle_add() calls it only once.
+        """
+        self.index_building = False
+        if self not in DATA:   # the tab was closed
+            return False
+        if generation != self.index_generation:   # the table changed too much, build it again
+            self.start_index()
+            return False
+        for change in self.index_pending:
+            index.update(*change)
+        self.index_pending = None
+        self.index = index
+        self.fill_filter_columns()
+        if self.filter_waiting:
+            self.apply_filter()
+        return False
+
+    def index_edit(self, operation, args):
+        """Keep the search index up to date with an edit.
+
+        (self, str, tuple) -> None
+
+        :param operation: name of the operation, followed by its arguments (see apply_edit())
+
+        Called before the edit is made. Changed text cells are updated within the index (or kept until it is built),
+        any other edit shifts the rows or the columns, the index is built again then (see build_index()).
+        """
+        store = self.liststore.store
+        if operation == 'set':
+            changes = [(args[0], args[1] - 1, args[2])]
+        elif operation == 'set_rows':
+            row, columns = args
+            changes = [(row + idx, column, value) for column, values in enumerate(columns)
+                       for idx, value in enumerate(values)]
+        elif operation == 'rename_column':
+            return
+        else:
+            self.build_index()
+            return
+        for row, column, value in changes:
+            if store.field_types[column] != 'str':
+                continue
+            change = (row, column, store.value(row, column), value)
+            if self.index is not None:
+                self.index.update(*change)
+            elif self.index_pending is not None:
+                self.index_pending.append(change)
+
+    def log_edit(self, operation, *args):
+        """Record an edit in the tab's undo history and crash recovery journal.
+
+        (self, str, ...) -> None
+
+        :param operation: name of the operation, followed by its arguments (see apply_edit())
+
+        Called before the edit is made, so that the edit's inverse can be worked out (see inverse_edit()).
+        The journal is made on the first edit. A tab that has no file on disk (an Untitled tab) gets its data
+        written into the journal's header. The journal's file is made and written by its own thread, once it
+        reports an error the journal is dropped and the tab's later edits are only kept in the undo history.
+        """
+        if self.loading:
+            return
+        self.index_edit(operation, args)
+        if self.replaying:
+            return
+        inverse = self.inverse_edit(operation, args)
+        if self.journal is not None and self.journal.error is not None:   # disk full, no access to the directory...
+            self.journal.close(remove=True)
+            self.journal = None
+            self.journal_failed = True
+            status_msg('Crash recovery is off for: ' + self.file_name.split(PATH_BREAK)[-1] +
+                       ' (its journal cannot be written)')
+        if self.journal is None and not self.journal_failed:
+            rows = None
+            if not (PATH_BREAK in self.file_name and os.path.isfile(self.file_name)):
+                rows = list(self.liststore.store)
+            self.journal = jdf_journal.Journal(jdf_journal.new_header(self.file_name, self.header_names[1:],
+                                                                      self.header_types[1:], rows))
+        if self.journal is not None:
+            self.journal.log(operation, *args)
+        self.undo_log.record(inverse)
+
+    def discard_journal(self):
+        """Remove the tab's crash recovery journal.
+
+        (self) -> None
+
+        Used once the edits are saved, or when they are thrown away.
+        """
+        if self.journal is not None:
+            self.journal.close(remove=True)
+            self.journal = None
+
+    def inverse_edit(self, operation, args):
+        """Work out the operation that takes an edit back.
+
+        (self, str, tuple) -> list
+
+        :param operation: name of the edit that is about to be made, args are its arguments
+
+        Only what the edit changes is kept: a cell's value, a row's values, a column's name or the column itself.
+        A deleted or converted column is kept as it is, it is not in the store any more after the edit.
+        """
+        store = self.liststore.store
+        if operation == 'set':
+            row, column, value = args
+            return ['set', row, column, store.value(row, column - 1)]
+        elif operation == 'insert_row':
+            return ['remove_row', args[0]]
+        elif operation == 'remove_row':
+            return ['insert_row', args[0], store.row(args[0])]
+        elif operation == 'insert_rows':
+            return ['remove_rows', args[0]]
+        elif operation == 'remove_rows':
+            return ['insert_rows', args[0], store.take_rows(args[0])]
+        elif operation == 'set_rows':
+            row, columns = args
+            return ['set_rows', row, store.take_rows(range(row, row + len(columns[0])))]
+        elif operation == 'insert_column':
+            return ['remove_column', args[0]]
+        elif operation == 'remove_column':
+            position = args[0]
+            return ['insert_column', position, self.header_names[position], self.header_types[position], None,
+                    store.columns[position - 1]]
+        elif operation in ('convert_column', 'set_column'):
+            position = args[0]
+            return ['set_column', position, self.header_types[position], store.columns[position - 1]]
+        elif operation == 'rename_column':
+            return ['rename_column', args[0], self.header_names[args[0]]]
+
+    def apply_edit(self, operation):
+        """Make an edit read from a crash recovery journal or the undo history.
+
+        (self, list) -> None
+
+        :param operation: [name, arguments...], see jdf_journal
+        """
+        name, args = operation[0], operation[1:]
+        if name == 'set':
+            row, column, value = args
+            self.liststore[row][column] = value
+        elif name == 'insert_row':
+            self.liststore.insert(args[0], [0] + args[1])   # the '#' column goes first
+        elif name == 'remove_row':
+            self.liststore.remove(self.liststore.get_iter(args[0]))
+        elif name == 'insert_rows':
+            self.insert_rows(*args)
+        elif name == 'remove_rows':
+            self.remove_rows(args[0])
+        elif name == 'set_rows':
+            self.set_rows(*args)
+        elif name == 'insert_column':
+            self.insert_column(*args)
+        elif name == 'remove_column':
+            self.remove_column(args[0])
+        elif name == 'convert_column':
+            position, field_type = args
+            self.convert_column(position, field_type, column_converter(self.header_types[position], field_type))
+        elif name == 'set_column':
+            self.set_column(*args)
+        elif name == 'rename_column':
+            self.rename_column(*args)
+
+    def replay_journal(self, path, header, operations):
+        """Replay the edits of a journal left behind by a crash.
+
+        (self, str, dict, list) -> None
+
+        :param path: the journal file, see jdf_journal.find_journals()
+
+        The edits are logged into a new journal of this tab and the old journal is removed,
+        so that they are not lost if the editor crashes again before they are saved.
+        """
+        applied = 0
+        self.replaying = True
+        try:
+            for operation in operations:
+                self.apply_edit(operation[1:])   # without the sequence number
+                applied += 1
+        except Exception:   # the edits do not fit the file (changed since), stop at the first one that fails
+            pass
+        finally:
+            self.replaying = False
+        self.journal = jdf_journal.Journal(header)   # same starting point (file or data) as the old journal
+        for operation in operations[:applied]:   # straight into the journal, they are already made
+            self.journal.log(operation[1], *operation[2:])
+        if applied:
+            self.notify_file_edited()
+        os.remove(path)
+        status_msg('Recovered ' + str(applied) + ' of ' + str(len(operations)) + ' edits of: ' +
+                   self.file_name.split(PATH_BREAK)[-1])
+
+    def mark_saved(self, file_name):
+        """Post the fact that a file has been saved.
+
+        (self, str) -> None
+
+        Removes the asterisk from the tab's label (and from the window title if the tab is the current one).
+        """
+        self.notebook_label.set_text(file_name)   # set label text in notebook (removes the asterisk)
+        self.file_edited = False   # reset that the file has been edited
+        self.discard_journal()   # every edit is in the file now
+        if self in DATA and DATA.index(self) == self.MAINWINDOW.notebook_tabs.get_current_page():
+            self.MAINWINDOW.post_filename_to_title(file_name)   # post the filename to the title
+
+    def show_loading(self):
+        """Show the loading progress.
+
+        (self) -> None
+
+        Puts a progress bar and a Cancel button above the (still empty) table. The view is detached from the model
+        until the loading is finished, so the rows can be added without the view reacting to every one of them.
+        """
+        self.treeview.set_model(None)
+        self.progress_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+        self.progress_bar = Gtk.ProgressBar()
+        self.progress_bar.set_show_text(True)
+        self.progress_bar.set_text('Loading...')
+        self.progress_box.pack_start(self.progress_bar, True, True, 5)
+        cancel_button = Gtk.Button(label='Cancel')
+        cancel_button.connect('clicked', self.cancel_loading)
+        self.progress_box.pack_start(cancel_button, False, False, 5)
+        self.tab_box.pack_start(self.progress_box, False, False, 5)
+
+    def set_header(self, field_names, field_types):
+        """Set the columns of a tab that is being loaded.
+
+        (self, list, list) -> None
+        """
+        self.header_names[1:] = field_names
+        self.header_types[1:] = field_types
+        self.liststore.store = jdf_lib.ColumnStore(field_types)
+        for each in range(1, len(self.header_types)):
+            self.treeview.append_column(self.make_column(each))
+        self.set_tooltip_if_column_is_name()
+        self.treeview.show_all()
+
+    def add_loaded_rows(self, columns, total):
+        """Add a chunk of loaded rows.
+
+        (self, list, int) -> None
+
+        :param columns: one list of values per column
+        :param total: the amount of rows in the file, None if it is unknown
+        """
+        self.liststore.store.extend(columns)
+        rows = len(self.liststore.store)
+        if total:
+            self.progress_bar.set_fraction(min(rows / float(total), 1.0))
+        else:
+            self.progress_bar.pulse()
+        self.progress_bar.set_text('Loading... ' + str(rows) + ' rows')
+
+    def finish_loading(self):
+        """Show the loaded rows.
+
+        (self) -> None
+        """
+        self.loading = False
+        self.progress_box.destroy()
+        self.attach_view()
+        self.build_index()
+
+    def cancel_loading(self, widget):
+        """Cancel button handler.
+
+        (self, object) -> None
+
+        Stops the loading and closes the tab.
+        """
+        self.load_cancelled = True
+        self.close_loading()
+        status_msg('Cancelled loading: ' + self.file_name.split(PATH_BREAK)[-1])
+
+    def close_loading(self):
+        """Close a tab whose loading was cancelled or failed.
+
+        (self) -> None
+
+        Closing the last tab would quit the program, a blank tab is opened first in that case.
+        """
+        if self in DATA:
+            if len(DATA) == 1:
+                build_blank_table()
+            tab_control('force-close', data=DATA.index(self))
+
     def close_tab(self, widget, event):
         """Close tab handler.
 
@@ -941,15 +2159,26 @@ class DataCells(object):
         if modified_header_text in self.header_names:  # check if the name already exists
             infobar_msg('warn', 'This name already exists')
         else:
-            self.header_names[column_num] = modified_header_text  # change the name within the class
-            column_widget.set_title(modified_header_text)  # set the title in the column widget
-            modified_header_text += ' - ' + self.header_types[column_num]  # add the column type to the text
-            label = Gtk.Label(modified_header_text)  # make a label with the text
-            column_widget.set_widget(label)  # set the label inside of the column's header
-            label.show()
+            self.rename_column(column_num, modified_header_text)
             self.notify_file_edited()   # notify that the file was edited
             status_msg('Column ' + str(column_num) + " name edited")   # post status
-            self.set_tooltip_if_column_is_name()   # recheck the tooltip displays
+
+    def rename_column(self, position, name):
+        """Rename a column.
+
+        (self, int, str) -> None
+
+        :param position: index of the column within the model (0 is the '#' column)
+        """
+        self.log_edit('rename_column', position, name)
+        self.header_names[position] = name  # change the name within the class
+        column_widget = self.treeview.get_column(position)
+        column_widget.set_title(name)  # set the title in the column widget
+        label = Gtk.Label(name + ' - ' + self.header_types[position])  # add the column type to the text
+        column_widget.set_widget(label)  # set the label inside of the column's header
+        label.show()
+        self.set_tooltip_if_column_is_name()   # recheck the tooltip displays
+        self.fill_filter_columns(self.filter_column.get_active_id())   # the columns stay where they are
 
     def set_new_header_name(self, widget, column_widget, column_num):
         """Enter pressed inside the entry widget, inside the column header.
@@ -966,8 +2195,9 @@ class DataCells(object):
 
         (self, object, str, str, int) -> None
         """
-        status_msg('Edited Row: ' + str(path) + '  Col:' + str(column) + ' To ' + text)   # post edit to statusbar
-        self.liststore[path][column] = text   # modify the data in the Gtk.Liststore()
+        row = self.store_row(path)   # the row within the table (the view's rows may be filtered)
+        status_msg('Edited Row: ' + str(row) + '  Col:' + str(column) + ' To ' + text)   # post edit to statusbar
+        self.liststore[row][column] = text   # modify the data in the model
         self.notify_file_edited()   # notify that the file has been edited
 
     def cell_edited_float(self, cellrendererspin, path, value, column):
@@ -975,8 +2205,9 @@ class DataCells(object):
 
         (self, object, str, str, int) -> None
         """
-        status_msg('Edited Row: ' + str(path) + '  Col:' + str(column) + ' To ' + str(value))
-        self.liststore[path][column] = float(value)   # convert the value to a float
+        row = self.store_row(path)
+        status_msg('Edited Row: ' + str(row) + '  Col:' + str(column) + ' To ' + str(value))
+        self.liststore[row][column] = float(value)   # convert the value to a float
         self.notify_file_edited()
 
     def cell_edited_int(self, cellrendererspin, path, value, column):
@@ -984,8 +2215,9 @@ class DataCells(object):
 
         (self, object, str, str, int) -> None
         """
-        status_msg('Edited Row: ' + str(path) + '  Col:' + str(column) + ' To ' + str(value))
-        self.liststore[path][column] = int(value)  # convert the value to an integer
+        row = self.store_row(path)
+        status_msg('Edited Row: ' + str(row) + '  Col:' + str(column) + ' To ' + str(value))
+        self.liststore[row][column] = int(value)  # convert the value to an integer
         self.notify_file_edited()
 
     def cell_edited_bool(self, cellrenderertoggle, path, column):
@@ -993,19 +2225,29 @@ class DataCells(object):
 
         (self, object, str, int) -> None
         """
-        self.liststore[path][column] = not self.liststore[path][column]  # reverse the cell (toggle)
+        row = self.store_row(path)
+        self.liststore[row][column] = not self.liststore[row][column]  # reverse the cell (toggle)
+        self.notify_file_edited()
 
     def selector_changed(self, widget):
         """Row highlighter.
 
         (self, object) -> None
 
-        This method is used to post into the status bar the currently highlighted row.
-        This technique is also used by the clipboard to retrieve the whole row's data.
+        This method is used to post into the status bar the currently highlighted row (or the amount of
+        selected rows). The highlighted row is where the rows are added and pasted.
+        Only counts the selected rows, they are listed by selected_rows() when they are needed.
         """
-        current_row = str(widget.get_selected_rows()[1][0])  # get current row
-        status_msg('Row: ' + current_row)    # post it to the statusbar
-        self.currently_selected_row = int(current_row)   # change the class's argument
+        selected = widget.count_selected_rows()
+        if selected == 1:
+            current_row = self.store_row(widget.get_selected_rows()[1][0])  # get current row
+            status_msg('Row: ' + str(current_row))    # post it to the statusbar
+            self.currently_selected_row = current_row   # change the class's argument
+        elif selected > 1:
+            cursor = self.treeview.get_cursor()[0]   # the row clicked last
+            if cursor is not None:
+                self.currently_selected_row = self.store_row(cursor)
+            status_msg(str(selected) + ' rows selected')
 
     def notify_file_edited(self):
         """Post the fact that a file has been edited.
@@ -1014,6 +2256,7 @@ class DataCells(object):
 
         This method adds an asterisk in front of the file name one the tab and on the window title.
         """
+        self.edit_count += 1
         if not self.file_edited:   # if file has not been edited
             self.file_edited = True   # change the state to edited
             text = self.notebook_label.get_text()   # retrieve the filename from the notebook label
@@ -1076,12 +2319,10 @@ def tab_control(signal, data=None):
                                             'You have unsaved changes\nAre you sure you want to close this tab?',
                                             choice=True)
                     if answer:    # close the tab if user is sure
-                        WINDOW.notebook_tabs.remove_page(current_page)   # remove the tab
-                        del DATA[current_page]   # delete the DataCells() instance from the global data
+                        remove_tab(current_page)   # remove the tab and its DataCells() instance
                         status_msg('Closed a tab with a file: ' + short_filename)   # post message
                 else:
-                    WINDOW.notebook_tabs.remove_page(current_page)
-                    del DATA[current_page]
+                    remove_tab(current_page)
                     status_msg('Closed a tab with a file: ' + short_filename)
         else:   # specifi tab has been requested
             current_page = data
@@ -1093,12 +2334,10 @@ def tab_control(signal, data=None):
                                             'You have unsaved changes\nAre you sure you want to close this tab?',
                                             choice=True)
                     if answer:
-                        WINDOW.notebook_tabs.remove_page(current_page)
-                        del DATA[current_page]
+                        remove_tab(current_page)
                         status_msg('Closed a tab with a file: ' + short_filename)
                 else:
-                    WINDOW.notebook_tabs.remove_page(current_page)
-                    del DATA[current_page]
+                    remove_tab(current_page)
                     status_msg('Closed a tab with a file: ' + short_filename)
 
     elif signal == 'new':   # create a new blank table/tab
@@ -1132,11 +2371,9 @@ def tab_control(signal, data=None):
                                         'You have unsaved changes\nAre you sure you want to close this tab?',
                                         choice=True)
                 if answer:
-                    WINDOW.notebook_tabs.remove_page(current_page)
-                    del DATA[current_page]
+                    remove_tab(current_page)
             else:
-                WINDOW.notebook_tabs.remove_page(current_page)
-                del DATA[current_page]
+                remove_tab(current_page)
             status_msg('Closed a tab with a file: ' + short_filename)
     elif signal == 'switched':   # tab switched (used to post the current tab name to the windows title)
         if len(DATA) != 0:
@@ -1154,19 +2391,33 @@ def tab_control(signal, data=None):
             if num_of_pages == 1:
                 check_before_quit()
             else:
-                WINDOW.notebook_tabs.remove_page(current_page)
-                del DATA[current_page]
+                remove_tab(current_page)
                 status_msg('Force closed a tab with a file: ' + short_filename)
         else:
             current_page = data
             if num_of_pages == 1:
                 check_before_quit()
             else:
-                WINDOW.notebook_tabs.remove_page(current_page)
-                del DATA[current_page]
+                remove_tab(current_page)
                 status_msg('Force closed a tab with a file: ' + short_filename)
 
 
+def remove_tab(page):
+    """Remove a tab.
+
+    (int) -> None
+
+    :param page: index of the tab
+
+    Removes the tab from the window and its DataCells() instance from the global data.
+    The tab's edits are discarded, so its crash recovery journal is removed as well.
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    WINDOW.notebook_tabs.remove_page(page)
+    DATA[page].discard_journal()
+    del DATA[page]
+
+
 def add_column(signal):
     """Add a column.
 
@@ -1176,15 +2427,13 @@ def add_column(signal):
                    refer to the manual for a full list of signals.
 
     This function adds a column with a specific name and type to the current database.
+    The column is added in place, the rest of the table is not rebuilt.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     current_page = WINDOW.notebook_tabs.get_current_page()   # current tab (also position within global DATA)
     current_header_names = DATA[current_page].header_names[1:]  # chop off the first index (unused in the database)
-    current_header_types = DATA[current_page].header_types[1:]  # chop off the first index (unused in the database)
-    current_filename = DATA[current_page].file_name  # make a copy of the filename
-    current_data = list()  # make a copy of the database
-    for each in DATA[current_page].liststore:   # create a copy without the first index
-        current_data.append(each[1:])
     if signal != 'insert-at':  # if the query is not for a particular column position
         column_name, column_type = dialog_ask('entry combo', 'Insert a column', 'Enter a name for the column:',
                                               combo_list=['str', 'int', 'float', 'bool'],
@@ -1197,47 +2446,19 @@ def add_column(signal):
                                                              sec_combo_list=current_header_names + ['Insert as last'],
                                                              sec_combo_prompt='Insert before...')
     if column_name is not None:   # if the user selected valid data  -->
-        # add new data
+        # the value every row gets, based on the type of the column
+        default_values = {'str': 'Empty Data', 'bool': True, 'int': 0, 'float': 0.0}
         if signal == 'append':   # adds a column at the end of the database
-            current_header_names.append(column_name)   # add the column name
-            current_header_types.append(column_type)   # add the column type
-            for each in current_data:   # insert default values based on the type of the column
-                if column_type == 'str':
-                    each.append('Empty Data')
-                elif column_type == 'bool':
-                    each.append(True)
-                elif column_type == 'int' or column_type == 'float':
-                    each.append(0)
+            position = len(current_header_names)
             status_msg('Appended a column')
         elif signal == 'prepend':  # insert a column at the beginning of the database
-            current_header_names.insert(0, column_name)
-            current_header_types.insert(0, column_type)
-            for each in current_data:
-                if column_type == 'str':
-                    each.insert(0, 'Empty Data')
-                elif column_type == 'bool':
-                    each.insert(0, True)
-                elif column_type == 'int' or column_type == 'float':
-                    each.insert(0, 0)
+            position = 0
             status_msg('Prepended a column')
         elif signal == 'insert-at':   # insert a column at a user specified position
-            current_header_names.insert(column_number, column_name)
-            current_header_types.insert(column_number, column_type)
-            for each in current_data:
-                if column_type == 'str':
-                    each.insert(column_number, 'Empty Data')
-                elif column_type == 'bool':
-                    each.insert(column_number, True)
-                elif column_type == 'int' or column_type == 'float':
-                    each.insert(column_number, 0)
+            position = column_number
             status_msg('Inserted a column at index ' + str(column_number))
-
-        # build a new table
-        build_table((current_header_names, current_header_types, current_data), current_filename, position=current_page)
-        # move the tab to the currently build table
-        WINDOW.notebook_tabs.set_current_page(current_page)
-        # close the 'old' tab
-        tab_control('force-close', data=current_page + 1)
+        # + 1 skips the '#' column
+        DATA[current_page].insert_column(position + 1, column_name, column_type, default_values[column_type])
         post_file_edited()   # file has been edited (post it)
 
 
@@ -1249,9 +2470,11 @@ def delete_column(signal):
     :param signal: is a string type value that controls the behaviour of this function.
                    refer to the manual for a full list of signals.
 
-    This function deletes a column from the database.
+    This function deletes a column from the database, in place.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     rows_columns = count_rows_columns()   # count the column and rows
     if rows_columns[1] == 1:   # if there is only one column left
         infobar_msg('error', "Last column cannot be deleted")   # post an error and skip the deletion process
@@ -1259,34 +2482,18 @@ def delete_column(signal):
         column_to_delete = -1
         current_page = WINDOW.notebook_tabs.get_current_page()  # current tab (also position within global DATA)
         current_header_names = DATA[current_page].header_names[1:]  # chop off the first index (unused in the database)
-        current_header_types = DATA[current_page].header_types[1:]  # chop off the first index (unused in the database)
-        current_filename = DATA[current_page].file_name  # make a copy of the filename
-        current_data = list()  # make a copy of the database
-        for each in DATA[current_page].liststore:   # create a copy without the first index
-            current_data.append(each[1:])
-        # add new data
         if signal == 'delete-first':  # delete first column
             column_to_delete = 0   # index number 0
         elif signal == 'delete-last':  # delete last column
-            column_to_delete = -1  # index -1
+            column_to_delete = len(current_header_names) - 1
         elif signal == 'delete-at':  # delete a user chosen column , ask which one
             column_to_delete = dialog_ask('sec num', 'Delete column at...', '',
                                           sec_combo_list=current_header_names, sec_combo_prompt='Select a column')
             column_to_delete = column_to_delete[0]   # retrieve the column from the dialog
         # delete data
         if column_to_delete is not None:   # if the user has chosen a valid data -->
-            del current_header_names[column_to_delete]  # delete a header
-            del current_header_types[column_to_delete]  # delete a type
-            for each in current_data:  # delete column from the database
-                del each[column_to_delete]
-            # build a new table
-            build_table((current_header_names, current_header_types, current_data),
-                        current_filename, position=current_page)
-            # move the tab to the currently build table
-            WINDOW.notebook_tabs.set_current_page(current_page)
+            DATA[current_page].remove_column(column_to_delete + 1)   # + 1 skips the '#' column
             status_msg('Deleted a column at index ' + str(column_to_delete))
-            # close the 'old' tab
-            tab_control('force-close', data=current_page + 1)
             post_file_edited()   # file has been edited (post it)
 
 
@@ -1295,19 +2502,17 @@ def convert_column():
 
     (None) -> None
 
-    This function converts the data type of a column.
+    This function converts the data type of a column, in place.
     It converts the values to their neatest possible outcomes.
     Converting a float 1.1 to an integer, will have an output of 1.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     infobar_msg('warn', "\tWARNING!\nConverting a column may cause\nthat column's data loss")
     current_page = WINDOW.notebook_tabs.get_current_page()  # current tab (also position within global DATA)
     current_header_names = DATA[current_page].header_names[1:]  # chop off the first index (unused in the database)
     current_header_types = DATA[current_page].header_types[1:]  # chop off the first index (unused in the database)
-    current_filename = DATA[current_page].file_name  # make a copy of the filename
-    current_data = list()  # make a copy of the database
-    for each in DATA[current_page].liststore:   # create a copy without the first index
-        current_data.append(each[1:])
     list_of_types = ['str', 'int', 'float', 'bool']   # create a list of valid types
     text_prompt = 'Values will be converted\nto their nearest possible outcomes\n\nSelect a column'
     # ask which column to convert and to which type
@@ -1318,33 +2523,56 @@ def convert_column():
                                                sec_combo_prompt='Convert to...')
     if column_to_convert is not None:  # if the user chose a valid input
         index_of_choice = current_header_names.index(column_to_convert)   # pick the index of the user's choice
-        for each in current_data:
-            if convert_to == 'bool':  # anything can be converted to a bool -->
-                each[index_of_choice] = bool(each[index_of_choice])
-            elif convert_to == 'int':  # anything can be converted to an integer, apart from a string (mostly :) )
-                if current_header_types[index_of_choice] == 'str':
-                    each[index_of_choice] = 0
-                else:
-                    each[index_of_choice] = int(each[index_of_choice])
-            elif convert_to == 'str':   # anything can be converted to a string
-                each[index_of_choice] = str(each[index_of_choice])
-            elif convert_to == 'float':   # anything can be converted to a float, apart from a string (mostly :) )
-                if current_header_types[index_of_choice] == 'str':
-                    each[index_of_choice] = 0
-                else:
-                    each[index_of_choice] = float(each[index_of_choice])
-
-        current_header_types[index_of_choice] = convert_to  # set a new type in the header
-        # rebuild the table
-        build_table((current_header_names, current_header_types, current_data), current_filename)
-        # set the current tab
-        WINDOW.notebook_tabs.set_current_page(len(DATA) - 1)
+        convert = column_converter(current_header_types[index_of_choice], convert_to)
+        DATA[current_page].convert_column(index_of_choice + 1, convert_to, convert)   # + 1 skips the '#' column
         status_msg('Converted a column at index ' + str(index_of_choice) + ' to type ' + convert_to)
-        # delete the 'old' tab
-        tab_control('force-close', data=current_page)
         post_file_edited()  # post that the file has been edited
 
 
+def column_converter(from_type, to_type):
+    """Pick the function that converts the values of a column.
+
+    (str, str) -> function
+
+    :param from_type: the column's current type
+    :param to_type: the type the column is converted to
+    """
+    from_str = from_type == 'str'
+    if to_type == 'bool':  # anything can be converted to a bool -->
+        return bool
+    elif to_type == 'int':  # anything can be converted to an integer, apart from a string (mostly :) )
+        return (lambda value: 0) if from_str else int
+    elif to_type == 'float':   # anything can be converted to a float, apart from a string (mostly :) )
+        return (lambda value: 0.0) if from_str else float
+    return str   # anything can be converted to a string
+
+
+def undo_redo(signal):
+    """Undo or redo an edit.
+
+    (str) -> None
+
+    :param signal: 'undo' takes back the last edit of the current tab, 'redo' makes the last undone edit again
+
+    The steps are kept by the tab's undo history (see jdf_journal.UndoLog), every step is made through
+    DataCells.apply_edit(), the same way the edits of a crash recovery journal are replayed.
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
+    current_page = WINDOW.notebook_tabs.get_current_page()   # set the current page
+    tab = DATA[current_page]
+    if signal == 'undo':
+        done = tab.undo_log.undo(tab.apply_edit)
+    else:
+        done = tab.undo_log.redo(tab.apply_edit)
+    if not done:
+        status_msg('Nothing to ' + signal)
+        return
+    tab.notify_file_edited()
+    status_msg('Undone the last edit' if signal == 'undo' else 'Redone the last undone edit')
+
+
 def add_row(signal):
     """Add a row.
 
@@ -1356,6 +2584,8 @@ def add_row(signal):
     This function adds a row to the current database.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     current_page = WINDOW.notebook_tabs.get_current_page()   # set the current page
     empty_list = list()   # make an empty list for the row
     # iterate through the column types and add their default values to the blank list
@@ -1368,8 +2598,7 @@ def add_row(signal):
             empty_list.append(0.0)
         elif each == 'bool':
             empty_list.append(False)
-    # add the next highest number to the index (this is the '#' column, basically)
-    empty_list[0] = DATA[current_page].liststore[-1][0] + 1
+    # empty_list[0] is the '#' column, it is not stored (the model numbers the rows)
     if signal == 'prepend':   # add the row at the beginnig of the database
         DATA[current_page].liststore.prepend(empty_list)
         status_msg('Prepended a row')
@@ -1377,8 +2606,7 @@ def add_row(signal):
         DATA[current_page].liststore.append(empty_list)
         status_msg('Appended a row')
     elif signal == 'insert-at':   # at the row at the location specified by the user
-        list_of_rows = list()   # check how many rows are there
-        list_of_rows = [str(each[0]) for each in DATA[current_page].liststore]  # convert row numbers to strings
+        list_of_rows = [str(each) for each in range(len(DATA[current_page].liststore))]  # row numbers as strings
         selected_row = dialog_ask('sec num', 'Add row at...', '',
                                   sec_combo_list=list_of_rows, sec_combo_prompt='Select a row')
         selected_row = selected_row[0]   # pick the user chosen row
@@ -1389,7 +2617,6 @@ def add_row(signal):
         selected_row = DATA[current_page].currently_selected_row + 1
         DATA[current_page].liststore.insert(selected_row, empty_list)
         status_msg('Inserted a row at index ' + str(selected_row))
-    fix_row_indices()   # repair row indices (if the numbering is not 0,1,2,3,4...)
     post_file_edited()  # post that the file has been edited
 
 
@@ -1401,9 +2628,11 @@ def delete_row(signal):
     :param signal: is a string type value that controls the behaviour of this function.
                    refer to the manual for a full list of signals.
 
-    Delete a row from the database.
+    Delete a row from the database. 'delete-here' deletes all of the selected rows at once.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     rows_columns = count_rows_columns()   # count the rows and columns
     if rows_columns[0] == 1:   # don't allow to delete the last row
         infobar_msg('error', "Last row cannot be deleted")
@@ -1415,22 +2644,57 @@ def delete_row(signal):
         elif signal == 'delete-last':   # delete the last row
             row_num = rows_columns[0] - 1   # delete the last row
         elif signal == 'delete-at':   # delete a row at the user's specified location
-            list_of_rows = list()
-            list_of_rows = [str(each[0]) for each in DATA[current_page].liststore]  # convert row numbers to strings
+            list_of_rows = [str(each) for each in range(len(DATA[current_page].liststore))]  # row numbers as strings
             row_num = dialog_ask('sec num', 'Delete row at...', '',
                                  sec_combo_list=list_of_rows, sec_combo_prompt='Select a row')
             row_num = row_num[0]   # pick the user chosen row
-        elif signal == 'delete-here':  # delete the row currently highlighted
-            row_num = DATA[current_page].currently_selected_row
+        elif signal == 'delete-here':  # delete the selected rows, all of them at once
+            rows = DATA[current_page].selected_rows()
+            if len(rows) == rows_columns[0]:
+                infobar_msg('error', "Last row cannot be deleted")
+            elif rows:
+                DATA[current_page].remove_rows(rows)
+                status_msg('Deleted ' + str(len(rows)) + ' row(s) from index ' + str(rows[0]))  # post satus
+                post_file_edited()  # post that the file has been edited
+            return
         if row_num is not None:   # if the row number is valid
             # get the iterator (otherwise cannot remove a row from Gtk.ListStore()...wtf...)
             to_remove = DATA[current_page].liststore.get_iter(row_num)
             DATA[current_page].liststore.remove(to_remove)   # remove the row from the liststore
             status_msg('Deleted a row at index ' + str(row_num))  # post satus
-            fix_row_indices()   # repair row indices (if the numbering is not 0,1,2,3,4...)
             post_file_edited()  # post that the file has been edited
 
 
+def duplicate_rows():
+    """Duplicate the selected rows.
+
+    (None) -> None
+
+    The copies are inserted below the last selected row (in one change of the model) and get selected.
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
+    tab = DATA[WINDOW.notebook_tabs.get_current_page()]
+    rows = tab.selected_rows()
+    if not rows:
+        return
+    tab.insert_rows(list(range(rows[-1] + 1, rows[-1] + 1 + len(rows))), tab.liststore.store.take_rows(rows))
+    status_msg('Duplicated ' + str(len(rows)) + ' row(s)')
+    post_file_edited()
+
+
+def focus_filter():
+    """Move the keyboard focus into the current tab's filter bar.
+
+    (None) -> None
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
+    DATA[WINDOW.notebook_tabs.get_current_page()].filter_entry.grab_focus()
+
+
 def build_blank_table(position=-1):
     """Build a blank table
 
@@ -1502,7 +2766,11 @@ def open_file(file_uri=None):
         filefilter = Gtk.FileFilter()   # set the valid files filter
         filefilter.set_name("Database")
         filefilter.add_pattern("*.jdf")
+        filefilter.add_pattern("*.jsonl")
         filefilter.add_pattern("*.sql")
+        filefilter.add_pattern("*.parquet")   # Parquet and Arrow (Feather) files need the pyarrow package
+        filefilter.add_pattern("*.feather")
+        filefilter.add_pattern("*.arrow")
         filechooserdialog.add_filter(filefilter)
         filefilter = Gtk.FileFilter()
         filefilter.set_name("All File types")
@@ -1520,18 +2788,8 @@ def open_file(file_uri=None):
                     infobar_msg('warn', file_no_path + '\nIs already open')
                     status_msg(file_no_path + ' is already open')
                     return
-            # otherwise open the file using the jdf_lib library
-            loaded_data = jdf_lib.load_database(opened_file)
-            if loaded_data == -1:   # if an error occured while opening the file -->
-                filechooserdialog.destroy()
-                msg = 'Error while loading file:\n' + file_no_path + '\n\nCorrupted or invalid'
-                display_dialog('warn', msg)
-                status_msg('Error while loading: ' + opened_file)
-            else:  # otherwise build a new table (instance of the database)
-                build_table(loaded_data, opened_file)
-                status_msg('Opened: ' + file_no_path)
-                filechooserdialog.destroy()
-                tab_control('switch-to-last')
+            filechooserdialog.destroy()
+            open_in_background(opened_file)   # otherwise open the file using the jdf_lib library
         else:
             filechooserdialog.destroy()  # close the window
     else:
@@ -1542,15 +2800,192 @@ def open_file(file_uri=None):
                 infobar_msg('warn', file_no_path + '\nIs already open')
                 status_msg(file_no_path + ' is already open')
                 return
-        loaded_data = jdf_lib.load_database(opened_file)
-        if loaded_data == -1:
-            msg = 'Error while loading file:\n' + file_no_path + '\n\nCorrupted or invalid'
-            display_dialog('warn', msg)
-            status_msg('Error while loading: ' + opened_file)
+        open_in_background(opened_file)
+
+
+def open_in_background(file_path, done=None):
+    """Open a database file in a new tab, without blocking the window.
+
+    (str, function) -> None
+
+    :param file_path: path to the file
+    :param done: function called with the tab (DataCells instance) once the file is loaded
+
+    The tab is made straight away and shows a progress bar and a Cancel button. The file is parsed in a worker
+    thread (see stream_file()), which hands the rows over in chunks of LOAD_CHUNK, already split into columns.
+    The chunks are added to the tab's model from the main loop through GLib.idle_add(), so the other tabs stay
+    usable the whole time. The thread waits while LOAD_PENDING chunks are queued, so the parsed rows do not pile up
+    in memory when the main loop falls behind. Cancelling (or closing the tab) stops the thread at its next chunk.
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    file_no_path = file_path.split(PATH_BREAK)[-1]
+    tab = DataCells(WINDOW, file_path, [], [], [], WINDOW.notebook_tabs.get_n_pages(), loading=True)
+    DATA.append(tab)
+    WINDOW.window.show_all()
+    tab_control('switch-to-last')
+    status_msg('Loading: ' + file_no_path + '...')
+    meta = jdf_lib.inspect(file_path)
+    total = meta['rows'] if meta != -1 else None   # the progress bar pulses if the amount of rows is unknown
+    pending = threading.Semaphore(LOAD_PENDING)   # released once the main loop is done with a chunk
+
+    def chunk_done():
+        pending.release()
+        return False   # run only once
+
+    def in_main_loop(function, *args):
+        def call():
+            if not tab.load_cancelled:
+                if tab in DATA:
+                    function(*args)
+                else:   # the tab has been closed
+                    tab.load_cancelled = True
+            return False   # run only once
+        GLib.idle_add(call)
+
+    def failed(error):
+        tab.close_loading()
+        display_dialog('warn', 'Error while loading file:\n' + file_no_path + '\n\nCorrupted or invalid')
+        status_msg('Error while loading: ' + file_path)
+
+    def finished():
+        tab.finish_loading()
+        rows, columns = len(tab.liststore), len(tab.header_names) - 1
+        status_msg('Opened: ' + file_no_path + file_summary(file_path, rows, columns))
+        if done is not None:
+            done(tab)
+
+    def worker():
+        try:
+            loaded_data = stream_file(file_path)
+            if loaded_data == -1:
+                raise IOError('Error while loading file: ' + file_path)
+            field_names, field_types, rows = loaded_data
+            in_main_loop(tab.set_header, field_names, field_types)
+            chunk = list(itertools.islice(rows, LOAD_CHUNK))
+            while chunk and not tab.load_cancelled:
+                columns = [[row[idx] for row in chunk] for idx in range(len(field_types))]
+                chunk = None   # only the columns are kept while waiting
+                pending.acquire()
+                in_main_loop(tab.add_loaded_rows, columns, total)
+                GLib.idle_add(chunk_done)   # runs after the chunk is added (or skipped, once cancelled)
+                columns = None
+                chunk = list(itertools.islice(rows, LOAD_CHUNK))
+        except Exception as error:   # corrupted or invalid file
+            in_main_loop(failed, error)
+            return
+        in_main_loop(finished)
+    thread = threading.Thread(target=worker)
+    thread.daemon = True   # do not keep the program alive after the window is closed
+    thread.start()
+
+
+def stream_file(file_path):
+    """Load a database file, one row at a time.
+
+    (str) -> tuple
+
+    :param file_path: path to the file
+
+    Same as load_file(), but the rows are returned as an iterator. JDF and JSONL files are read with
+    jdf_lib.stream_database() and jdf_lib.stream_jsonl(), so they are never held in memory as a whole.
+    The other formats are loaded with load_file() first. Returns -1 if the file cannot be loaded.
+    """
+    loaded_data = jdf_lib.stream_database(file_path)
+    if loaded_data != -1:
+        return loaded_data
+    if jdf_lib.is_jsonl(file_path):
+        return jdf_lib.stream_jsonl(file_path)
+    loaded_data = load_file(file_path)
+    if loaded_data == -1:
+        return -1
+    return loaded_data[0], loaded_data[1], iter(loaded_data[2])
+
+
+def load_file(file_path):
+    """Load a database file.
+
+    (str) -> tuple
+
+    :param file_path: path to the file
+
+    JDF files are loaded with jdf_lib.load_database(). sqlite databases (the *.sql files) are loaded with
+    jdf_lib.load_sqlite(), the database's first table is opened. JSONL files are loaded with jdf_lib.load_jsonl(),
+    without its process pool (forking the threaded editor could deadlock it).
+    Parquet and Arrow (Feather) files, like the ones written by pandas, are loaded with jdf_lib.arrow if pyarrow
+    is installed, their nulls are replaced with the column type's default (the cells cannot show nulls).
+    Returns (field_names, field_types, data_base) or -1 if the file cannot be loaded.
+    """
+    if jdf_lib.is_sqlite(file_path):
+        return jdf_lib.load_sqlite(file_path)
+    if jdf_lib.is_jsonl(file_path):
+        return jdf_lib.load_jsonl(file_path, processes=1)
+    if jdf_lib.arrow is not None and (jdf_lib.arrow.is_parquet(file_path) or jdf_lib.arrow.is_arrow(file_path)):
+        if jdf_lib.arrow.is_parquet(file_path):
+            loaded_data = jdf_lib.arrow.load_parquet(file_path)
         else:
-            build_table(loaded_data, opened_file)
-            status_msg('Opened: ' + file_no_path)
-            tab_control('switch-to-last')
+            loaded_data = jdf_lib.arrow.load_arrow(file_path)
+        if loaded_data != -1:
+            defaults = [jdf_lib.TYPE_DEFAULTS.get(each) for each in loaded_data[1]]
+            for row in loaded_data[2]:
+                for idx, value in enumerate(row):
+                    if value is None:
+                        row[idx] = defaults[idx]
+        return loaded_data
+    return jdf_lib.load_database(file_path)
+
+
+def write_file(file_path, field_names, field_types, data_base, target=None):
+    """Save a database file.
+
+    (str, list, list, list, str) -> None
+
+    :param file_path: path to the file
+    :param field_names: a list of databases' column names
+    :param field_types: a list of databases' column types
+    :param data_base: a list containing the actual database contents
+    :param target: path the file is written to, file_path if it is None (the format is still picked by file_path)
+
+    sqlite databases (and new *.sql files) are saved with jdf_lib.save_sqlite(): the rows of the database's first
+    table are replaced (its schema is kept, see sqlite_schema_changed()), a new database gets a table named
+    after the file. JSONL files (and new *.jsonl files) are saved
+    with jdf_lib.save_jsonl(), Parquet and Arrow files (and new *.parquet, *.feather and *.arrow files) with
+    jdf_lib.arrow if pyarrow is installed. Anything else is saved as a JDF file.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    target = target or file_path
+    new_file = not os.path.exists(file_path)
+    if jdf_lib.is_sqlite(file_path) or (extension == '.sql' and new_file):
+        tables = jdf_lib.sqlite_tables(file_path)
+        if tables == -1 or not tables:   # a new database
+            tables = [os.path.splitext(file_path.split(PATH_BREAK)[-1])[0]]
+        jdf_lib.save_sqlite(target, tables[0], field_names, field_types, data_base, keep_schema=True)
+    elif jdf_lib.is_jsonl(file_path) or (extension == '.jsonl' and new_file):
+        jdf_lib.save_jsonl(target, field_names, field_types, data_base)
+    elif jdf_lib.arrow is not None and (jdf_lib.arrow.is_parquet(file_path) or (extension == '.parquet' and new_file)):
+        jdf_lib.arrow.save_parquet(target, field_names, field_types, data_base)
+    elif jdf_lib.arrow is not None and (jdf_lib.arrow.is_arrow(file_path) or
+                                        (extension in ('.feather', '.arrow') and new_file)):
+        jdf_lib.arrow.save_arrow(target, field_names, field_types, data_base)
+    else:
+        jdf_lib.save_database(target, field_names, field_types, data_base, metadata=True)
+
+
+def file_summary(file_path, rows, columns):
+    """Summarize the size of an opened database.
+
+    (str, int, int) -> str
+
+    :param file_path: path to the opened file
+    :param rows: amount of rows loaded
+    :param columns: amount of columns loaded
+
+    The row and column counts are taken from the file's metadata record (jdf_lib.inspect()) if it has one,
+    otherwise the loaded counts are used.
+    """
+    meta = jdf_lib.inspect(file_path)
+    if meta != -1:   # the file carries a metadata record
+        rows, columns = meta['rows'], len(meta['field_names'])
+    return '  (' + str(rows) + ' rows, ' + str(columns) + ' columns)'
 
 
 def save_file(force_dialog=False):
@@ -1564,23 +2999,18 @@ def save_file(force_dialog=False):
     force_dialog variable is set to True.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     current_page = WINDOW.notebook_tabs.get_current_page()  # grab the current tab
-    copy_of_data = list()  # make a data copy
-    for each in DATA[current_page].liststore:   # create a copy without the first index
-        copy_of_data.append(each[1:])
+    if DATA[current_page].saving:
+        status_msg('Please wait, the file is still being saved')
+        return
 
     # if the file has a path and is not force_dialog'ed then autosave it. A database created within the editor
     # one with the Untitled* name will not have a path and therefore will not have a '/'  or '\' (in Windows OS)
     if PATH_BREAK in DATA[current_page].file_name and not force_dialog:
         file_name_to_save = DATA[current_page].file_name   # grab the whole file path
-        # use the jdf_lib to dump the database into a file (first indices are skipped, they are only informal)
-        jdf_lib.save_database(file_name_to_save, DATA[current_page].header_names[1:],
-                              DATA[current_page].header_types[1:], copy_of_data)
-        file_name = file_name_to_save.split(PATH_BREAK)[-1]   # grab just the file name out of the path
-        status_msg('File saved: ' + file_name)
-        DATA[current_page].notebook_label.set_text(file_name)   # set label text in notebook (removes the asterisk)
-        DATA[current_page].file_edited = False   # reset that the file has been edited
-        WINDOW.post_filename_to_title(file_name)   # post the filename to the title (removes the asterisk)
+        save_in_background(DATA[current_page], file_name_to_save)   # use the jdf_lib to dump the database into a file
     else:  # display the dialog
         filechooserdialog = Gtk.FileChooserDialog('Save File', buttons=(
             Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_SAVE, Gtk.ResponseType.OK))
@@ -1593,7 +3023,11 @@ def save_file(force_dialog=False):
         filefilter = Gtk.FileFilter()  # set filters for databases only
         filefilter.set_name("Database")
         filefilter.add_pattern("*.jdf")
+        filefilter.add_pattern("*.jsonl")
         filefilter.add_pattern("*.sql")
+        filefilter.add_pattern("*.parquet")   # Parquet and Arrow (Feather) files need the pyarrow package
+        filefilter.add_pattern("*.feather")
+        filefilter.add_pattern("*.arrow")
         filechooserdialog.add_filter(filefilter)
         filefilter = Gtk.FileFilter()
         filefilter.set_name("All File types")
@@ -1604,17 +3038,113 @@ def save_file(force_dialog=False):
 
         if response == Gtk.ResponseType.OK:
             file_name_to_save = filechooserdialog.get_filename()
-            jdf_lib.save_database(file_name_to_save, DATA[current_page].header_names[1:],
-                                  DATA[current_page].header_types[1:], copy_of_data)
-            file_name = file_name_to_save.split(PATH_BREAK)[-1]
-            status_msg('File saved: ' + file_name)
-            DATA[current_page].notebook_label.set_text(file_name)
-            DATA[current_page].file_edited = False
-            WINDOW.post_filename_to_title(file_name)
+            save_in_background(DATA[current_page], file_name_to_save)
 
         filechooserdialog.destroy()  # remove the dialog
 
 
+def save_in_background(tab, file_path):
+    """Save a tab's database without blocking the window.
+
+    (DataCells, str) -> None
+
+    :param tab: the tab (DataCells instance) that is saved
+    :param file_path: path to the file
+
+    A snapshot of the tab's data is taken first (jdf_lib.ColumnStore.copy(), no rows are made), the snapshot is
+    then written by a worker thread (see write_atomically()), so the tab can be edited while a large file is
+    being saved. The status bar shows the rows written. The asterisk is removed once the file has been written,
+    and only if the tab has not been edited since the snapshot was taken.
+    """
+    file_name = file_path.split(PATH_BREAK)[-1]   # grab just the file name out of the path
+    if sqlite_schema_changed(file_path, tab.header_names[1:]):
+        display_dialog('warn', 'The columns of:\n' + file_name + '\nhave changed since it was opened.\n\n'
+                       'Saving it in place would drop its table schema (keys, indexes, triggers).\n'
+                       'Use Save as... to save the table into a new file.')
+        status_msg('File not saved: ' + file_name)
+        return
+    snapshot = tab.liststore.store.copy()
+    edit_count = tab.edit_count
+    journal_seq = tab.journal.seq if tab.journal is not None else 0   # the edits up to here are in the snapshot
+    total = str(len(snapshot))
+    tab.saving = True
+
+    def progress(rows):
+        status_msg('Saving: ' + file_name + '... ' + str(rows) + ' of ' + total + ' rows')
+        return False   # run only once
+
+    def counted(rows):
+        for idx, row in enumerate(rows, 1):
+            if idx % SAVE_PROGRESS == 0:
+                GLib.idle_add(progress, idx)
+            yield row
+
+    def done(result):
+        tab.saving = False
+        if isinstance(result, Exception):
+            display_dialog('warn', 'Error while saving file:\n' + file_name + '\n\nThe file has not been changed')
+            status_msg('Error while saving: ' + file_path)
+        elif tab.edit_count == edit_count:
+            tab.mark_saved(file_name)
+            status_msg('File saved: ' + file_name)
+        else:   # the asterisk stays
+            if tab.journal is not None:   # only the later edits need to be recovered after a crash
+                tab.journal.mark_saved(journal_seq, file_path)
+            status_msg('File saved: ' + file_name + ' (without the edits made while saving)')
+
+    status_msg('Saving: ' + file_name + '...')
+    # the first indices are skipped, they are only informal
+    run_in_background(write_atomically, done, file_path, tab.header_names[1:], tab.header_types[1:],
+                      counted(snapshot))
+
+
+def sqlite_schema_changed(file_path, field_names):
+    """Check if a sqlite database's table cannot take the tab's columns.
+
+    (str, list) -> bool
+
+    The editor saves into the database's first table and keeps its schema (see write_file()), which only works
+    while the columns are the same ones (no column added, deleted, renamed or moved).
+    """
+    tables = jdf_lib.sqlite_tables(file_path)
+    if tables == -1 or not tables:   # not a sqlite database, or one without tables
+        return False
+    return jdf_lib.sqlite_columns(file_path, tables[0]) != list(field_names)
+
+
+def write_atomically(file_path, field_names, field_types, data_base):
+    """Save a database file through a temporary file.
+
+    (str, list, list, list) -> None
+
+    Same as write_file(), but the database is written into a temporary file in the same directory, which is
+    then renamed over the file. An interrupted or failed save leaves the file as it was.
+    An existing sqlite database is copied into the temporary file first, so that its other tables are kept.
+    The file keeps its permissions.
+    """
+    directory = os.path.dirname(file_path) or os.curdir
+    handle, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp', dir=directory)
+    os.close(handle)
+    try:
+        if os.path.exists(file_path):
+            if jdf_lib.is_sqlite(file_path):
+                shutil.copyfile(file_path, temp_path)
+            shutil.copymode(file_path, temp_path)
+        else:
+            os.chmod(temp_path, 0o666 & ~UMASK)   # mkstemp() makes the file readable by the owner only
+        write_file(file_path, field_names, field_types, data_base, target=temp_path)
+        if hasattr(os, 'replace'):
+            os.replace(temp_path, file_path)
+        else:   # python 2, a rename does not replace an existing file on windows
+            if os.name == 'nt' and os.path.exists(file_path):
+                os.remove(file_path)
+            os.rename(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
 def export_to_html():
     """Export to html.
 
@@ -1623,10 +3153,9 @@ def export_to_html():
     This function displays a html save file dialog.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     current_page = WINDOW.notebook_tabs.get_current_page()  # grab the current tab
-    copy_of_data = list()  # make a data copy
-    for each in DATA[current_page].liststore:   # create a copy without the first index
-        copy_of_data.append(each[1:])
 
     # display the dialog
     html_name = DATA[current_page].file_name.split('.')[0]
@@ -1645,20 +3174,226 @@ def export_to_html():
     filefilter.add_pattern("*.html")
     filechooserdialog.add_filter(filefilter)
 
+    # page size option, big tables are better split into pages (browsers choke on huge tables)
+    options_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=5)
+    options_box.pack_start(Gtk.Label('Rows per page:'), False, False, 0)
+    page_size_combo = Gtk.ComboBoxText.new_with_entry()   # the user can also type in a custom page size
+    for each in HTML_PAGE_SIZES:
+        page_size_combo.append_text(each)
+    page_size_combo.set_active(0)   # single page by default
+    options_box.pack_start(page_size_combo, False, False, 0)
+    options_box.pack_start(Gtk.Label('Format:'), False, False, 10)
+    format_combo = Gtk.ComboBoxText()   # static <table> or virtual scrolling (data embedded as json)
+    for each in HTML_FORMATS:
+        format_combo.append_text(each)
+    format_combo.set_active(0)
+    format_combo.connect('changed', lambda q: page_size_combo.set_sensitive(q.get_active() == 0))
+    options_box.pack_start(format_combo, False, False, 0)
+    options_box.show_all()
+    filechooserdialog.set_extra_widget(options_box)
+
     response = filechooserdialog.run()
 
     if response == Gtk.ResponseType.OK:
         file_name_to_save = filechooserdialog.get_filename()
+        try:
+            page_size = int(page_size_combo.get_active_text())
+        except ValueError:   # 'All rows in one page' or an invalid number
+            page_size = 0
+        export_in_background(DATA[current_page], just_filename, file_name_to_save, page_size,
+                             format_combo.get_active() == 1)
+
+    filechooserdialog.destroy()  # remove the dialog
+
 
-        export_html.build_html(just_filename,
-                               file_name_to_save,
-                               DATA[current_page].header_names[1:],
-                               DATA[current_page].header_types[1:],
-                               copy_of_data,
-                               'JDFeditor ' + VERSION)
-        status_msg('File exported: ' + file_name_to_save)
+def export_in_background(tab, file_name, path, page_size, virtual):
+    """Export a tab's database as html without blocking the window.
 
+    (DataCells, str, str, int, bool) -> None
+
+    :param tab: the tab (DataCells instance) that is exported
+    :param file_name: name of the database shown on the pages
+    :param path: path to the html file
+    :param page_size: amount of rows per page, a single page if it is 0
+    :param virtual: export a virtual scrolling page instead (page_size is ignored)
+
+    Like save_in_background(), a snapshot of the tab's data is taken (jdf_lib.ColumnStore.copy()) and the html is
+    written by a worker thread. The pages of a paginated export are written by that thread as well, no process
+    pool is started (forking the threaded editor could deadlock it).
+    """
+    snapshot = tab.liststore.store.copy()
+    header_names = tab.header_names[1:]   # the first index is only informal
+    header_types = tab.header_types[1:]
+    prog_version = 'JDFeditor ' + VERSION
+
+    def export():
+        if virtual:   # a single file
+            export_html.build_html_virtual(file_name, path, header_names, header_types, snapshot, prog_version)
+        elif page_size > 0:   # index page + page files, re-exports only rewrite the changed pages
+            return export_html.build_html_pages(file_name, path, header_names, header_types, snapshot, prog_version,
+                                                page_size, processes=1, incremental=True)
+        else:
+            export_html.build_html(file_name, path, header_names, header_types, snapshot, prog_version)
+
+    def done(pages):
+        if isinstance(pages, Exception):
+            display_dialog('warn', 'Error while exporting file:\n' + path.split(PATH_BREAK)[-1])
+            status_msg('Error while exporting: ' + path)
+        elif pages is None:
+            status_msg('File exported: ' + path)
+        else:
+            status_msg('File exported: ' + path + '  (' + str(pages) + ' pages)')
+
+    status_msg('Exporting: ' + path.split(PATH_BREAK)[-1] + '...')
+    run_in_background(export, done)
+
+
+def file_dialog(title, filter_name, patterns, save=False, current_name=None):
+    """Display a file chooser dialog.
+
+    (str, str, list, bool, str) -> str
+
+    :param title: title of the dialog
+    :param filter_name: name of the file filter
+    :param patterns: file patterns of the filter, e.g. ['*.csv']
+    :param save: display a save dialog (with an overwrite confirmation) instead of an open dialog
+    :param current_name: preset file name of a save dialog
+
+    Returns the chosen path or None if the dialog was cancelled.
+    """
+    global WINDOW  # capture the window's current data
+    if save:
+        filechooserdialog = Gtk.FileChooserDialog(title, buttons=(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_SAVE, Gtk.ResponseType.OK))
+        filechooserdialog.set_action(Gtk.FileChooserAction.SAVE)  # save type dialog
+        filechooserdialog.set_do_overwrite_confirmation(True)  # confirm overwrites
+        filechooserdialog.set_create_folders(True)
+        if current_name is not None:
+            filechooserdialog.set_current_name(current_name)   # preset the current name
+    else:
+        filechooserdialog = Gtk.FileChooserDialog(title, buttons=(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OPEN, Gtk.ResponseType.OK))
+    filechooserdialog.set_transient_for(WINDOW.window)   # set parent windows (centers the dialog within)
+
+    filefilter = Gtk.FileFilter()
+    filefilter.set_name(filter_name)
+    for each in patterns:
+        filefilter.add_pattern(each)
+    filechooserdialog.add_filter(filefilter)
+    filefilter = Gtk.FileFilter()
+    filefilter.set_name("All File types")
+    filefilter.add_pattern("*")
+    filechooserdialog.add_filter(filefilter)
+
+    response = filechooserdialog.run()
+    chosen_file = None
+    if response == Gtk.ResponseType.OK:
+        chosen_file = filechooserdialog.get_filename()
     filechooserdialog.destroy()  # remove the dialog
+    return chosen_file
+
+
+def run_in_background(work, done, *args):
+    """Run a function in a worker thread.
+
+    (function, function, ...) -> None
+
+    :param work: function that runs inside of the worker thread, it is called with *args
+    :param done: function that receives work's result (or the exception it raised)
+
+    Gtk widgets can only be touched from the main loop, so done() is called from the main loop
+    through GLib.idle_add(). The window stays responsive while work() runs.
+    """
+    def worker():
+        try:
+            result = work(*args)
+        except Exception as error:   # hand the error over to done()
+            result = error
+
+        def finish():
+            done(result)
+            return False   # run only once
+        GLib.idle_add(finish)
+    thread = threading.Thread(target=worker)
+    thread.daemon = True   # do not keep the program alive after the window is closed
+    thread.start()
+
+
+def import_file(file_type):
+    """Import a csv or an xml file.
+
+    (str) -> None
+
+    :param file_type: 'csv' or 'xml' (see IMPORT_FORMATS)
+
+    Asks for the file and for the JDF file it will be converted to. The conversion runs in the background
+    (column types are guessed from the first rows), the JDF file is then opened in a new tab.
+    """
+    filter_name, pattern, convert = IMPORT_FORMATS[file_type]
+    import_name = file_dialog('Import ' + file_type.upper() + '...', filter_name, [pattern])
+    if import_name is None:
+        return
+    jdf_name = file_dialog('Save the imported database as...', 'Database', ['*.jdf'], save=True,
+                           current_name=os.path.splitext(os.path.basename(import_name))[0] + '.jdf')
+    if jdf_name is None:
+        return
+    short_name = import_name.split(PATH_BREAK)[-1]
+
+    def done(report):
+        if isinstance(report, Exception) or report == -1:
+            display_dialog('warn', 'Error while importing file:\n' + short_name)
+            status_msg('Error while importing: ' + import_name)
+            return
+        where = 'line ' if file_type == 'csv' else 'row '
+        warnings = list()
+        if report['failed']:   # some values did not fit the guessed column types
+            line, column, value = report['failures'][0]
+            warnings.append(str(report['failed']) + ' values could not be converted\n(first one in ' + where +
+                            str(line) + ', column ' + column + ')')
+        if report['extra_cells']:   # some rows were longer than the header, their last cells were left out
+            warnings.append(str(report['extra_cells']) + ' rows had more values than columns, the extra values '
+                            'were left out\n(first one in ' + where + str(report['extra_lines'][0]) + ')')
+        if warnings:
+            infobar_msg('warn', '\n'.join(warnings))
+        status_msg('Imported ' + str(report['rows']) + ' rows from: ' + short_name)
+        open_file(file_uri=jdf_name)
+
+    status_msg('Importing: ' + short_name + '...')
+    run_in_background(convert, done, import_name, jdf_name)
+
+
+def export_file(file_type):
+    """Export to csv or xml.
+
+    (str) -> None
+
+    :param file_type: 'csv' or 'xml' (see EXPORT_FORMATS)
+
+    Asks for the file and writes the current tab into it in the background.
+    Only a snapshot of the tab's data is taken inside of the main loop (jdf_lib.ColumnStore.copy(), no rows are
+    made), its rows are read and written by a worker thread. Nulls are kept (the cells show them as defaults).
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
+    filter_name, pattern, write = EXPORT_FORMATS[file_type]
+    current_page = WINDOW.notebook_tabs.get_current_page()  # grab the current tab
+    export_name = os.path.splitext(DATA[current_page].file_name.split(PATH_BREAK)[-1])[0] + pattern[1:]
+    export_name = file_dialog('Export as ' + file_type.upper() + '...', filter_name, [pattern], save=True,
+                              current_name=export_name)
+    if export_name is None:
+        return
+    snapshot = DATA[current_page].liststore.store.copy()   # the store does not hold the first index
+
+    def done(rows):
+        if isinstance(rows, Exception):
+            display_dialog('warn', 'Error while exporting file:\n' + export_name.split(PATH_BREAK)[-1])
+            status_msg('Error while exporting: ' + export_name)
+        else:
+            status_msg('File exported: ' + export_name + '  (' + str(rows) + ' rows)')
+
+    status_msg('Exporting: ' + export_name.split(PATH_BREAK)[-1] + '...')
+    run_in_background(write, done, export_name, DATA[current_page].header_names[1:], snapshot)
 
 
 def exit_n_save(widget, dialog):
@@ -1761,13 +3496,53 @@ def dialog_ask(signal, dialog_name, prompt, combo_list=None, combo_prompt='', se
         return return_empty_list
 
 
-def pasted_text(widget, text):
-    """Capture the data inside of the clipboard.
+def rows_to_text(tab, rows):
+    """Put rows into text for the clipboard.
+
+    (object, list) -> str
+
+    :param tab: the DataCells() instance the rows are taken from
+    :param rows: indices of the rows
 
-    (object, str) -> None
+    Each row goes on its own line as a python list, the '#' column first (see rows_from_text()).
     """
-    global TEMP_CLIPBOARD  # capture the data in the global temporary clipboard
-    TEMP_CLIPBOARD = text   # set the TEMP_CLIPBOARD to the value of the clipboard
+    return '\n'.join(str([row] + tab.liststore.store.row(row)) for row in rows)
+
+
+def rows_from_text(text, header_types):
+    """Read rows copied by rows_to_text() out of the clipboard's text.
+
+    (str, list) -> list
+
+    :param header_types: the types of the table's columns, the '#' column first
+
+    The lines are only read as python literals (ast.literal_eval()), nothing inside of them is run.
+    Returns the rows' values column by column without the '#' column, or None if the text does not hold
+    rows that fit the table.
+    """
+    rows = list()
+    for line in (text or '').splitlines():
+        if not line.strip():
+            continue
+        try:
+            row = ast.literal_eval(line.strip())
+        except (ValueError, SyntaxError, TypeError):
+            return None
+        if not isinstance(row, (list, tuple)) or len(row) != len(header_types):
+            return None
+        rows.append(row)
+    if not rows:
+        return None
+    columns = list()
+    for idx in range(1, len(header_types)):
+        values = [row[idx] for row in rows]
+        accepted = PASTE_TYPES.get(header_types[idx])
+        if accepted is not None and not all(isinstance(value, accepted) for value in values):
+            return None   # a value of a different type than the column's
+        if header_types[idx] == 'float':
+            values = [float(value) for value in values]
+        columns.append(values)
+    return columns
 
 
 def clipboard_manager(signal):
@@ -1779,47 +3554,45 @@ def clipboard_manager(signal):
                    refer to the manual for a full list of signals.
 
     This function is a handler for any clipboard type opertions: Cut, Copy, Paste.
-    It changes its behaviour based on the highlighted area (whole row, just a cell)
+    It changes its behaviour based on the highlighted area (the selected rows, just a cell).
+    The selected rows are cut and pasted as a single change of the model (see DataCells.remove_rows()).
     """
-    global WINDOW, DATA, TEMP_CLIPBOARD  # capture the window's and the databases' current data, and temporary clipboard
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    if tab_is_loading():
+        return
     current_page = WINDOW.notebook_tabs.get_current_page()  # grab the current page
-    current_row = DATA[current_page].currently_selected_row  # grab the currently selected row
+    tab = DATA[current_page]
     current_focus = WINDOW.window.get_focus()   # check the currently focused item  (row or cell?)
     if signal == 'copy':   # copy to clipboard
-        if isinstance(current_focus, Gtk.TreeView):   # check if the focus is on the cell or the row
-            temp_data = list(DATA[current_page].liststore[current_row])   # grab the row's data
-            temp_data = str(temp_data)   # convert the list to a string
-            WINDOW.clipboard.set_text(temp_data, -1)   # copy data to the clipboard
-            status_msg('Row data copied to clipboard from index ' + str(current_row))   # post status
+        if isinstance(current_focus, Gtk.TreeView):   # check if the focus is on the cell or the rows
+            rows = tab.selected_rows()   # grab the selected rows
+            WINDOW.clipboard.set_text(rows_to_text(tab, rows), -1)   # copy data to the clipboard
+            status_msg(str(len(rows)) + ' row(s) copied to clipboard')   # post status
         else:
             current_focus.copy_clipboard()   # copy a singular sell to clipboard
             status_msg('Data copied to clipboard')   # post status
     elif signal == 'paste':   # past data from the clipboard
         if isinstance(current_focus, Gtk.TreeView):   # if the current selection is a row
-            WINDOW.clipboard.request_text(pasted_text)  # get the text from the clipboard
-            try:
-                rows_columns = count_rows_columns()   # grab the amount of rows and columns
-                exec('temp_list = ' + TEMP_CLIPBOARD)   # asignt the clipboard content(str) into a list
-                if rows_columns[1] == len(temp_list):   # if the amount of columns match the length in the database -->
-                    DATA[current_page].liststore[current_row] = temp_list
-                    status_msg('Row data pasted at ' + str(current_row))   # post
-                    fix_row_indices()
-                    post_file_edited()
-                else:
-                    raise(Exception)  # error (incorrect input data or incorrect length)
-            except Exception:
-                status_msg('Incorrect data in the clipboard to paste in as a row')
+            columns = rows_from_text(WINDOW.clipboard.wait_for_text(), tab.header_types)
+            rows = tab.selected_rows()
+            if columns is None or not rows:
+                status_msg('Incorrect data in the clipboard to paste in as rows')
+                return
+            # the rows are pasted over the rows from the first selected one on, the ones past the last row are left out
+            room = len(tab.liststore) - rows[0]
+            left_out = max(0, len(columns[0]) - room)
+            tab.set_rows(rows[0], [each[:room] for each in columns])   # a single change of the model
+            status_msg(str(len(columns[0]) - left_out) + ' row(s) pasted at ' + str(rows[0]) +
+                       (' (' + str(left_out) + ' past the last row left out)' if left_out else ''))
+            post_file_edited()
         else:
             current_focus.paste_clipboard()   # paste into a cell
             status_msg('Data pasted')
             post_file_edited()   # post that a file has been edited
     elif signal == 'cut':   # cut out of the cell/row an put data into the clipboard
         if isinstance(current_focus, Gtk.TreeView):   # if the current selection is a row
-            temp_data = list(DATA[current_page].liststore[current_row])   # grab the row's data
-            temp_data = str(temp_data)   # convert the list to a string
-            status_msg('Row cut to clipboard from index: ' + str(current_row))
-            WINDOW.clipboard.set_text(temp_data, -1)   # put the data into the clipboard
-            delete_row('delete-here')   # delete the currently highlighted row (cut)
+            WINDOW.clipboard.set_text(rows_to_text(tab, tab.selected_rows()), -1)   # put the data into the clipboard
+            delete_row('delete-here')   # delete the selected rows (cut)
         else:   # current selection is a cell
             current_focus.cut_clipboard()   # cut out the information from the cell
             if isinstance(current_focus, Gtk.SpinButton):
@@ -1843,19 +3616,6 @@ def post_file_edited():
     DATA[current_page].notify_file_edited()   # call the class' notify_file_edited() method
 
 
-def fix_row_indices():
-    """Fix row indices.
-
-    (None) -> None
-
-    Iterates through the whole database and makes sure that the rows have the following numbering (0,1,2,3,4.....)
-    """
-    global WINDOW, DATA  # capture the window's and the databases' current data
-    current_page = WINDOW.notebook_tabs.get_current_page()
-    for idx, val in enumerate(DATA[current_page].liststore):   # use enumerate to generate the numbers
-        DATA[current_page].liststore[idx][0] = idx   # set the index values to the rows
-
-
 def display_dialog(signal, prompt, choice=False):
     """Display a quick dialog
 
@@ -1895,21 +3655,33 @@ def display_dialog(signal, prompt, choice=False):
     msg_dialog.destroy()
 
 
+def tab_is_loading():
+    """Check if the current tab is still being loaded.
+
+    (None) -> bool
+
+    Posts a status message if it is. The tab's data is incomplete until open_in_background() is done,
+    so it cannot be edited, saved or exported yet.
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    current_page = WINDOW.notebook_tabs.get_current_page()
+    if DATA[current_page].loading:
+        status_msg('Please wait, the file is still loading')
+        return True
+    return False
+
+
 def count_rows_columns():
     """Count rows and column.
 
     (None) -> tuple
 
     Counts the amount of rows and columns in the current tab. Returns it as a tuple of (rows, columns).
+    The columns include the '#' column. Both are kept by the model, nothing is iterated.
     """
     global WINDOW, DATA  # capture the window's and the databases' current data
     current_page = WINDOW.notebook_tabs.get_current_page()
-    rows, columns = 0, 0
-    for each in DATA[current_page].liststore:
-        rows += 1
-    for each in DATA[current_page].liststore[0]:
-        columns += 1
-    return rows, columns
+    return len(DATA[current_page].liststore), DATA[current_page].liststore.get_n_columns()
 
 
 def check_before_quit():
@@ -1922,20 +3694,74 @@ def check_before_quit():
     """
     global DATA, WINDOW  # capture the window's and the databases' current data
     modified_files = False   # set the variable
+    prompt = 'You have unsaved changes\nAre you sure you want to Quit?'
     for each in DATA:
         if each.file_edited:
             modified_files = True
             break   # found an unsaved change
+    for each in DATA:
+        if each.saving:   # quitting stops the save (the file is left as it was before the save)
+            modified_files = True
+            prompt = 'A file is still being saved\nAre you sure you want to Quit?'
+            break
     if modified_files:
-        answer = display_dialog('warn', 'You have unsaved changes\nAre you sure you want to Quit?', choice=True)
+        answer = display_dialog('warn', prompt, choice=True)
         if answer:
+            discard_journals()   # the user chose to leave the changes behind
             Gtk.main_quit()   # quit
         else:
             return True   # stay in the program
     else:
+        discard_journals()
         Gtk.main_quit()
 
 
+def discard_journals():
+    """Remove the crash recovery journals of all tabs.
+
+    (None) -> None
+    """
+    global DATA  # capture the databases' current data
+    for each in DATA:
+        each.discard_journal()
+
+
+def offer_recovery():
+    """Offer to recover the edits left behind by a crash.
+
+    (None) -> bool
+
+    Looks for crash recovery journals (see jdf_journal) and asks, for each one, whether its edits should be
+    replayed. A file is opened (in the background) and the edits are replayed onto it once it is loaded,
+    an Untitled tab is rebuilt from the data kept in the journal. Journals that are not recovered are removed.
+    Runs once, from the main loop.
+    """
+    global WINDOW, DATA  # capture the window's and the databases' current data
+    for path, header, operations in jdf_journal.find_journals():
+        file_no_path = header['file'].split(PATH_BREAK)[-1]
+        prompt = ('Unsaved changes of ' + file_no_path + ' were left behind\n(' + str(len(operations)) +
+                  ' edits)\n\nRecover them?')
+        if header['rows'] is None and jdf_journal.file_state(header['file']) != header['state']:
+            prompt += '\n\nThe file has been changed since, the edits may not fit it any more'
+        if not display_dialog('quest', prompt, choice=True):
+            os.remove(path)
+        elif header['rows'] is not None:   # an Untitled tab
+            tab = DataCells(WINDOW, header['file'], header['rows'], header['field_types'], header['field_names'],
+                            WINDOW.notebook_tabs.get_n_pages())
+            DATA.append(tab)
+            WINDOW.window.show_all()
+            tab_control('switch-to-last')
+            tab.replay_journal(path, header, operations)
+        elif not os.path.isfile(header['file']):
+            display_dialog('warn', 'Cannot recover the changes\n' + header['file'] + '\ndoes not exist any more')
+            os.remove(path)
+        else:
+            open_in_background(header['file'],
+                               lambda tab, path=path, header=header, operations=operations:
+                               tab.replay_journal(path, header, operations))
+    return False   # run only once
+
+
 def test_func():
     """Tester function
     """
@@ -2033,16 +3859,16 @@ def main():
 
     (None) -> None
     """
-    global WINDOW, DATA, UNTITLED_FILE_COUNT, TEMP_CLIPBOARD, TOOLBAR   # set globals
+    global WINDOW, DATA, UNTITLED_FILE_COUNT, TOOLBAR   # set globals
     DATA = list()   # create an empty list that will hold instances of DataCells
     UNTITLED_FILE_COUNT = 1   # start at Untitled1 filename
-    TEMP_CLIPBOARD = None   # no info in the clipboard currently
     WINDOW = MainWindow()   # instantiate the window to the global variable
 
     MainMenu(WINDOW)   # launch the MainMenu class
     TOOLBAR = MainToolbar(WINDOW)   # instantiate the Toolbar to the global variable
 
     build_blank_table()  # make a blank table
+    GLib.idle_add(offer_recovery)   # once the window is up
     Gtk.main()  # launch the Gtk's main loop
 
 
@@ -0,0 +1,406 @@
+#!/usr/bin/env python
+# coding=utf-8
+# -----------------------------------------------------------------------------
+# Name:        jdf_journal.py
+# Purpose:     Crash recovery journal and undo history of the jdf_editor's tabs
+# Author:      Damian Chrzanowski
+# Created:     19/10/26
+# Modified:    19/10/26
+# Copyright:   pjdamian.chrzanowski@gmail.com
+# License:     GNU Public License v3
+# Version:     1.0
+# Revision:    N/A
+# -----------------------------------------------------------------------------
+# jdf_journal, records the edits made to a tab, so that they can be replayed after a crash or undone
+# Copyright (C) 2016 Damian Chrzanowski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------
+# Layout of a journal file (one json value per line):
+#   header     - {"jdf_journal": 1, "pid": ..., "file": ..., "state": [mtime, size], "field_names": [...],
+#                 "field_types": [...], "rows": [...] or null, "created": ...}
+#                "state" is null and "rows" holds the tab's data if the tab has no file on disk (Untitled tabs)
+#   operations - [sequence number, name, arguments...], for example [1, "set", row, column, value]
+#                ["base", sequence number, file, state] marks a save: the file holds every operation
+#                up to that sequence number, only the later ones are replayed
+# The undo history (UndoLog) holds operations of the same form, without the sequence number.
+import collections
+import errno
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from array import array
+try:
+    import queue
+except ImportError:   # python 2
+    import Queue as queue
+
+JOURNAL_VERSION = 1
+JOURNAL_DIR = os.path.join(os.path.expanduser('~'), '.jdf_editor', 'recovery')   # where the journals are kept
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_SYNC_DELAY = 1.0   # seconds, the operations written in between are synced to the disk together
+UNDO_MEMORY_LIMIT = 64 * 1024 * 1024   # bytes, the oldest undo steps are dropped once the history takes more
+UNDO_COALESCE_DELAY = 1.0   # seconds, edits of the cells of a row made within it are undone in one step
+
+
+def file_state(file_name):
+    """Return the modification time and the size of a file.
+
+    (str) -> list
+
+    Returns None if the file does not exist. Used to tell if a file has changed since a journal was started.
+    """
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+    return [stat.st_mtime, stat.st_size]
+
+
+def _json_value(value):
+    """Turn the values json does not know into json serializable ones.
+
+    (object) -> object
+
+    Whole columns (see jdf_lib.ColumnStore) are logged as typed arrays, they are written as lists.
+    """
+    if isinstance(value, array):
+        return [bool(each) for each in value] if value.typecode == 'B' else value.tolist()
+    raise TypeError(repr(value) + ' is not JSON serializable')
+
+
+def new_header(file_name, field_names, field_types, rows=None):
+    """Make the header of a new journal.
+
+    (str, list, list, list) -> dict
+
+    :param file_name: the tab's file
+    :param rows: the tab's data, only needed if the tab has no file on disk
+    """
+    return {'jdf_journal': JOURNAL_VERSION, 'pid': os.getpid(), 'file': file_name, 'state': file_state(file_name),
+            'field_names': field_names, 'field_types': field_types, 'rows': rows, 'created': time.time()}
+
+
+class Journal(object):
+    """Journal of a tab's edits.
+
+    (dict, str) -> None
+
+    log() only puts the operation in a queue, a writer thread encodes and writes it. The file is synced to the
+    disk (fsync) once JOURNAL_SYNC_DELAY has passed since the last sync, or once no more operations come in,
+    so a burst of edits costs a single sync. The file itself is made by the writer thread as well, a journal
+    that cannot be made or written has its error set (the caller's thread never touches the disk).
+    """
+
+    def __init__(self, header, directory=JOURNAL_DIR):
+        """Class constructor.
+
+        (self, dict, str) -> None
+
+        :param header: see new_header(), its pid is set to the current process
+        :param directory: where the journal file is made
+        """
+        self.directory = directory
+        self.path = None   # set by the writer thread once the file is made
+        self.seq = 0   # sequence number of the last operation logged
+        self.error = None   # set if the journal could not be written (the edits are not recorded any more)
+        self.queue = queue.Queue()
+        header = dict(header)
+        header['pid'] = os.getpid()
+        self.queue.put(('write', header))
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def log(self, operation, *args):
+        """Record an operation.
+
+        (self, str, ...) -> int
+
+        :param operation: name of the operation, followed by its json serializable arguments (or typed arrays)
+
+        Returns the operation's sequence number.
+        """
+        self.seq += 1
+        self.queue.put(('write', [self.seq, operation] + list(args)))
+        return self.seq
+
+    def mark_saved(self, seq, file_name):
+        """Record that the operations up to seq have been saved into a file.
+
+        (self, int, str) -> None
+        """
+        self.log('base', seq, file_name, file_state(file_name))
+
+    def close(self, remove=False):
+        """Write the remaining operations and close the journal.
+
+        (self, bool) -> None
+
+        :param remove: remove the journal file as well (the edits have been saved or discarded)
+        """
+        self.queue.put(('close', remove))
+        self.thread.join()
+
+    def _run(self):
+        dirty = False   # written, not synced yet
+        last_sync = time.time()
+        handle = None
+        while True:
+            try:
+                command, data = self.queue.get(timeout=JOURNAL_SYNC_DELAY if dirty else None)
+            except queue.Empty:   # no more operations for a while
+                command, data = 'sync', None
+            try:
+                if handle is None and self.error is None:
+                    handle = self._make_file()
+                if command == 'write' and self.error is None:
+                    handle.write((json.dumps(data, default=_json_value) + '\n').encode('utf-8'))
+                    dirty = True
+                if dirty and (command != 'write' or time.time() - last_sync >= JOURNAL_SYNC_DELAY):
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                    dirty = False
+                    last_sync = time.time()
+            except (IOError, OSError) as error:   # disk full, directory removed...
+                self.error = error
+                dirty = False
+            if command == 'close':
+                if handle is not None:
+                    handle.close()
+                if data and self.path is not None and os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+
+    def _make_file(self):
+        """Make the journal file and open it.
+
+        (self) -> object
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        handle, self.path = tempfile.mkstemp(prefix=str(os.getpid()) + '-', suffix=JOURNAL_SUFFIX,
+                                             dir=self.directory)
+        os.close(handle)
+        return io.open(self.path, 'ab')
+
+
+def _process_running(pid):
+    """Check if a process is running.
+
+    (int) -> bool
+
+    Always False on windows, where os.kill() would end the process.
+    """
+    if pid == os.getpid():
+        return True
+    if os.name == 'nt':
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError as error:
+        return error.errno == errno.EPERM   # running, but owned by someone else
+    return True
+
+
+def read_journal(path):
+    """Read a journal file.
+
+    (str) -> tuple
+
+    Returns (header, operations). The operations already saved into a file (see Journal.mark_saved()) are left
+    out, the header's file and state are then those of the save. A line cut short by a crash ends the journal.
+    Returns -1 if the file is not a journal.
+    """
+    try:
+        f_handle = io.open(path, 'r', encoding='utf-8')
+        try:
+            header = json.loads(f_handle.readline())
+            if header.get('jdf_journal') != JOURNAL_VERSION:
+                raise ValueError
+            operations = list()
+            for line in f_handle:
+                try:
+                    operation = json.loads(line)
+                except ValueError:   # the last line was not written completely
+                    break
+                if operation[1] == 'base':
+                    saved_seq, header['file'], header['state'] = operation[2:5]
+                    header['rows'] = None   # the base is the saved file now
+                    operations = [each for each in operations if each[0] > saved_seq]
+                else:
+                    operations.append(operation)
+        finally:
+            f_handle.close()
+    except (IOError, OSError, ValueError, AttributeError):
+        return -1
+    return header, operations
+
+
+def find_journals(directory=JOURNAL_DIR):
+    """Find the journals left behind by editors that are not running any more.
+
+    (str) -> list
+
+    Returns a list of (path, header, operations), see read_journal(). Journals that hold no operations
+    are removed.
+    """
+    found = list()
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:   # no journals were ever written
+        return found
+    for name in names:
+        path = os.path.join(directory, name)
+        if not name.endswith(JOURNAL_SUFFIX):
+            continue
+        journal = read_journal(path)
+        if journal == -1:
+            continue
+        header, operations = journal
+        if _process_running(header['pid']):
+            continue
+        if operations:
+            found.append((path, header, operations))
+        else:
+            os.remove(path)
+    return found
+
+
+def operation_size(operation):
+    """Estimate the memory taken by an operation.
+
+    (list) -> int
+
+    The lists it holds (rows, whole columns, the columns of several rows) count with every one of their values,
+    a typed array's size includes its values already.
+    """
+    if isinstance(operation, (list, tuple)):
+        return sys.getsizeof(operation) + sum(operation_size(each) for each in operation)
+    return sys.getsizeof(operation)
+
+
+class UndoLog(object):
+    """Undo and redo history of a tab.
+
+    (int, float) -> None
+
+    Every edit is recorded as its inverse: the operation that takes it back ([name, arguments...], as in the
+    journal). No copies of the table are made, a deleted row is kept as its values, a deleted column as
+    the column itself (see jdf_lib.ColumnStore.remove_column()). A step holds one or more operations,
+    which are undone in reverse order. The edits made while a step is undone are recorded as the step
+    that redoes it (and the other way round). Once the steps take more than memory_limit bytes the oldest
+    ones are dropped.
+    """
+
+    def __init__(self, memory_limit=UNDO_MEMORY_LIMIT, coalesce_delay=UNDO_COALESCE_DELAY):
+        """Class constructor.
+
+        (self, int, float) -> None
+
+        :param memory_limit: bytes the steps may take, see operation_size()
+        :param coalesce_delay: seconds, 'set' edits of the same row made within it are kept as one step
+        """
+        self.memory_limit = memory_limit
+        self.coalesce_delay = coalesce_delay
+        self.undo_steps = collections.deque()   # [operations, size, time] of each step, the last one is undone first
+        self.redo_steps = collections.deque()
+        self.size = 0   # bytes taken by the steps of both lists
+        self.current = None   # the step made while undo() or redo() runs
+
+    def record(self, inverse):
+        """Record an edit.
+
+        (self, list) -> None
+
+        :param inverse: the operation that takes the edit back, made before the edit
+
+        A new edit clears the redo steps. A 'set' made shortly after other 'set's of the same row joins
+        their step, a cell edited again keeps its first value.
+        """
+        size = operation_size(inverse)
+        if self.current is not None:
+            self.current[0].append(inverse)
+            self.current[1] += size
+            self.size += size
+            return
+        self._drop(self.redo_steps, len(self.redo_steps))
+        now = time.time()
+        last = self.undo_steps[-1] if self.undo_steps else None
+        if (last is not None and inverse[0] == 'set' and now - last[2] < self.coalesce_delay and
+                all(each[0] == 'set' and each[1] == inverse[1] for each in last[0])):
+            last[2] = now
+            if any(each[2] == inverse[2] for each in last[0]):
+                return   # the cell's value from before the step is already kept
+            last[0].append(inverse)
+            last[1] += size
+        else:
+            self.undo_steps.append([[inverse], size, now])
+        self.size += size
+        self._evict()
+
+    def undo(self, apply):
+        """Undo the last step.
+
+        (self, function) -> bool
+
+        :param apply: function that makes an operation, it has to record the edit it makes (see record())
+
+        Returns False if there is nothing to undo.
+        """
+        return self._replay(self.undo_steps, self.redo_steps, apply)
+
+    def redo(self, apply):
+        """Redo the last undone step.
+
+        (self, function) -> bool
+
+        Same as undo(), returns False if there is nothing to redo.
+        """
+        return self._replay(self.redo_steps, self.undo_steps, apply)
+
+    def clear(self):
+        """Forget every step.
+
+        (self) -> None
+        """
+        self._drop(self.undo_steps, len(self.undo_steps))
+        self._drop(self.redo_steps, len(self.redo_steps))
+
+    def _replay(self, steps, other_steps, apply):
+        if not steps or self.current is not None:
+            return False
+        operations, size, when = steps.pop()
+        self.size -= size
+        self.current = [list(), 0, 0]   # time 0, so that later edits do not join the step
+        try:
+            for operation in reversed(operations):
+                apply(operation)
+        finally:
+            other_steps.append(self.current)
+            self.current = None
+            self._evict()
+        return True
+
+    def _drop(self, steps, amount):
+        for idx in range(amount):
+            self.size -= steps.popleft()[1]
+
+    def _evict(self):
+        while self.size > self.memory_limit and (self.undo_steps or self.redo_steps):
+            self._drop(self.undo_steps if self.undo_steps else self.redo_steps, 1)
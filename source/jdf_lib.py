@@ -27,30 +27,257 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 # --------------------------------------------
+import bisect
+import collections
+import csv
+import hashlib
+import io
+import itertools
 import json
+import mmap
+import multiprocessing
+import numbers
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from itertools import islice
+from xml.sax import saxutils
+try:
+    import xml.etree.cElementTree as ElementTree   # the C parser of python 2
+except ImportError:
+    import xml.etree.ElementTree as ElementTree   # python 3 uses the C parser by default
 
 JDF_VERSION = '1'
 VERSION = '1.0'
+META_KEY = 'jdf_meta'   # key of the optional metadata record stored on the last line of a file
+META_BLOCK_SIZE = 4096   # chunk size used by inspect() while reading the metadata record from the end of a file
+META_HASH_BLOCK = 1024 * 1024   # chunk size used by inspect(..., verify=True) while hashing the data line
+# a json string (skipped as a whole) or a bracket, used by the row scanner of open_mmap()
+ROW_TOKENS = re.compile(br'"[^"\\]*(?:\\.[^"\\]*)*"|(\[)|(\])')
+try:
+    OFFSET_TYPE = 'q'   # 64 bit typecode of the row boundary index
+    array(OFFSET_TYPE)
+except ValueError:   # python 2 has no 'q' typecode
+    OFFSET_TYPE = 'l'
+COLUMN_ARRAYS = {'int': OFFSET_TYPE, 'float': 'd', 'bool': 'B'}   # array typecodes of the ColumnStore columns
+SEARCH_WORDS = re.compile(r'\w+', re.UNICODE)   # the words of a cell, as indexed by SearchIndex
+ROW_INDEX_CACHE = 16   # files whose row boundary indices open_mmap() keeps
+_row_indices = collections.OrderedDict()   # path -> (size, modification time, row indices), least recent first
+SQLITE_TYPES = {'str': 'TEXT', 'int': 'INTEGER', 'float': 'REAL', 'bool': 'BOOLEAN'}   # column types in sqlite
+SQL_FETCH_SIZE = 1000   # rows fetched at a time from the query results of sql()
+SQLITE_BATCH = 10000   # rows per executemany() / fetchmany() call of the sqlite import and export
+SQLITE_PRAGMAS = ('PRAGMA journal_mode = MEMORY', 'PRAGMA synchronous = OFF')   # bulk writes into new databases
+SQLITE_MAGIC = b'SQLite format 3\x00'   # first bytes of every sqlite database file
+_sql_state = threading.local()   # every thread's in-memory sqlite database of sql(), see _sql_database()
+SQL_NAME = r'(?:"(?:[^"]|"")+"|[A-Za-z_]\w*)'   # a bare or quoted sql identifier
+SQL_OPERATOR = r'(?:==|=|<>|!=|<=|>=|<|>|\bIN\b|\bLIKE\b|\bGLOB\b|\bBETWEEN\b|\bIS\b)'
+SQL_COLUMN = r'(?:' + SQL_NAME + r'\s*\.\s*)?(' + SQL_NAME + r')'   # a column, with or without its table
+# the predicates of a query: WHERE and ON conditions, up to the next clause, and the columns of USING (...)
+SQL_PREDICATES = re.compile(r'\b(?:WHERE|ON)\b(.*?)(?=\b(?:WHERE|GROUP|ORDER|HAVING|LIMIT|UNION|INTERSECT|EXCEPT|'
+                            r'WINDOW|JOIN|LEFT|RIGHT|INNER|CROSS|NATURAL|FULL)\b|$)|\bUSING\s*\(([^)]*)\)',
+                            re.IGNORECASE | re.DOTALL)
+SQL_COMPARED = (re.compile(SQL_COLUMN + r'\s*(?:NOT\s+)?' + SQL_OPERATOR, re.IGNORECASE),   # column = ...
+                re.compile(SQL_OPERATOR + r'\s*(?:NOT\b\s*)?' + SQL_COLUMN, re.IGNORECASE))   # ... = column
+SQL_KEYWORDS = ('NULL', 'SELECT', 'EXISTS', 'TRUE', 'FALSE')   # bare words found next to a comparison, not columns
+WRITE_BATCH = 1000   # rows serialized with a single json.dumps() call by DatabaseWriter
+READ_BLOCK = 1024 * 1024   # characters read at a time by stream_database()
+WRITE_BUFFER = 1024 * 1024   # size (bytes) of the file buffers used by the streaming writers
+LIST_SEPARATORS = re.compile(r'[\s,]*')   # whitespace and commas in between the lists of the data line
+TYPE_DEFAULTS = {'str': '', 'int': 0, 'float': 0.0, 'bool': False}   # used in place of nulls and failed conversions
+CSV_SAMPLE_SIZE = 1000   # rows used by csv_to_jdf() to guess the types of the columns
+CSV_BATCH = 10000   # rows handed to the csv writer at a time
+CSV_REPORT_LIMIT = 100   # failed conversions listed in the report of csv_to_jdf() (all of them are counted)
+XML_ROOT_TAG = 'rows'   # default element names of the xml import and export
+XML_ROW_TAG = 'row'
+XML_ILLEGAL = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')   # characters xml 1.0 cannot hold at all
+XML_ENTITIES = {'\r': '&#13;'}   # escaped on top of &, < and >, a bare \r would be read back as \n
+JSONL_KEY = 'jdf'   # key of the header line of a JSONL file, holds 'JSONL' + JDF_VERSION
+JSONL_PARALLEL_SIZE = 8 * 1024 * 1024   # JSONL files of this size (in bytes) and above are parsed by a process pool
+JSONL_CHUNKS_PER_PROCESS = 4   # parts a JSONL file is split into (per process) by load_jsonl()
+JSONL_HEADER_SIZE = 1024 * 1024   # the header line of a JSONL file is looked for within its first bytes
+JSONL_FOLLOW_DELAY = 0.5   # seconds stream_jsonl(..., follow=True) waits for new rows at the end of a file
+PANDAS_DTYPES = {'int': 'int64', 'float': 'float64', 'bool': 'bool', 'str': 'object'}   # dtypes of to_dataframe()
+PANDAS_NULL_DTYPES = {'int': 'Int64', 'bool': 'boolean'}   # dtypes of the int and bool columns that hold nulls
+PANDAS_WRITE_ROWS = 10000   # rows of a DataFrame turned into python values at a time by from_dataframe()
+XML_INVALID = re.compile(r'[^\w.-]', re.UNICODE)   # characters that are not allowed in an xml element name
 
 
-def save_database(file_name, field_names, field_types, data_base):
+class ColumnStats(object):
+    """Running statistics of a database's columns.
+
+    (int) -> None
+
+    Collects the amount of rows, the amount of null (None) values and the min/max values of every column.
+    Rows are fed one at a time through add_row(), so the statistics can be built while the rows are being written.
+    """
+
+    def __init__(self, field_count):
+        """Class constructor.
+
+        (self, int) -> None
+
+        :param field_count: amount of columns in the database
+        """
+        self.rows = 0
+        self.nulls = [0] * field_count
+        self.minimum = [None] * field_count
+        self.maximum = [None] * field_count
+
+    def add_row(self, row):
+        """Update the statistics with a single row.
+
+        (self, list) -> None
+
+        :param row: a list of the row's values, one per column
+        """
+        self.rows += 1
+        for idx, value in enumerate(row):
+            if value is None:   # nulls are counted, but never take part in min/max
+                self.nulls[idx] += 1
+            elif self.minimum[idx] is None:   # first non null value of the column
+                self.minimum[idx] = value
+                self.maximum[idx] = value
+            else:
+                try:
+                    if value < self.minimum[idx]:
+                        self.minimum[idx] = value
+                    elif value > self.maximum[idx]:
+                        self.maximum[idx] = value
+                except TypeError:   # mixed types within a column cannot be compared, skip the value
+                    pass
+
+    def as_dict(self):
+        """Return the statistics as a dictionary.
+
+        (self) -> dict
+        """
+        return {'rows': self.rows, 'nulls': self.nulls, 'min': self.minimum, 'max': self.maximum}
+
+
+class DatabaseWriter(object):
+    """Write a database to a file, row by row.
+
+    (str, list, list, bool) -> None
+
+    Usage:  with DatabaseWriter('file.jdf', field_names, field_types) as writer:
+                writer.write_row(row)
+
+    The file written is the same as the one written by save_database(), but the rows never have to be held
+    in memory all at once. The metadata record (see inspect()) is gathered while the rows are being written.
+    """
+
+    def __init__(self, file_name, field_names, field_types, metadata=False):
+        """Class constructor.
+
+        (self, str, list, list, bool) -> None
+
+        :param file_name: file name or path to the file that will be saved
+        :param field_names: a list of databases' column names
+        :param field_types: a list of databases' column types
+        :param metadata: when set to True a metadata record is added to the end of the file
+        """
+        self.field_names = field_names
+        self.field_types = field_types
+        self.stats = ColumnStats(len(field_names)) if metadata else None
+        self.rows = 0   # rows written so far
+        self.data_bytes = 0
+        self.data_hash = hashlib.sha1()
+        self.f_handle = open(file_name, 'w')
+        self.f_handle.write('JDF' + JDF_VERSION + '\n')
+        self.write_data(json.dumps([field_names, field_types])[:-1])   # the list stays open for the rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_data(self, text):
+        """Write a piece of the data line.
+
+        (self, str) -> None
+        """
+        self.f_handle.write(text)
+        if self.stats is not None:   # json.dumps escapes non ascii characters, so characters == bytes
+            self.data_bytes += len(text)
+            self.data_hash.update(text.encode('utf-8'))
+
+    def write_row(self, row):
+        """Write a single row.
+
+        (self, list) -> None
+        """
+        self.write_rows([row])
+
+    def write_rows(self, rows):
+        """Write rows from any iterable of rows.
+
+        (self, iterable) -> None
+
+        The rows are serialized WRITE_BATCH at a time.
+        """
+        batch = list()
+        for row in rows:
+            batch.append(row)
+            if len(batch) == WRITE_BATCH:
+                self.write_batch(batch)
+                batch = list()
+        if batch:
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        """Serialize and write a list of rows.
+
+        (self, list) -> None
+        """
+        self.write_data(', ' + json.dumps(batch)[1:-1])
+        self.rows += len(batch)
+        if self.stats is not None:
+            for each in batch:
+                self.stats.add_row(each)
+
+    def close(self):
+        """Finish the data line (and the metadata record) and close the file.
+
+        (self) -> None
+        """
+        if self.f_handle.closed:
+            return
+        self.write_data(']')
+        if self.stats is not None:
+            meta = self.stats.as_dict()
+            meta['field_names'] = self.field_names
+            meta['field_types'] = self.field_types
+            meta['bytes'] = self.data_bytes
+            meta['sha1'] = self.data_hash.hexdigest()
+            self.f_handle.write('\n' + json.dumps({META_KEY: meta}) + '\n')
+        self.f_handle.close()
+
+
+def save_database(file_name, field_names, field_types, data_base, metadata=False):
     """Save database to a file.
 
-    (str, list, list, list) -> None
+    (str, list, list, list, bool) -> None
 
     :param file_name: file name or path to the file that will be saved
     :param field_names: a list of databases' column names
     :param field_types: a list of databases' column types
-    :param data_base: a list containing the actual database contents
+    :param data_base: a list containing the actual database contents (any iterable of rows will do)
+    :param metadata: when set to True a metadata record is added to the end of the file (see inspect())
 
     This function saves the database into a file using the JDF format.
+    The metadata record sits on its own line after the data, so readers that only check the 'JDF1' line
+    and parse the line that follows it are not affected by it.
     """
-    f_handle = open(file_name, 'w')
-    data_base.insert(0, field_types)
-    data_base.insert(0, field_names)
-    f_handle.write('JDF' + JDF_VERSION + '\n')
-    json.dump(data_base, f_handle)
-    f_handle.close()
+    writer = DatabaseWriter(file_name, field_names, field_types, metadata=metadata)
+    try:
+        writer.write_rows(data_base)
+    finally:
+        writer.close()
 
 
 def load_database(file_name):
@@ -78,6 +305,2008 @@ def load_database(file_name):
     field_types = data_base.pop(0)
     return field_names, field_types, data_base
 
+
+def _stream_lists(f_handle):
+    """Decode the lists of the data line one at a time.
+
+    (object) -> generator
+
+    :param f_handle: the file opened for reading, positioned at the start of the data line
+
+    Reads the data line READ_BLOCK characters at a time, so only the current block (and the list being decoded)
+    is held in memory. The file is closed once the data line ends (or the generator is thrown away).
+    """
+    decoder = json.JSONDecoder()
+    try:
+        buf = f_handle.read(READ_BLOCK)
+        pos = LIST_SEPARATORS.match(buf).end()
+        if buf[pos:pos + 1] != '[':
+            raise ValueError('not a JDF data line')
+        pos += 1
+        while True:
+            pos = LIST_SEPARATORS.match(buf, pos).end()
+            if pos < len(buf) and buf[pos] == ']':   # end of the data line
+                return
+            try:
+                if pos == len(buf):
+                    raise ValueError('end of the block')
+                value, pos = decoder.raw_decode(buf, pos)
+            except ValueError:   # the list continues in the next block
+                more = f_handle.read(READ_BLOCK)
+                if not more:
+                    raise ValueError('unexpected end of the file')
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield value
+    finally:
+        f_handle.close()
+
+
+def stream_database(file_name):
+    """Load database from a file, one row at a time.
+
+    (str) -> tuple
+
+    :param file_name: file name or path to the file that will be loaded
+
+    Returns (field_names, field_types, rows) like load_database() does, but rows is a generator that reads
+    and decodes the rows as it is iterated over. The memory used does not depend on the size of the file.
+    Returns -1 if the file is not a valid JDF file. The generator raises ValueError on a corrupted data line.
+    """
+    try:
+        f_handle = io.open(file_name, 'r', encoding='utf-8')
+        if f_handle.readline().strip() != 'JDF' + JDF_VERSION:
+            f_handle.close()
+            raise Exception
+        rows = _stream_lists(f_handle)
+        field_names = next(rows)
+        field_types = next(rows)
+    except Exception:
+        return -1
+    return field_names, field_types, rows
+
+
+def inspect(file_name, verify=False):
+    """Read the metadata record of a file.
+
+    (str, bool) -> dict
+
+    :param file_name: file name or path to the file that will be inspected
+    :param verify: hash the data line and compare it with the record's 'sha1' (reads the whole file)
+
+    Returns the metadata record written by save_database(..., metadata=True) without parsing the database.
+    The record holds: 'rows', 'field_names', 'field_types', 'bytes' (length of the data line), 'sha1' (hash of the
+    data line) and the per column lists 'nulls', 'min' and 'max'.
+    Only the first line and the end of the file are read, so the time taken does not depend on the amount of rows.
+    Returns -1 if the file is not a JDF file or if it has no (or an outdated) metadata record. Without verify,
+    a record is taken as outdated only if the length of the data line has changed (an edit made by another
+    program that keeps the length is not noticed).
+    """
+    try:
+        f_handle = open(file_name, 'rb')
+        try:
+            first_line = f_handle.readline(16)   # bounded read, the first line is only 'JDF1'
+            if first_line.strip() != ('JDF' + JDF_VERSION).encode('ascii'):
+                raise Exception
+            data_start = len(first_line)
+            f_handle.seek(0, os.SEEK_END)
+            position = f_handle.tell()
+            f_handle.seek(max(position - 3, data_start))
+            if f_handle.read(3).rstrip()[-1:] != b'}':   # the data line ends with ']', the metadata line with '}'
+                raise Exception
+            tail = b''
+            line_break = -1
+            while line_break == -1:   # read backwards until the line break in front of the metadata line is found
+                step = min(META_BLOCK_SIZE, position - data_start)
+                if step <= 0:
+                    raise Exception
+                position -= step
+                f_handle.seek(position)
+                tail = f_handle.read(step) + tail
+                line_break = tail.rstrip().rfind(b'\n')
+            data_end = position + line_break
+            f_handle.seek(data_end - 1)
+            if f_handle.read(1) == b'\r':   # file saved with windows line endings
+                data_end -= 1
+            meta = json.loads(tail[line_break + 1:].strip().decode('utf-8'))[META_KEY]
+            if meta['bytes'] != data_end - data_start:   # the data line has been modified after the record was written
+                raise Exception
+            if verify:
+                data_hash = hashlib.sha1()
+                f_handle.seek(data_start)
+                for position in range(data_start, data_end, META_HASH_BLOCK):
+                    data_hash.update(f_handle.read(min(META_HASH_BLOCK, data_end - position)))
+                if data_hash.hexdigest() != meta['sha1']:
+                    raise Exception
+        finally:
+            f_handle.close()
+    except Exception:
+        return -1
+    return meta
+
+
+def _scan_rows(data, start, end):
+    """Find the boundaries of every row of the data line.
+
+    (object, int, int) -> tuple
+
+    :param data: the file's content (mmap object)
+    :param start: offset of the data line
+    :param end: offset of the end of the data line
+
+    Returns two arrays: the start and the end offset of every list at depth 2 of the data line
+    (the header names, the header types and then the rows). Strings are skipped as a whole by the regex,
+    so the python side of the loop only runs for the brackets.
+    """
+    starts = array(OFFSET_TYPE)
+    ends = array(OFFSET_TYPE)
+    depth = 0
+    for match in ROW_TOKENS.finditer(data, start, end):
+        bracket = match.lastindex
+        if bracket == 1:   # '['
+            depth += 1
+            if depth == 2:
+                starts.append(match.start())
+        elif bracket == 2:   # ']'
+            if depth == 2:
+                ends.append(match.end())
+            depth -= 1
+    return starts, ends
+
+
+def open_mmap(file_name):
+    """Open a database in the read only, memory mapped mode.
+
+    (str) -> MappedDatabase
+
+    :param file_name: file name or path to the file that will be opened
+
+    The file is mapped into memory and only the row boundaries are indexed (once per file, the index is reused
+    while the file stays unchanged, the indices of the last ROW_INDEX_CACHE files opened are kept).
+    Rows are decoded when they are accessed, so untouched rows do not take any memory of the python process.
+    Returns -1 if the file cannot be opened.
+    """
+    try:
+        f_handle = open(file_name, 'rb')
+        try:
+            if f_handle.readline(16).strip() != ('JDF' + JDF_VERSION).encode('ascii'):
+                raise Exception
+            data_start = f_handle.tell()
+            data = mmap.mmap(f_handle.fileno(), 0, access=mmap.ACCESS_READ)
+            status = os.fstat(f_handle.fileno())
+        finally:
+            f_handle.close()
+        path = os.path.abspath(file_name)
+        cached = _row_indices.pop(path, None)   # put back as the most recent below
+        if cached is None or cached[:2] != (status.st_size, status.st_mtime):   # new or changed file
+            data_end = data.find(b'\n', data_start)   # json.dumps never puts a line break inside of the data line
+            if data_end == -1:
+                data_end = len(data)
+            cached = (status.st_size, status.st_mtime, _scan_rows(data, data_start, data_end))
+        _row_indices[path] = cached
+        while len(_row_indices) > ROW_INDEX_CACHE:
+            _row_indices.popitem(last=False)
+        starts, ends = cached[2]
+        if len(starts) < 2 or len(starts) != len(ends):
+            raise Exception
+        return MappedDatabase(data, starts, ends)
+    except Exception:
+        return -1
+
+
+class MappedDatabase(object):
+    """Read only, memory mapped database.
+
+    (object, array, array) -> None
+
+    Returned by open_mmap(). Behaves like the data_base list returned by load_database(): len(), indexing,
+    slicing and iteration over the rows. Each access decodes the row from the mapped file.
+    The data is held by the operating system's page cache, which is shared by all the processes
+    that map the same file.
+    """
+
+    def __init__(self, data, starts, ends):
+        """Class constructor.
+
+        (self, object, array, array) -> None
+
+        :param data: the mmap object of the file
+        :param starts: start offsets of the header names, the header types and the rows
+        :param ends: end offsets of the header names, the header types and the rows
+        """
+        self.data = data
+        self.starts = starts
+        self.ends = ends
+        self.field_names = self.decode(0)
+        self.field_types = self.decode(1)
+
+    def decode(self, idx):
+        """Decode the list at a given index of the data line.
+
+        (self, int) -> list
+        """
+        return json.loads(self.data[self.starts[idx]:self.ends[idx]].decode('utf-8'))
+
+    def __len__(self):
+        return len(self.starts) - 2
+
+    def __getitem__(self, row):
+        """Return a row (or a list of rows for a slice).
+
+        (self, int) -> list
+        """
+        if isinstance(row, slice):
+            return [self.decode(idx + 2) for idx in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('row index out of range')
+        return self.decode(row + 2)
+
+    def __iter__(self):
+        for idx in range(2, len(self.starts)):
+            yield self.decode(idx)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Unmap the file.
+
+        (self) -> None
+        """
+        self.data.close()
+
+
+class ColumnStore(object):
+    """Database held column by column.
+
+    (list, list) -> None
+
+    int, float and bool columns are kept in typed arrays (8, 8 and 1 byte per value) instead of lists of python
+    objects, other columns are kept in lists. A column that holds values its array cannot (nulls, huge numbers)
+    is kept in a list as well. Cells are read with value(), rows are put together on demand with row().
+    """
+
+    def __init__(self, field_types, columns=None):
+        """Class constructor.
+
+        (self, list, list) -> None
+
+        :param field_types: a list of the columns' types
+        :param columns: a list holding the values of each column (an empty store is made if it is None)
+        """
+        self.field_types = list(field_types)
+        if columns is None:
+            columns = [list() for each in self.field_types]
+        self.columns = [self._make_column(self.field_types[idx], values) for idx, values in enumerate(columns)]
+        self.length = len(self.columns[0]) if self.columns else 0
+
+    @classmethod
+    def from_rows(cls, field_types, rows):
+        """Make a store out of a list of rows.
+
+        (list, list) -> ColumnStore
+        """
+        return cls(field_types, [[row[idx] for row in rows] for idx in range(len(field_types))])
+
+    @staticmethod
+    def _make_column(field_type, values):
+        if field_type in COLUMN_ARRAYS:
+            try:
+                return array(COLUMN_ARRAYS[field_type], values)
+            except (TypeError, OverflowError):   # nulls or values that do not fit, keep a list
+                pass
+        return list(values)
+
+    def copy(self):
+        """Return a copy of the store.
+
+        (self) -> ColumnStore
+
+        Every column is copied in one go (a typed column is a single block of memory), no rows are made.
+        The values themselves are shared. Changes made to either store afterwards do not show in the other one.
+        """
+        store = ColumnStore(self.field_types)
+        store.columns = [each[:] for each in self.columns]
+        store.length = self.length
+        return store
+
+    @staticmethod
+    def _as_list(field_type, values):
+        if isinstance(values, array):
+            return [bool(each) for each in values] if field_type == 'bool' else values.tolist()
+        return list(values)
+
+    def _unpack(self, column):
+        """Switch a column from its typed array to a list.
+
+        (self, int) -> list
+        """
+        values = self.columns[column]
+        if isinstance(values, array):
+            values = self._as_list(self.field_types[column], values)
+            self.columns[column] = values
+        return values
+
+    def _fit(self, column, values):
+        """Return values in the form of a column, so that they can be put into it.
+
+        (self, int, object) -> object
+        """
+        if isinstance(self.columns[column], array):
+            return array(self.columns[column].typecode, values)
+        return self._as_list(self.field_types[column], values)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, row):
+        return self.row(row)
+
+    def __iter__(self):
+        for idx in range(self.length):
+            yield self.row(idx)
+
+    def value(self, row, column):
+        """Return a single cell's value.
+
+        (self, int, int) -> object
+        """
+        value = self.columns[column][row]
+        if self.field_types[column] == 'bool' and isinstance(self.columns[column], array):
+            return bool(value)
+        return value
+
+    def row(self, row):
+        """Return a row as a list of values.
+
+        (self, int) -> list
+        """
+        return [self.value(row, idx) for idx in range(len(self.columns))]
+
+    def set_value(self, row, column, value):
+        """Change a single cell's value.
+
+        (self, int, int, object) -> None
+        """
+        try:
+            self.columns[column][row] = value
+        except (TypeError, OverflowError):   # the array cannot hold the value, switch the column to a list
+            self._unpack(column)[row] = value
+
+    def insert(self, row, values):
+        """Insert a row in front of the row at the given index.
+
+        (self, int, list) -> None
+
+        :param values: one value per column
+        """
+        for idx, value in enumerate(values):
+            try:
+                self.columns[idx].insert(row, value)
+            except (TypeError, OverflowError):
+                self._unpack(idx).insert(row, value)
+        self.length += 1
+
+    def append(self, values):
+        """Add a row at the end.
+
+        (self, list) -> None
+        """
+        self.insert(self.length, values)
+
+    def extend(self, columns):
+        """Add rows at the end, given column by column.
+
+        (self, list) -> None
+
+        :param columns: one list of values per column, all of the same length
+
+        Much faster than append() for many rows, the typed columns are extended in one go.
+        """
+        for idx, values in enumerate(columns):
+            try:
+                self.columns[idx].extend(values)
+            except (TypeError, OverflowError):   # the values that went in before the failing one are taken out again
+                del self.columns[idx][self.length:]
+                self._unpack(idx).extend(values)
+        if columns:
+            self.length += len(columns[0])
+
+    def remove(self, row):
+        """Remove a row.
+
+        (self, int) -> None
+        """
+        for each in self.columns:
+            del each[row]
+        self.length -= 1
+
+    def _take_column(self, field_type, values):
+        """Prepare a whole column's values for the store.
+
+        (self, str, object) -> object
+
+        A column taken out of a store (a typed array, or a list for the other types) is kept as it is, no copy
+        is made. Anything else (a list of numbers read from a file) is made into a typed column.
+        """
+        if len(values) != self.length:
+            raise ValueError('the column holds ' + str(len(values)) + ' values, the store has ' +
+                             str(self.length) + ' rows')
+        if isinstance(values, array) or (isinstance(values, list) and field_type not in COLUMN_ARRAYS):
+            return values
+        return self._make_column(field_type, values)
+
+    def take_rows(self, rows):
+        """Return the values of several rows, column by column.
+
+        (self, list) -> list
+
+        :param rows: indices of the rows
+
+        Returns one list of values per column (a typed array for the typed columns), see insert_rows().
+        """
+        taken = list()
+        for each in self.columns:
+            values = [each[row] for row in rows]
+            taken.append(array(each.typecode, values) if isinstance(each, array) else values)
+        return taken
+
+    def set_rows(self, row, columns):
+        """Change the values of consecutive rows.
+
+        (self, int, list) -> list
+
+        :param row: index of the first row
+        :param columns: the new values, column by column (see take_rows())
+
+        Every column is changed with a single slice assignment. Returns the rows' old values, column by column.
+        """
+        old_values = list()
+        for idx, values in enumerate(columns):
+            stop = row + len(values)
+            old_values.append(self.columns[idx][row:stop])
+            try:
+                self.columns[idx][row:stop] = self._fit(idx, values)
+            except (TypeError, OverflowError):
+                self._unpack(idx)[row:stop] = self._as_list(self.field_types[idx], values)
+        return old_values
+
+    def insert_rows(self, rows, columns):
+        """Insert several rows at once.
+
+        (self, list, list) -> None
+
+        :param rows: indices the new rows get, in ascending order
+        :param columns: the new rows' values, column by column (see take_rows())
+
+        Consecutive rows go in with a single slice assignment. Otherwise every column is put together again
+        in one pass, instead of being shifted once per row.
+        """
+        if not rows:
+            return
+        consecutive = rows[-1] - rows[0] + 1 == len(rows)
+        for idx, values in enumerate(columns):
+            try:
+                if consecutive:
+                    self.columns[idx][rows[0]:rows[0]] = self._fit(idx, values)
+                else:
+                    self.columns[idx] = self._merge(self.columns[idx], rows, self._fit(idx, values))
+            except (TypeError, OverflowError):
+                values = self._as_list(self.field_types[idx], values)
+                if consecutive:
+                    self._unpack(idx)[rows[0]:rows[0]] = values
+                else:
+                    self.columns[idx] = self._merge(self._unpack(idx), rows, values)
+        self.length += len(rows)
+
+    @staticmethod
+    def _merge(column, rows, values):
+        merged = column[:0]
+        previous = 0   # the column's values up to it are in merged already
+        for idx, row in enumerate(rows):
+            kept = row - idx   # values of the column that come before the new row
+            if kept > previous:
+                merged += column[previous:kept]
+                previous = kept
+            merged.append(values[idx])
+        merged += column[previous:]
+        return merged
+
+    def remove_rows(self, rows):
+        """Remove several rows at once.
+
+        (self, list) -> None
+
+        :param rows: indices of the rows, in ascending order and without repeats
+
+        Consecutive rows are removed with a single slice deletion. Otherwise every column is put together
+        again from the runs of rows that are kept, in one pass, instead of being shifted once per row.
+        """
+        if not rows:
+            return
+        if rows[-1] - rows[0] + 1 == len(rows):
+            for each in self.columns:
+                del each[rows[0]:rows[-1] + 1]
+        else:
+            kept = list()   # (start, stop) of the runs of rows that are kept
+            start = 0
+            for row in rows:
+                if row > start:
+                    kept.append((start, row))
+                start = row + 1
+            if start < self.length:
+                kept.append((start, self.length))
+            for idx, each in enumerate(self.columns):
+                values = each[:0]
+                for start, stop in kept:
+                    values += each[start:stop]
+                self.columns[idx] = values
+        self.length -= len(rows)
+
+    def insert_column(self, column, field_type, value, values=None):
+        """Insert a column in front of the column at the given index.
+
+        (self, int, str, object, object) -> None
+
+        :param value: the value every row gets in the new column
+        :param values: the column's values instead, one per row (for example a column returned by remove_column())
+        """
+        if values is None:
+            values = self._make_column(field_type, [value])
+            values *= self.length
+        else:
+            values = self._take_column(field_type, values)
+        self.columns.insert(column, values)
+        self.field_types.insert(column, field_type)
+
+    def remove_column(self, column):
+        """Remove a column.
+
+        (self, int) -> object
+
+        Returns the column's values, they can be put back with insert_column().
+        """
+        del self.field_types[column]
+        return self.columns.pop(column)
+
+    def set_column(self, column, field_type, values):
+        """Replace a column's values and type.
+
+        (self, int, str, object) -> object
+
+        :param values: the new values, one per row
+
+        Returns the column's old values.
+        """
+        values = self._take_column(field_type, values)
+        old_values = self.columns[column]
+        self.columns[column] = values
+        self.field_types[column] = field_type
+        return old_values
+
+    def convert_column(self, column, field_type, convert):
+        """Change the type of a column.
+
+        (self, int, str, function) -> None
+
+        :param convert: function that turns one of the column's values into a value of the new type
+        """
+        values = self.columns[column]
+        if self.field_types[column] == 'bool' and isinstance(values, array):
+            values = self._unpack(column)
+        self.columns[column] = self._make_column(field_type, [convert(each) for each in values])
+        self.field_types[column] = field_type
+
+
+def search_words(value):
+    """Split a cell's value into the words SearchIndex indexes and searches for.
+
+    (object) -> list
+
+    The words are lower case unicode, values that are not text have no words. Byte strings (the utf-8 str
+    values of python 2, like the cells edited and the text typed through Gtk) are decoded first.
+    """
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', 'replace')
+    if not isinstance(value, type(u'')):
+        return list()
+    return SEARCH_WORDS.findall(value.lower())
+
+
+class SearchIndex(object):
+    """Prefix index of the words in the text columns of a ColumnStore.
+
+    (list) -> None
+
+    Every word of a 'str' cell points to the rows that hold it, an array of ascending row indices per word.
+    search() finds the words that start with the searched ones with a binary search through each column's
+    sorted words and puts their rows together, the rows themselves are not looked at. Build it with build()
+    and keep it up to date with update() as cells change; rows added or removed shift the indices, the index
+    has to be built again then.
+    """
+
+    def __init__(self, field_types):
+        """Class constructor.
+
+        (self, list) -> None
+
+        :param field_types: a list of the columns' types, an empty index of the 'str' columns is made
+        """
+        self.columns = [idx for idx, each in enumerate(field_types) if each == 'str']   # the indexed columns
+        self.words = dict((idx, dict()) for idx in self.columns)   # word -> rows, of each indexed column
+        self.sorted_words = dict((idx, list()) for idx in self.columns)
+        self.rows = 0   # amount of rows of the store
+
+    @classmethod
+    def build(cls, store):
+        """Index a store.
+
+        (ColumnStore) -> SearchIndex
+
+        Takes a while on large stores, the editor builds it in a thread out of a copy of the store.
+        """
+        index = cls(store.field_types)
+        for column in index.columns:
+            words = index.words[column]
+            for row, value in enumerate(store.columns[column]):
+                for word in set(search_words(value)):
+                    rows = words.get(word)
+                    if rows is None:
+                        rows = words[word] = array('i')
+                    rows.append(row)
+            index.sorted_words[column] = sorted(words)
+        index.rows = len(store)
+        return index
+
+    def update(self, row, column, old_value, new_value):
+        """Take a cell's change into the index.
+
+        (self, int, int, object, object) -> None
+        """
+        if column not in self.words:
+            return
+        words = self.words[column]
+        sorted_words = self.sorted_words[column]
+        old_words, new_words = set(search_words(old_value)), set(search_words(new_value))
+        for word in old_words - new_words:
+            rows = words.get(word)
+            if rows is None:
+                continue
+            idx = bisect.bisect_left(rows, row)
+            if idx < len(rows) and rows[idx] == row:
+                del rows[idx]
+            if not rows:   # the last row that held the word
+                del words[word]
+                del sorted_words[bisect.bisect_left(sorted_words, word)]
+        for word in new_words - old_words:
+            rows = words.get(word)
+            if rows is None:
+                rows = words[word] = array('i')
+                bisect.insort(sorted_words, word)
+            bisect.insort(rows, row)
+
+    def _prefixed(self, column, prefix):
+        """Return the row arrays of the words of a column that start with prefix.
+
+        (self, int, str) -> list
+        """
+        sorted_words = self.sorted_words[column]
+        found = list()
+        idx = bisect.bisect_left(sorted_words, prefix)
+        while idx < len(sorted_words) and sorted_words[idx].startswith(prefix):
+            found.append(self.words[column][sorted_words[idx]])
+            idx += 1
+        return found
+
+    @staticmethod
+    def _holds(rows, row):
+        idx = bisect.bisect_left(rows, row)
+        return idx < len(rows) and rows[idx] == row
+
+    def search(self, text, column=None):
+        """Find the rows that match a search.
+
+        (self, str, int) -> array
+
+        :param text: a row matches if, for every word of the text, it holds a word that starts with it
+        :param column: index of the column to search in, all of the indexed columns are searched if it is None
+
+        Returns the indices of the matching rows in ascending order, or None if the text holds no words.
+        The word that matches the least rows is looked up first, the rows it gives are then checked against
+        the other words. The time taken grows with the amount of matches, not with the amount of rows.
+        """
+        query = set(search_words(text))
+        if not query:
+            return None
+        columns = self.columns if column is None else [each for each in self.columns if each == column]
+        matches = list()   # (amount of rows, row arrays) of each word of the query
+        for word in query:
+            found = [rows for each in columns for rows in self._prefixed(each, word)]
+            matches.append((sum(len(rows) for rows in found), found))
+        matches.sort(key=lambda each: each[0])
+        mask = bytearray(self.rows)   # a byte per row, 1 if the row matches
+        for rows in matches[0][1]:
+            for row in rows:
+                mask[row] = 1
+        candidates = array('i', itertools.compress(itertools.count(), mask))
+        for size, found in matches[1:]:
+            if not candidates:
+                break
+            if len(candidates) * len(found) < size:   # cheaper to look each candidate up in the word's rows
+                candidates = array('i', [row for row in candidates if any(self._holds(rows, row) for rows in found)])
+            else:
+                mask = bytearray(self.rows)
+                for rows in found:
+                    for row in rows:
+                        mask[row] = 1
+                candidates = array('i', [row for row in candidates if mask[row]])
+        return candidates
+
+
+def quote_sql(name):
+    """Quote a table or a column name for sqlite.
+
+    (str) -> str
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _sqlite_create(table, field_names, field_types):
+    """Return the CREATE TABLE statement of a database.
+
+    (str, list, list) -> str
+    """
+    columns = [quote_sql(name) + ' ' + SQLITE_TYPES.get(field_types[idx], 'TEXT')
+               for idx, name in enumerate(field_names)]
+    return 'CREATE TABLE ' + quote_sql(table) + ' (' + ', '.join(columns) + ')'
+
+
+def _sqlite_insert(table, field_names):
+    """Return the INSERT statement of a database.
+
+    (str, list) -> str
+    """
+    return 'INSERT INTO ' + quote_sql(table) + ' VALUES (' + ', '.join('?' * len(field_names)) + ')'
+
+
+def _sqlite_values(rows, field_types):
+    """Prepare rows for sqlite.
+
+    (iterable, list) -> iterable
+
+    sqlite cannot store lists and such, the values of the columns of any other type than SQLITE_TYPES
+    are turned into json text (nulls stay None, they are stored as NULL). The rows are returned as they are
+    if there are no such columns.
+    """
+    json_columns = [idx for idx, each in enumerate(field_types) if each not in SQLITE_TYPES]
+    if not json_columns:
+        return rows
+    return ([None if value is None else json.dumps(value) if idx in json_columns else value
+             for idx, value in enumerate(row)] for row in rows)
+
+
+def _sql_database():
+    """Return the calling thread's in-memory sqlite database of sql(), made on first use.
+
+    (None) -> object
+
+    sqlite connections cannot be shared by threads, so every thread gets its own. The returned object holds
+    the connection, tables (table name -> (path, size, modification time) of the file loaded into that table)
+    and indexes ((table name, column name) of the indexes created by sql()).
+    """
+    if not hasattr(_sql_state, 'connection'):
+        _sql_state.connection = sqlite3.connect(':memory:')
+        _sql_state.tables = dict()
+        _sql_state.indexes = set()
+    return _sql_state
+
+
+def _sql_load_table(database, table, file_name):
+    """Load a file into a table of the in-memory sqlite database, unless it is already loaded and unchanged.
+
+    (object, str, str) -> bool
+
+    :param database: the thread's database, see _sql_database()
+
+    Returns False if the file cannot be loaded.
+    """
+    try:
+        status = os.stat(file_name)
+    except OSError:
+        return False
+    key = (os.path.abspath(file_name), status.st_size, status.st_mtime)
+    if database.tables.get(table) == key:   # loaded before and the file has not changed since
+        return True
+    loaded_data = load_database(file_name)
+    if loaded_data == -1:
+        return False
+    field_names, field_types, data_base = loaded_data
+    connection = database.connection
+    with connection:   # a single transaction for the whole table
+        connection.execute('DROP TABLE IF EXISTS ' + quote_sql(table))   # drops the table's indexes as well
+        connection.execute(_sqlite_create(table, field_names, field_types))
+        connection.executemany(_sqlite_insert(table, field_names), _sqlite_values(data_base, field_types))
+    database.tables[table] = key
+    for each in [each for each in database.indexes if each[0] == table]:
+        database.indexes.discard(each)
+    return True
+
+
+def _sql_compared_columns(query):
+    """Return the names of the columns a query compares in its WHERE and ON conditions or joins with USING.
+
+    (str) -> set
+
+    The string literals are left out first. Only the names next to a comparison (=, <, IN, LIKE, BETWEEN...)
+    count, so the selected, grouped and ordered columns are not indexed.
+    """
+    query = re.sub(r"'(?:[^']|'')*'", "''", query)
+    names = set()
+    for condition, using in SQL_PREDICATES.findall(query):
+        if using:
+            found = re.findall(SQL_NAME, using)
+        else:
+            found = [name for each in SQL_COMPARED for name in each.findall(condition)]
+        for name in found:
+            if name.startswith('"'):
+                names.add(name[1:-1].replace('""', '"'))
+            elif name.upper() not in SQL_KEYWORDS:
+                names.add(name)
+    return names
+
+
+def _sql_index_columns(database, query, tables):
+    """Index the columns that are compared by the WHERE and JOIN clauses of a query.
+
+    (object, str, list) -> None
+
+    The names found by _sql_compared_columns() are matched against the columns of the loaded tables.
+    """
+    names = _sql_compared_columns(query)
+    if not names:
+        return
+    connection = database.connection
+    for table in tables:
+        for row in connection.execute('PRAGMA table_info(' + quote_sql(table) + ')'):
+            column = row[1]
+            if column in names and (table, column) not in database.indexes:
+                index_name = quote_sql('jdf_' + table + '_' + column)
+                with connection:
+                    connection.execute('CREATE INDEX IF NOT EXISTS ' + index_name + ' ON ' +
+                                       quote_sql(table) + ' (' + quote_sql(column) + ')')
+                database.indexes.add((table, column))
+
+
+def _sql_rows(cursor):
+    """Hand out the query results in batches of SQL_FETCH_SIZE.
+
+    (object) -> generator
+    """
+    while True:
+        batch = cursor.fetchmany(SQL_FETCH_SIZE)
+        if not batch:
+            break
+        for row in batch:
+            yield list(row)
+
+
+def sql(query, tables, parameters=()):
+    """Run a SQL query over JDF files.
+
+    (str, dict, tuple) -> tuple
+
+    :param query: the SQL (sqlite) query
+    :param tables: table name -> file name or path of every JDF file used by the query
+    :param parameters: values for the '?' placeholders of the query
+
+    Usage:  names, rows = jdf_lib.sql('SELECT * FROM monsters WHERE Damage > ?', {'monsters': 'monster_base.jdf'}, (1,))
+
+    The files are loaded into an in-memory sqlite database, which is kept between the calls (every thread has
+    its own). A file is loaded again only if it has changed since. The columns compared by the WHERE and JOIN
+    clauses get indexed.
+    Returns (column_names, rows) where rows is a generator of the result rows (lists), or -1 if a file
+    cannot be loaded. bool columns come back as 0/1.
+    """
+    database = _sql_database()
+    for table in tables:
+        if not _sql_load_table(database, table, tables[table]):
+            return -1
+    _sql_index_columns(database, query, tables)
+    cursor = database.connection.execute(query, parameters)
+    column_names = [each[0] for each in cursor.description or ()]
+    return column_names, _sql_rows(cursor)
+
+
+def is_sqlite(file_name):
+    """Check if a file is a sqlite database.
+
+    (str) -> bool
+    """
+    try:
+        with open(file_name, 'rb') as f_handle:
+            return f_handle.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except (IOError, OSError):
+        return False
+
+
+def sqlite_columns(db_path, table):
+    """List the columns of a table of a sqlite database.
+
+    (str, str) -> list
+
+    Returns an empty list if there is no such table, -1 if the file is not a sqlite database.
+    """
+    if not is_sqlite(db_path):
+        return -1
+    connection = sqlite3.connect(db_path)
+    try:
+        return [row[1] for row in connection.execute('PRAGMA table_info(' + quote_sql(table) + ')')]
+    except sqlite3.Error:
+        return -1
+    finally:
+        connection.close()
+
+
+def sqlite_tables(db_path):
+    """List the tables of a sqlite database.
+
+    (str) -> list
+
+    Returns -1 if the file is not a sqlite database.
+    """
+    if not is_sqlite(db_path):
+        return -1
+    connection = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table' "
+                                                     "AND name NOT LIKE 'sqlite_%' ORDER BY rowid")]
+    except sqlite3.Error:
+        return -1
+    finally:
+        connection.close()
+
+
+def save_sqlite(db_path, table, field_names, field_types, data_base, keep_schema=False):
+    """Save database to a table of a sqlite database.
+
+    (str, str, list, list, iterable, bool) -> int
+
+    :param db_path: path to the sqlite database, it is created if it does not exist
+    :param table: name of the table, an existing table of that name is replaced
+    :param field_names: a list of databases' column names
+    :param field_types: a list of databases' column types (str, int, float and bool map to sqlite types,
+    columns of any other type are stored as json text, they are loaded back as str columns holding that text)
+    :param data_base: any iterable of rows
+    :param keep_schema: keep an existing table (its declared types, keys, constraints, indexes and triggers),
+    only its rows are replaced. Raises ValueError if the table's columns are not field_names (see sqlite_columns()).
+
+    The rows are inserted SQLITE_BATCH at a time inside of a single transaction. Nothing is changed if an error
+    occurs. A new database is written with SQLITE_PRAGMAS (no journal file, no syncing to disk), the settings
+    of an existing one are left as they are. Returns the amount of rows saved.
+    """
+    new_database = not os.path.exists(db_path) or os.path.getsize(db_path) == 0
+    connection = sqlite3.connect(db_path)
+    connection.isolation_level = None   # the transaction is handled below
+    try:
+        if new_database:
+            for each in SQLITE_PRAGMAS:
+                connection.execute(each)
+        insert = _sqlite_insert(table, field_names)
+        rows = iter(_sqlite_values(data_base, field_types))
+        count = 0
+        connection.execute('BEGIN')
+        try:
+            columns = [row[1] for row in connection.execute('PRAGMA table_info(' + quote_sql(table) + ')')]
+            if keep_schema and columns:
+                if columns != list(field_names):
+                    raise ValueError('the columns of table ' + table + ' do not match the database')
+                connection.execute('DELETE FROM ' + quote_sql(table))
+            else:
+                connection.execute('DROP TABLE IF EXISTS ' + quote_sql(table))
+                connection.execute(_sqlite_create(table, field_names, field_types))
+            while True:
+                batch = list(islice(rows, SQLITE_BATCH))
+                if not batch:
+                    break
+                connection.executemany(insert, batch)
+                count += len(batch)
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+    finally:
+        connection.close()
+    return count
+
+
+def to_sqlite(jdf_path, db_path, table):
+    """Convert a JDF file to a table of a sqlite database.
+
+    (str, str, str) -> int
+
+    :param jdf_path: path to the JDF file
+    :param db_path: path to the sqlite database, it is created if it does not exist
+    :param table: name of the table, an existing table of that name is replaced
+
+    The rows are streamed from the file (see stream_database() and save_sqlite()).
+    Returns the amount of rows saved or -1 if the JDF file cannot be loaded.
+    """
+    loaded_data = stream_database(jdf_path)
+    if loaded_data == -1:
+        return -1
+    return save_sqlite(db_path, table, loaded_data[0], loaded_data[1], loaded_data[2])
+
+
+def _sqlite_field_type(declared):
+    """Map the declared type of a sqlite column to a JDF type (follows sqlite's type affinity rules).
+
+    (str) -> str
+    """
+    declared = (declared or '').upper()
+    if 'BOOL' in declared:
+        return 'bool'
+    if 'INT' in declared:
+        return 'int'
+    if 'REAL' in declared or 'FLOA' in declared or 'DOUB' in declared:
+        return 'float'
+    return 'str'
+
+
+def _guess_sqlite_type(values):
+    """Guess the JDF type of a query's result column from its values.
+
+    (list) -> str
+    """
+    values = [each for each in values if each is not None]
+    if values and all(isinstance(each, numbers.Integral) for each in values):
+        return 'int'
+    if values and all(isinstance(each, numbers.Real) for each in values):
+        return 'float'
+    return 'str'
+
+
+SQLITE_CONVERTERS = {'str': lambda value: value if isinstance(value, type(u'')) else type(u'')(value),
+                     'int': int, 'float': float, 'bool': bool}
+
+
+def _sqlite_rows(connection, cursor, batch, field_types):
+    """Hand out the rows of a sqlite query, fetched SQLITE_BATCH at a time.
+
+    (object, object, list, list) -> generator
+
+    :param batch: the rows fetched already
+
+    Values are converted to their column's type, nulls stay None and values that cannot be converted
+    are replaced with the type's default. The connection is closed once the rows run out.
+    """
+    converters = [SQLITE_CONVERTERS[each] for each in field_types]
+    defaults = [TYPE_DEFAULTS[each] for each in field_types]
+    try:
+        while batch:
+            for row in batch:
+                values = list()
+                for idx, value in enumerate(row):
+                    try:
+                        values.append(None if value is None else converters[idx](value))
+                    except (TypeError, ValueError):
+                        values.append(defaults[idx])
+                yield values
+            batch = cursor.fetchmany(SQLITE_BATCH)
+    finally:
+        connection.close()
+
+
+def stream_sqlite(db_path, table_or_query=None):
+    """Load a table (or the results of a query) from a sqlite database, one row at a time.
+
+    (str, str) -> tuple
+
+    :param db_path: path to the sqlite database
+    :param table_or_query: name of a table or a SELECT query, the first table is used if it is None
+
+    Returns (field_names, field_types, rows) like stream_database() does, or -1 if the database, the table
+    or the query cannot be read. The column types of a table are mapped from its declared types,
+    those of a query are guessed from its first SQLITE_BATCH rows. List and dict columns saved by save_sqlite()
+    are TEXT columns, they come back as str columns holding json text.
+    """
+    tables = sqlite_tables(db_path)
+    if tables == -1:
+        return -1
+    connection = sqlite3.connect(db_path)
+    try:
+        if table_or_query is None:
+            table_or_query = tables[0]
+        if table_or_query in tables:
+            declared = [row[2] for row in connection.execute('PRAGMA table_info(' + quote_sql(table_or_query) + ')')]
+            cursor = connection.execute('SELECT * FROM ' + quote_sql(table_or_query))
+        else:
+            declared = None
+            cursor = connection.execute(table_or_query)
+        field_names = [each[0] for each in cursor.description]
+        batch = cursor.fetchmany(SQLITE_BATCH)
+        if declared is None:
+            field_types = [_guess_sqlite_type([row[idx] for row in batch]) for idx in range(len(field_names))]
+        else:
+            field_types = [_sqlite_field_type(each) for each in declared]
+    except (sqlite3.Error, IndexError, TypeError):   # no tables, bad query or a query that returns no columns
+        connection.close()
+        return -1
+    return field_names, field_types, _sqlite_rows(connection, cursor, batch, field_types)
+
+
+def load_sqlite(db_path, table_or_query=None):
+    """Load a table (or the results of a query) from a sqlite database.
+
+    (str, str) -> tuple
+
+    Same as stream_sqlite(), but the rows are returned as a list (like load_database() does).
+    """
+    loaded_data = stream_sqlite(db_path, table_or_query)
+    if loaded_data == -1:
+        return -1
+    return loaded_data[0], loaded_data[1], list(loaded_data[2])
+
+
+def from_sqlite(db_path, table_or_query, jdf_path, metadata=True):
+    """Convert a sqlite table (or the results of a query) to a JDF file.
+
+    (str, str, str, bool) -> int
+
+    :param db_path: path to the sqlite database
+    :param table_or_query: name of a table or a SELECT query
+    :param jdf_path: path to the JDF file that will be saved
+    :param metadata: add a metadata record to the JDF file (see inspect())
+
+    The rows are streamed from the database cursor into the file (see stream_sqlite() and DatabaseWriter).
+    Returns the amount of rows saved or -1 if the database cannot be read.
+    """
+    loaded_data = stream_sqlite(db_path, table_or_query)
+    if loaded_data == -1:
+        return -1
+    writer = DatabaseWriter(jdf_path, loaded_data[0], loaded_data[1], metadata=metadata)
+    try:
+        writer.write_rows(loaded_data[2])
+    finally:
+        writer.close()
+    return writer.rows
+
+
+if sys.version_info[0] == 2:   # the python 2 csv module works on utf-8 encoded bytes
+    def _open_csv(file_name, mode):
+        return open(file_name, mode + 'b', WRITE_BUFFER)
+
+    def _csv_text(row):
+        return [each.decode('utf-8') for each in row]
+
+    def _csv_values(row):
+        return [each.encode('utf-8') if isinstance(each, type(u'')) else
+                repr(each) if isinstance(each, float) else each for each in row]
+else:
+    def _open_csv(file_name, mode):
+        return io.open(file_name, mode, buffering=WRITE_BUFFER, encoding='utf-8', newline='')
+
+    def _csv_text(row):
+        return row
+
+    def _csv_values(row):
+        return row
+
+
+def _to_bool(text):
+    """Convert csv text to a bool ('true' or 'false', any case).
+
+    (str) -> bool
+    """
+    text = text.strip().lower()
+    if text not in ('true', 'false'):
+        raise ValueError(text)
+    return text == 'true'
+
+
+CSV_CONVERTERS = {'str': lambda text: text, 'int': int, 'float': float, 'bool': _to_bool}
+
+
+def guess_types(rows, column_count):
+    """Guess the type of every column from a sample of csv rows.
+
+    (list, int) -> list
+
+    :param rows: a list of rows of text values
+    :param column_count: amount of columns
+
+    A column is a bool if all of its values are true/false, otherwise an int, a float or a str,
+    whichever is the first to convert all of its values. Empty values are left out of the guess.
+    """
+    field_types = list()
+    for idx in range(column_count):
+        values = [row[idx] for row in rows if idx < len(row) and row[idx] != '']
+        for field_type in ('bool', 'int', 'float', 'str'):
+            try:
+                for each in values:
+                    CSV_CONVERTERS[field_type](each)
+            except ValueError:
+                continue
+            if values or field_type == 'str':   # a column with no values at all is a str column
+                field_types.append(field_type)
+                break
+    return field_types
+
+
+def _text_to_jdf(jdf_name, field_names, rows, sample_size, metadata, first_line):
+    """Save rows of text values to a JDF file, converted to the column types guessed from the first rows.
+
+    (str, list, iterator, int, bool, int) -> dict
+
+    :param rows: an iterator of rows (lists of text values)
+    :param first_line: line (or row) number of the first row, used in the report
+
+    Shared by csv_to_jdf() and xml_to_jdf(), returns the report described in csv_to_jdf().
+    """
+    sample = list(islice(rows, sample_size))
+    field_types = guess_types(sample, len(field_names))
+    converters = [CSV_CONVERTERS[each] for each in field_types]
+    report = {'rows': 0, 'field_types': field_types, 'failed': 0, 'failures': list(), 'extra_cells': 0,
+              'extra_lines': list()}
+
+    def convert(rows):
+        for row in rows:
+            if len(row) > len(converters):   # the cells past the last column have no column to go into
+                report['extra_cells'] += 1
+                if len(report['extra_lines']) < CSV_REPORT_LIMIT:
+                    report['extra_lines'].append(first_line + report['rows'])
+            values = list()
+            for idx, converter in enumerate(converters):
+                text = row[idx] if idx < len(row) else ''
+                if text == '' and field_types[idx] != 'str':   # a missing value, not a failed one
+                    values.append(None)
+                    continue
+                try:
+                    values.append(converter(text))
+                except ValueError:
+                    values.append(TYPE_DEFAULTS[field_types[idx]])
+                    report['failed'] += 1
+                    if len(report['failures']) < CSV_REPORT_LIMIT:
+                        report['failures'].append((first_line + report['rows'], field_names[idx], text))
+            report['rows'] += 1
+            yield values
+
+    writer = DatabaseWriter(jdf_name, field_names, field_types, metadata=metadata)
+    try:
+        writer.write_rows(convert(sample))
+        writer.write_rows(convert(rows))
+    finally:
+        writer.close()
+    return report
+
+
+def csv_to_jdf(csv_name, jdf_name, sample_size=CSV_SAMPLE_SIZE, delimiter=',', metadata=True):
+    """Convert a csv file to a JDF file.
+
+    (str, str, int, str, bool) -> dict
+
+    :param csv_name: path to the csv file, its first row holds the column names
+    :param jdf_name: path to the JDF file that will be saved
+    :param sample_size: amount of rows used to guess the column types (see guess_types())
+    :param delimiter: the csv delimiter
+    :param metadata: add a metadata record to the JDF file (see inspect())
+
+    The rows are streamed from one file to the other, only the sample is held in memory.
+    Empty values of int, float and bool columns become None (null).
+    Values that fail to convert to their column's type are replaced with the type's default (0, 0.0, '', False).
+    Cells past the last column name are left out.
+    Returns a report: {'rows': rows converted, 'field_types': the guessed types, 'failed': amount of failed
+    values, 'failures': (line, column name, value) of the first CSV_REPORT_LIMIT failed values,
+    'extra_cells': amount of rows that had more cells than column names, 'extra_lines': line of the first
+    CSV_REPORT_LIMIT of them}.
+    Returns -1 if the csv file cannot be read.
+    """
+    try:
+        csv_file = _open_csv(csv_name, 'r')
+    except (IOError, OSError):
+        return -1
+    try:
+        reader = csv.reader(csv_file, delimiter=str(delimiter))
+        try:
+            field_names = _csv_text(next(reader))
+        except StopIteration:
+            return -1
+        # line 1 holds the column names, the rows start at line 2
+        return _text_to_jdf(jdf_name, field_names, (_csv_text(row) for row in reader), sample_size, metadata, 2)
+    finally:
+        csv_file.close()
+
+
+def write_csv(csv_name, field_names, data_base, delimiter=','):
+    """Write a database to a csv file.
+
+    (str, list, iterable, str) -> int
+
+    :param csv_name: path to the csv file that will be saved
+    :param field_names: a list of databases' column names, written as the first row
+    :param data_base: any iterable of rows
+    :param delimiter: the csv delimiter
+
+    The rows are handed to the csv writer CSV_BATCH at a time. Returns the amount of rows written.
+    """
+    csv_file = _open_csv(csv_name, 'w')
+    try:
+        writer = csv.writer(csv_file, delimiter=str(delimiter))
+        writer.writerow(_csv_values(field_names))
+        rows = 0
+        batch = list()
+        for row in data_base:
+            batch.append(_csv_values(row))
+            if len(batch) == CSV_BATCH:
+                writer.writerows(batch)
+                rows += len(batch)
+                batch = list()
+        writer.writerows(batch)
+        rows += len(batch)
+    finally:
+        csv_file.close()
+    return rows
+
+
+def jdf_to_csv(jdf_name, csv_name, delimiter=','):
+    """Convert a JDF file to a csv file.
+
+    (str, str, str) -> int
+
+    :param jdf_name: path to the JDF file
+    :param csv_name: path to the csv file that will be saved
+    :param delimiter: the csv delimiter
+
+    The rows are streamed from one file to the other (see stream_database()).
+    Returns the amount of rows written or -1 if the JDF file cannot be loaded.
+    """
+    loaded_data = stream_database(jdf_name)
+    if loaded_data == -1:
+        return -1
+    return write_csv(csv_name, loaded_data[0], loaded_data[2], delimiter)
+
+
+def xml_tag(name):
+    """Turn a column name into a valid xml element name.
+
+    (str) -> str
+
+    Characters that are not allowed (spaces and such) are replaced with '_', a name that does not start with
+    a letter or '_' gets a '_' in front of it.
+    """
+    tag = XML_INVALID.sub('_', name)
+    if not re.match(r'[^\W\d]', tag, re.UNICODE):
+        tag = '_' + tag
+    return tag
+
+
+def _xml_elements(xml_file, row_tag):
+    """Parse an xml file and yield its row elements.
+
+    (object, str) -> generator
+
+    Every row element is cleared and removed from its parent once it has been handled, so the parsed
+    document never grows past the rows' parents. The file is closed when the generator ends.
+    """
+    parents = list()   # the elements that are open at the current position of the parser
+    try:
+        for event, elem in ElementTree.iterparse(xml_file, events=('start', 'end')):
+            if event == 'start':
+                parents.append(elem)
+                continue
+            parents.pop()
+            if elem.tag == row_tag:
+                yield elem
+                elem.clear()
+                if parents:
+                    parents[-1].remove(elem)
+    finally:
+        xml_file.close()
+
+
+def _xml_values(elem, field_tags):
+    """Read the text values of a row element.
+
+    (object, list) -> list
+
+    A field is read from the first child element of its name, or from the row's attribute of that name.
+    Missing fields are read as ''.
+    """
+    found = dict()
+    for child in elem:
+        if child.tag not in found:
+            found[child.tag] = child.text or ''
+    return [found[tag] if tag in found else elem.get(tag, '') for tag in field_tags]
+
+
+def stream_xml(xml_name, row_tag=XML_ROW_TAG, field_tags=None):
+    """Read the rows of an xml file, one at a time.
+
+    (str, str, list) -> tuple
+
+    :param xml_name: path to the xml file
+    :param row_tag: element name of the rows (at any depth of the document)
+    :param field_tags: element names of the fields (children or attributes of the rows),
+    the children of the first row are used if it is None
+
+    Returns (field_tags, rows) where rows is a generator of lists of text values, or -1 if the file cannot be read
+    or has no rows. The file is parsed with iterparse() and the rows are thrown away once read, so the memory used
+    does not depend on the size of the file. The generator raises ElementTree.ParseError on a malformed file.
+    """
+    try:
+        elements = _xml_elements(open(xml_name, 'rb'), row_tag)
+        first = next(elements)
+    except (IOError, OSError, StopIteration, SyntaxError):   # ParseError is a SyntaxError
+        return -1
+    if field_tags is None:
+        field_tags = list()
+        for child in first:
+            if child.tag not in field_tags:
+                field_tags.append(child.tag)
+    field_tags = list(field_tags)
+
+    def rows():
+        yield _xml_values(first, field_tags)
+        for elem in elements:
+            yield _xml_values(elem, field_tags)
+    return field_tags, rows()
+
+
+def xml_to_jdf(xml_name, jdf_name, row_tag=XML_ROW_TAG, field_tags=None, field_names=None,
+               sample_size=CSV_SAMPLE_SIZE, metadata=True):
+    """Convert an xml file to a JDF file.
+
+    (str, str, str, list, list, int, bool) -> dict
+
+    :param xml_name: path to the xml file
+    :param jdf_name: path to the JDF file that will be saved
+    :param row_tag: element name of the rows
+    :param field_tags: element names of the fields (see stream_xml())
+    :param field_names: column names of the fields, in the order of field_tags (the tags are used if it is None)
+    :param sample_size: amount of rows used to guess the column types (see guess_types())
+    :param metadata: add a metadata record to the JDF file (see inspect())
+
+    Usage:  jdf_lib.xml_to_jdf('feed.xml', 'feed.jdf', row_tag='item', field_tags=['title', 'price'])
+
+    The rows are streamed from one file to the other. Returns the same report as csv_to_jdf() does (the report
+    counts rows instead of lines) or -1 if the xml file cannot be read.
+    """
+    loaded_data = stream_xml(xml_name, row_tag, field_tags)
+    if loaded_data == -1:
+        return -1
+    field_tags, rows = loaded_data
+    if field_names is None:
+        field_names = field_tags
+    return _text_to_jdf(jdf_name, list(field_names), rows, sample_size, metadata, 1)
+
+
+def _xml_text(value):
+    """Turn a value into xml text.
+
+    (object) -> str
+
+    Control characters that xml 1.0 does not allow (not even as character references) are left out,
+    the file could not be read back otherwise.
+    """
+    if value is None:
+        return u''
+    if value is True or value is False:
+        return u'true' if value else u'false'
+    if isinstance(value, float):
+        return type(u'')(repr(value))   # python 2's str() rounds floats
+    if isinstance(value, numbers.Integral):
+        return type(u'')(value)
+    if not isinstance(value, type(u'')):
+        value = json.dumps(value) if not isinstance(value, str) else value.decode('utf-8')
+    return saxutils.escape(XML_ILLEGAL.sub(u'', value), XML_ENTITIES)
+
+
+def write_xml(xml_name, field_names, data_base, root_tag=XML_ROOT_TAG, row_tag=XML_ROW_TAG, field_tags=None):
+    """Write a database to an xml file.
+
+    (str, list, iterable, str, str, list) -> int
+
+    :param xml_name: path to the xml file that will be saved
+    :param field_names: a list of databases' column names
+    :param data_base: any iterable of rows
+    :param root_tag: element name of the document's root
+    :param row_tag: element name of the rows
+    :param field_tags: element names of the fields, made from the column names with xml_tag() if it is None
+
+    Every row is written as a row element holding one element per field, WRITE_BATCH rows at a time.
+    bool values are written as true/false, lists and such as json text. Returns the amount of rows written.
+    The column names themselves are not stored, a name that is not a valid element name ('Monster name')
+    comes back as its tag ('Monster_name') unless xml_to_jdf() is given the field_names.
+    """
+    if field_tags is None:
+        field_tags = [xml_tag(each) for each in field_names]
+    opening = [u'<' + each + u'>' for each in field_tags]
+    closing = [u'</' + each + u'>' for each in field_tags]
+    row_opening = u'<' + row_tag + u'>'
+    row_closing = u'</' + row_tag + u'>\n'
+    rows = 0
+    with io.open(xml_name, 'w', buffering=WRITE_BUFFER, encoding='utf-8') as xml_file:
+        xml_file.write(u'<?xml version="1.0" encoding="utf-8"?>\n<' + root_tag + u'>\n')
+        batch = list()
+        for row in data_base:
+            parts = [row_opening]
+            for idx, value in enumerate(row):
+                parts.append(opening[idx])
+                parts.append(_xml_text(value))
+                parts.append(closing[idx])
+            parts.append(row_closing)
+            batch.append(u''.join(parts))
+            if len(batch) == WRITE_BATCH:
+                xml_file.write(u''.join(batch))
+                rows += len(batch)
+                batch = list()
+        xml_file.write(u''.join(batch) + u'</' + root_tag + u'>\n')
+        rows += len(batch)
+    return rows
+
+
+def jdf_to_xml(jdf_name, xml_name, root_tag=XML_ROOT_TAG, row_tag=XML_ROW_TAG):
+    """Convert a JDF file to an xml file.
+
+    (str, str, str, str) -> int
+
+    :param jdf_name: path to the JDF file
+    :param xml_name: path to the xml file that will be saved
+    :param root_tag: element name of the document's root
+    :param row_tag: element name of the rows
+
+    The rows are streamed from one file to the other (see stream_database() and write_xml()).
+    Returns the amount of rows written or -1 if the JDF file cannot be loaded.
+    """
+    loaded_data = stream_database(jdf_name)
+    if loaded_data == -1:
+        return -1
+    return write_xml(xml_name, loaded_data[0], loaded_data[2], root_tag, row_tag)
+
+
+def _jsonl_header(field_names, field_types):
+    """Return the header line of a JSONL file.
+
+    (list, list) -> str
+    """
+    return json.dumps({JSONL_KEY: 'JSONL' + JDF_VERSION, 'field_names': field_names, 'field_types': field_types},
+                      sort_keys=True) + '\n'
+
+
+def _jsonl_lines(rows):
+    """Serialize rows into JSONL lines, WRITE_BATCH rows at a time.
+
+    (iterable) -> generator
+
+    Yields (text, amount of rows) of every batch, the text holds whole lines only.
+    """
+    batch = list()
+    for row in rows:
+        batch.append(json.dumps(row))
+        if len(batch) == WRITE_BATCH:
+            yield '\n'.join(batch) + '\n', len(batch)
+            batch = list()
+    if batch:
+        yield '\n'.join(batch) + '\n', len(batch)
+
+
+def save_jsonl(file_name, field_names, field_types, data_base):
+    """Save database to a JSONL (newline delimited json) file.
+
+    (str, list, list, iterable) -> int
+
+    :param file_name: file name or path to the file that will be saved
+    :param field_names: a list of databases' column names
+    :param field_types: a list of databases' column types
+    :param data_base: any iterable of rows
+
+    The first line holds {"field_names": [...], "field_types": [...], "jdf": "JSONL1"}, every following line
+    holds one row (a json list). Unlike a JDF file such a file can be processed line by line, split between
+    workers and appended to (see append_jsonl()). Returns the amount of rows written.
+    """
+    rows = 0
+    with open(file_name, 'w') as f_handle:
+        f_handle.write(_jsonl_header(field_names, field_types))
+        for text, count in _jsonl_lines(data_base):
+            f_handle.write(text)
+            rows += count
+    return rows
+
+
+def append_jsonl(file_name, data_base):
+    """Append rows to a JSONL file.
+
+    (str, iterable) -> int
+
+    :param file_name: path to an existing JSONL file (see save_jsonl())
+    :param data_base: any iterable of rows
+
+    Only whole lines are written and every batch is flushed, so a reader that follows the file (tail -f)
+    never sees half of a row for long. Returns the amount of rows written or -1 if the file is not a JSONL file.
+    """
+    if _read_jsonl_header(file_name) == -1:
+        return -1
+    rows = 0
+    with open(file_name, 'a') as f_handle:
+        for text, count in _jsonl_lines(data_base):
+            f_handle.write(text)
+            f_handle.flush()
+            rows += count
+    return rows
+
+
+def _read_jsonl_header(file_name):
+    """Read the header line of a JSONL file.
+
+    (str) -> tuple
+
+    Returns (field_names, field_types, size of the header line in bytes) or -1 if the file is not a JSONL file.
+    Reads at most JSONL_HEADER_SIZE bytes, and only a single one of a file that does not start with '{'.
+    """
+    try:
+        with open(file_name, 'rb') as f_handle:
+            line = f_handle.read(1)
+            if line != b'{':
+                raise ValueError('not a JSONL file')
+            line += f_handle.readline(JSONL_HEADER_SIZE)
+        header = json.loads(line.decode('utf-8'))
+        if header[JSONL_KEY] != 'JSONL' + JDF_VERSION:
+            raise ValueError('not a JSONL file')
+        return header['field_names'], header['field_types'], len(line)
+    except Exception:
+        return -1
+
+
+def is_jsonl(file_name):
+    """Check if a file is a JSONL file.
+
+    (str) -> bool
+    """
+    return _read_jsonl_header(file_name) != -1
+
+
+def _decode_jsonl(data, complete=True):
+    """Decode the lines of a piece of a JSONL file.
+
+    (bytes, bool) -> list
+
+    :param complete: False if the last line may still be being written, it is skipped if it has no line break
+
+    Empty lines are skipped. The lines are joined into a single json list, which is decoded a lot faster
+    than each line on its own.
+    """
+    lines = data.split(b'\n')
+    if not complete:
+        lines[-1] = b''
+    return json.loads((b'[' + b','.join(each for each in lines if each.strip()) + b']').decode('utf-8'))
+
+
+def _load_jsonl_part(task):
+    """Decode a part of a JSONL file (runs inside of a worker process of load_jsonl()).
+
+    (tuple) -> list
+
+    :param task: (file name, first byte, end byte), the part starts and ends at line boundaries
+    """
+    file_name, start, end = task
+    with open(file_name, 'rb') as f_handle:
+        f_handle.seek(start)
+        return _decode_jsonl(f_handle.read(end - start))
+
+
+def _jsonl_parts(file_name, start, end, parts):
+    """Split a JSONL file into parts that start and end at line boundaries.
+
+    (str, int, int, int) -> list
+
+    Returns a list of (file name, first byte, end byte).
+    """
+    bounds = [start]
+    with open(file_name, 'rb') as f_handle:
+        for idx in range(1, parts):
+            position = max(start + (end - start) * idx // parts, bounds[-1])
+            f_handle.seek(position)
+            f_handle.readline()   # move on to the start of the next line
+            bounds.append(min(f_handle.tell(), end))
+    bounds.append(end)
+    return [(file_name, bounds[idx], bounds[idx + 1]) for idx in range(parts) if bounds[idx] < bounds[idx + 1]]
+
+
+def load_jsonl(file_name, processes=None):
+    """Load database from a JSONL file.
+
+    (str, int) -> tuple
+
+    :param file_name: file name or path to the file that will be loaded
+    :param processes: amount of worker processes, the amount of cpus if it is None
+
+    Returns (field_names, field_types, data_base) like load_database() does, or -1 on a load error.
+    Files of JSONL_PARALLEL_SIZE and above are split at line boundaries and the parts are decoded by
+    a process pool (a program that calls it on Windows has to be guarded with if __name__ == '__main__').
+    The pool forks the process on linux and mac, a program that runs threads (like the editor) has to pass
+    processes=1 or use stream_jsonl() instead. A last line without a line break is loaded as well.
+    """
+    header = _read_jsonl_header(file_name)
+    if header == -1:
+        return -1
+    field_names, field_types, start = header
+    try:
+        end = os.path.getsize(file_name)
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if end - start < JSONL_PARALLEL_SIZE or processes < 2:
+            return field_names, field_types, _load_jsonl_part((file_name, start, end))
+        pool = multiprocessing.Pool(processes)
+        try:
+            parts = pool.map(_load_jsonl_part, _jsonl_parts(file_name, start, end,
+                                                            processes * JSONL_CHUNKS_PER_PROCESS))
+        finally:
+            pool.close()
+            pool.join()
+    except (IOError, OSError, ValueError):
+        return -1
+    data_base = list()
+    for each in parts:
+        data_base.extend(each)
+    return field_names, field_types, data_base
+
+
+def stream_jsonl(file_name, follow=False):
+    """Load database from a JSONL file, one row at a time.
+
+    (str, bool) -> tuple
+
+    :param file_name: file name or path to the file that will be loaded
+    :param follow: keep reading the rows that are appended to the file (see append_jsonl()) instead of stopping
+    at the end of the file, like tail -f does. The generator then never ends on its own.
+
+    Returns (field_names, field_types, rows) like stream_database() does, or -1 if the file is not a JSONL file.
+    A last line without a line break is treated as a row that is still being written: it is loaded once it is
+    finished (follow=True) or once the file ends (follow=False).
+    """
+    header = _read_jsonl_header(file_name)
+    if header == -1:
+        return -1
+
+    def rows():
+        with open(file_name, 'rb') as f_handle:
+            f_handle.seek(header[2])
+            partial = b''
+            while True:
+                block = f_handle.read(READ_BLOCK)
+                if not block:
+                    if not follow:
+                        break
+                    time.sleep(JSONL_FOLLOW_DELAY)
+                    continue
+                lines = partial + block
+                cut = lines.rfind(b'\n') + 1
+                partial = lines[cut:]   # the rest of this line is in the next block
+                for each in _decode_jsonl(lines[:cut]):
+                    yield each
+            for each in _decode_jsonl(partial):
+                yield each
+    return header[0], header[1], rows()
+
+
+def jdf_to_jsonl(jdf_name, jsonl_name):
+    """Convert a JDF file to a JSONL file.
+
+    (str, str) -> int
+
+    The rows are streamed from one file to the other. Returns the amount of rows written or -1 if the JDF file
+    cannot be loaded.
+    """
+    loaded_data = stream_database(jdf_name)
+    if loaded_data == -1:
+        return -1
+    return save_jsonl(jsonl_name, loaded_data[0], loaded_data[1], loaded_data[2])
+
+
+def jsonl_to_jdf(jsonl_name, jdf_name, metadata=True):
+    """Convert a JSONL file to a JDF file.
+
+    (str, str, bool) -> int
+
+    The rows are streamed from one file to the other. Returns the amount of rows written or -1 if the JSONL file
+    cannot be loaded.
+    """
+    loaded_data = stream_jsonl(jsonl_name)
+    if loaded_data == -1:
+        return -1
+    writer = DatabaseWriter(jdf_name, loaded_data[0], loaded_data[1], metadata=metadata)
+    try:
+        writer.write_rows(loaded_data[2])
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def _series(pandas, values, field_type):
+    """Make a pandas Series of a column's values with the dtype of the column's type.
+
+    (module, list, str) -> object
+    """
+    if None in values and field_type in PANDAS_NULL_DTYPES:   # numpy's int and bool cannot hold nulls
+        return pandas.Series(values, dtype=PANDAS_NULL_DTYPES[field_type])
+    return pandas.Series(values, dtype=PANDAS_DTYPES.get(field_type, 'object'))
+
+
+def _dataframe(pandas, field_names, field_types, selected, rows, first_row=0):
+    """Make a DataFrame out of rows.
+
+    (module, list, list, list, iterable, int) -> object
+
+    :param selected: indices of the columns that go into the DataFrame
+    :param first_row: index of the first row (the chunks of to_dataframe() continue each other's index)
+
+    The values are gathered column by column, the rows are never copied as a whole.
+    """
+    columns = [list() for each in selected]
+    for row in rows:
+        for column, idx in zip(columns, selected):
+            column.append(row[idx])
+    data_frame = pandas.DataFrame(dict((field_names[idx], _series(pandas, columns[pos], field_types[idx]))
+                                       for pos, idx in enumerate(selected)),
+                                  columns=[field_names[idx] for idx in selected])
+    if first_row:
+        data_frame.index = pandas.RangeIndex(first_row, first_row + len(data_frame))
+    return data_frame
+
+
+def to_dataframe(file_name, columns=None, chunksize=None):
+    """Load database from a file into a pandas DataFrame.
+
+    (str, list, int) -> object
+
+    :param file_name: file name or path to the file that will be loaded
+    :param columns: names of the columns to load, all of them if it is None
+    :param chunksize: when set, a generator of DataFrames of up to chunksize rows is returned instead
+
+    The dtypes are set from the column types: int -> int64, float -> float64, bool -> bool, anything else -> object.
+    int and bool columns that hold nulls become Int64 and boolean. The rows are streamed from the file
+    (see stream_database()), so with chunksize only a chunk is held in memory at a time.
+    Returns -1 if the file cannot be loaded, raises KeyError for an unknown column and ImportError without pandas.
+    """
+    import pandas
+    loaded_data = stream_database(file_name)
+    if loaded_data == -1:
+        return -1
+    field_names, field_types, rows = loaded_data
+    if columns is None:
+        selected = list(range(len(field_names)))
+    else:
+        selected = list()
+        for each in columns:
+            if each not in field_names:
+                raise KeyError(each)
+            selected.append(field_names.index(each))
+    if chunksize is None:
+        return _dataframe(pandas, field_names, field_types, selected, rows)
+
+    def chunks():
+        first_row = 0
+        while True:
+            chunk = list(islice(rows, chunksize))
+            if not chunk:
+                break
+            yield _dataframe(pandas, field_names, field_types, selected, chunk, first_row)
+            first_row += len(chunk)
+    return chunks()
+
+
+def _dataframe_field_type(series):
+    """Pick the column type of a pandas Series.
+
+    (object) -> str
+
+    Numbers and bools keep their types, an object column is a str column if it holds text only, a list column
+    if it holds lists only. Anything else (dates and such) is stored as text.
+    """
+    if series.dtype.kind in 'iu':
+        return 'int'
+    if series.dtype.kind == 'f':
+        return 'float'
+    if series.dtype.kind == 'b':
+        return 'bool'
+    values = series.dropna()
+    text = type(u'')
+    if all(isinstance(each, (text, str)) for each in values):
+        return 'str'
+    if all(isinstance(each, list) for each in values):
+        return 'list'
+    return 'str'
+
+
+def _dataframe_values(series, field_type):
+    """Turn a part of a pandas Series into a list of python values (nulls become None).
+
+    (object, str) -> list
+    """
+    if not series.hasnans:
+        values = series.tolist()
+    else:
+        values = series.astype(object).where(series.notna(), None).tolist()
+    if field_type == 'str' and series.dtype.kind not in 'OSU':   # dates and such
+        values = [None if value is None else type(u'')(value) for value in values]
+    elif field_type == 'str':
+        values = [value if value is None or isinstance(value, type(u'')) else type(u'')(value) for value in values]
+    return values
+
+
+def from_dataframe(data_frame, file_name, metadata=True):
+    """Save a pandas DataFrame to a JDF file.
+
+    (object, str, bool) -> int
+
+    :param data_frame: the DataFrame, the index is not saved (reset_index() keeps it as a column)
+    :param file_name: file name or path to the file that will be saved
+    :param metadata: add a metadata record to the file (see inspect())
+
+    The column types are picked from the dtypes (see _dataframe_field_type()). The DataFrame is converted
+    column by column, PANDAS_WRITE_ROWS rows at a time, and the rows are handed to DatabaseWriter as tuples,
+    so no list is made per row. Returns the amount of rows written.
+    """
+    field_names = [type(u'')(each) for each in data_frame.columns]
+    field_types = [_dataframe_field_type(data_frame.iloc[:, idx]) for idx in range(len(field_names))]
+    writer = DatabaseWriter(file_name, field_names, field_types, metadata=metadata)
+    try:
+        for start in range(0, len(data_frame), PANDAS_WRITE_ROWS):
+            part = data_frame.iloc[start:start + PANDAS_WRITE_ROWS]
+            columns = [_dataframe_values(part.iloc[:, idx], field_types[idx]) for idx in range(len(field_names))]
+            writer.write_rows(zip(*columns))
+    finally:
+        writer.close()
+    return writer.rows
+
+
+try:   # asyncio interface, available as jdf_lib.aio (Python 3 only)
+    import jdf_aio as aio
+except (ImportError, SyntaxError):
+    aio = None
+
+try:   # shared memory tables, available as jdf_lib.shm (Python 3.8+)
+    import jdf_shm as shm
+except (ImportError, SyntaxError):
+    shm = None
+
+
+def _import_arrow():
+    """Import the Arrow IPC and Parquet module.
+
+    (None) -> module
+
+    Returns None if the pyarrow package is not installed.
+    """
+    try:
+        import jdf_arrow
+    except (ImportError, SyntaxError):
+        return None
+    return jdf_arrow
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        """Make the module attributes that are imported on first use.
+
+        (str) -> object
+
+        jdf_lib.arrow (Arrow IPC and Parquet files, needs the pyarrow package) is imported the first time it is
+        used, importing pyarrow takes longer than loading the rest of the library. It is None without pyarrow.
+        """
+        if name == 'arrow':
+            global arrow
+            arrow = _import_arrow()
+            return arrow
+        raise AttributeError("module 'jdf_lib' has no attribute " + repr(name))
+else:   # no module __getattr__ before python 3.7, imported straight away
+    arrow = _import_arrow()
+
 if __name__ == '__main__':
     # stuff = load_database('Untitled.jdf')
     # if stuff == -1:
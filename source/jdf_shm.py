@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# coding=utf-8
+# -----------------------------------------------------------------------------
+# Name:        jdf_shm.py
+# Purpose:     Shared memory tables of the jdf library
+# Author:      Damian Chrzanowski
+# Created:     19/10/26
+# Modified:    19/10/26
+# Copyright:   pjdamian.chrzanowski@gmail.com
+# License:     GNU Public License v3
+# Version:     1.0
+# Revision:    N/A
+# -----------------------------------------------------------------------------
+# jdf_shm, publishes loaded databases into shared memory (available as jdf_lib.shm)
+# Copyright (C) 2016 Damian Chrzanowski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# --------------------------------------------
+# Layout of a shared memory block:
+#   8 bytes    - length of the json header (little endian)
+#   header     - json: field names, field types, amount of rows, the location of every column's buffers
+#                and the process id of the publisher's resource tracker
+#   buffers    - one per column, each starts at an 8 byte boundary:
+#                int   -> int64 values          float -> float64 values         bool -> uint8 values
+#                str   -> int64 offsets (rows + 1) into a utf-8 string heap that follows them
+#                other -> same as str, the heap holds json encoded values
+#                a column that holds nulls (None) also gets a uint8 null mask (1 = null)
+import json
+import struct
+import sys
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+import jdf_lib
+
+NUMBER_FORMATS = {'int': 'q', 'float': 'd', 'bool': 'B'}   # memoryview formats of the numeric column types
+NUMBER_DEFAULTS = {'int': 0, 'float': 0.0, 'bool': False}   # stored in place of a null
+
+
+def _align(offset):
+    """Round an offset up to the next 8 byte boundary.
+
+    (int) -> int
+    """
+    return (offset + 7) & ~7
+
+
+def _column_buffers(field_type, values):
+    """Encode a column's values.
+
+    (str, list) -> tuple
+
+    Returns (kind, data, heap, nulls). data and heap are bytes (heap is empty for the numeric kinds),
+    nulls is a bytes mask or None if the column has no null values.
+    """
+    nulls = None
+    if None in values:
+        nulls = bytes(bytearray(1 if value is None else 0 for value in values))
+    if field_type in NUMBER_FORMATS:
+        default = NUMBER_DEFAULTS[field_type]
+        if nulls is not None:
+            values = [default if value is None else value for value in values]
+        return field_type, array(NUMBER_FORMATS[field_type], values).tobytes(), b'', nulls
+    if field_type == 'str':
+        kind = 'str'
+        encoded = [b'' if value is None else value.encode('utf-8') for value in values]
+    else:   # any other type of column is kept as json text
+        kind = 'json'
+        encoded = [b'' if value is None else json.dumps(value).encode('utf-8') for value in values]
+    offsets = array('q', [0])
+    position = 0
+    for each in encoded:
+        position += len(each)
+        offsets.append(position)
+    return kind, offsets.tobytes(), b''.join(encoded), nulls
+
+
+def publish_table(field_names, field_types, data_base, name=None):
+    """Publish a database into shared memory.
+
+    (list, list, list, str) -> object
+
+    :param field_names: a list of databases' column names
+    :param field_types: a list of databases' column types
+    :param data_base: a list containing the actual database contents
+    :param name: name of the shared memory block, a random name is picked if it is None
+
+    Returns the multiprocessing.shared_memory.SharedMemory object that holds the table.
+    Other processes attach to it with attach_table(shm.name). The publishing process owns the block:
+    once the workers are done with it call shm.close() and shm.unlink().
+    """
+    columns = [_column_buffers(field_type, [row[idx] for row in data_base])
+               for idx, field_type in enumerate(field_types)]
+    return publish_columns(field_names, field_types, len(data_base), columns, name=name)
+
+
+def publish_columns(field_names, field_types, rows, columns, name=None):
+    """Publish columns that are already encoded into shared memory.
+
+    (list, list, int, list, str) -> object
+
+    :param rows: amount of rows
+    :param columns: (kind, data, heap, nulls) of every column, laid out as described at the top of this module.
+    data, heap and nulls can be any bytes-like objects, they are copied into the shared memory as they are.
+
+    Same as publish_table(), used by the converters of other columnar formats (see jdf_arrow.publish_arrow()).
+    """
+    layout = list()
+    buffers = list()
+    position = 0   # offsets are relative to the start of the buffers area
+    for kind, data, heap, nulls in columns:
+        data, heap = memoryview(data).cast('B'), memoryview(heap).cast('B')
+        column = {'kind': kind, 'data': position, 'data_size': len(data), 'heap': -1, 'heap_size': len(heap),
+                  'nulls': -1}
+        buffers.append((position, data))
+        position = _align(position + len(data))
+        if kind not in NUMBER_FORMATS:
+            column['heap'] = position
+            buffers.append((position, heap))
+            position = _align(position + len(heap))
+        if nulls is not None:
+            nulls = memoryview(nulls).cast('B')
+            column['nulls'] = position
+            buffers.append((position, nulls))
+            position = _align(position + len(nulls))
+        layout.append(column)
+    header = json.dumps({'field_names': field_names, 'field_types': field_types, 'rows': rows,
+                         'columns': layout, 'tracker': _tracker_pid()}).encode('utf-8')
+    start = _align(8 + len(header))   # the buffers area starts after the header
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(start + position, 1))
+    shm.buf[:8] = struct.pack('<Q', len(header))
+    shm.buf[8:8 + len(header)] = header
+    for offset, data in buffers:
+        shm.buf[start + offset:start + offset + len(data)] = data
+    return shm
+
+
+def publish_database(file_name, name=None):
+    """Load a database from a file and publish it into shared memory.
+
+    (str, str) -> object
+
+    Same as publish_table(), returns -1 if the file cannot be loaded.
+    """
+    loaded_data = jdf_lib.load_database(file_name)
+    if loaded_data == -1:
+        return -1
+    return publish_table(loaded_data[0], loaded_data[1], loaded_data[2], name=name)
+
+
+def _tracker_pid():
+    """Return the process id of the resource tracker this process reports its shared memory blocks to.
+
+    (None) -> int
+
+    Returns None on windows, where shared memory blocks are not tracked, and if the process id cannot be found.
+    The tracker has no public api for it, the private resource_tracker._resource_tracker._pid is read
+    (checked against CPython 3.8 to 3.13), so its absence in another version is not an error.
+    """
+    if sys.platform == 'win32':
+        return None
+    resource_tracker.ensure_running()
+    return getattr(getattr(resource_tracker, '_resource_tracker', None), '_pid', None)
+
+
+def attach_table(name):
+    """Attach to a table published with publish_table().
+
+    (str) -> SharedTable
+
+    The block is attached without taking over its ownership, the resource tracker would otherwise remove it
+    once the attached (worker) process exits. Before python 3.13 attaching always registers the block, it is
+    unregistered again if this process reports to another resource tracker than the publisher does
+    (processes started by multiprocessing share their parent's tracker, the block must stay registered there).
+    If either tracker is unknown (see _tracker_pid()) the block is unregistered, the publisher's block is then
+    never removed by the attached process' tracker.
+    """
+    if sys.version_info >= (3, 13):
+        return SharedTable(shared_memory.SharedMemory(name=name, track=False))
+    table = SharedTable(shared_memory.SharedMemory(name=name))
+    if sys.platform != 'win32':
+        tracker = _tracker_pid()
+        if tracker is None or table.tracker is None or table.tracker != tracker:
+            resource_tracker.unregister(table.shm._name, 'shared_memory')
+    return table
+
+
+class SharedTable(object):
+    """Read only handle of a table that lives in shared memory.
+
+    (object) -> None
+
+    Behaves like the data_base list returned by jdf_lib.load_database(): len(table), table[row][column]
+    and iteration over the rows. The rows are decoded on access, nothing is copied out of the shared memory
+    until a value is asked for. column() gives zero-copy access to whole numeric columns.
+    """
+
+    def __init__(self, shm):
+        """Class constructor.
+
+        (self, object) -> None
+
+        :param shm: the multiprocessing.shared_memory.SharedMemory object holding the table
+        """
+        self.shm = shm
+        buf = shm.buf.toreadonly()
+        header_size = struct.unpack('<Q', bytes(buf[:8]))[0]
+        header = json.loads(bytes(buf[8:8 + header_size]).decode('utf-8'))
+        self.field_names = header['field_names']
+        self.field_types = header['field_types']
+        self.rows = header['rows']
+        self.tracker = header.get('tracker')   # resource tracker of the publisher, see attach_table()
+        start = _align(8 + header_size)
+        self.columns = list()   # (kind, data view, heap view, null mask view) of every column
+        for each in header['columns']:
+            data = buf[start + each['data']:start + each['data'] + each['data_size']]
+            data = data.cast(NUMBER_FORMATS.get(each['kind'], 'q'))
+            heap = None
+            nulls = None
+            if each['heap'] != -1:
+                heap = buf[start + each['heap']:start + each['heap'] + each['heap_size']]
+            if each['nulls'] != -1:
+                nulls = buf[start + each['nulls']:start + each['nulls'] + self.rows]
+            self.columns.append((each['kind'], data, heap, nulls))
+        self.buf = buf
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        """Return a row (or a list of rows for a slice) as a list of values.
+
+        (self, int) -> list
+        """
+        if isinstance(row, slice):
+            return [self[idx] for idx in range(*row.indices(self.rows))]
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError('row index out of range')
+        return [self.value(row, idx) for idx in range(len(self.columns))]
+
+    def __iter__(self):
+        for row in range(self.rows):
+            yield self[row]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def value(self, row, column):
+        """Return a single cell's value.
+
+        (self, int, int) -> object
+        """
+        kind, data, heap, nulls = self.columns[column]
+        if nulls is not None and nulls[row]:
+            return None
+        if kind == 'bool':
+            return bool(data[row])
+        if kind in NUMBER_FORMATS:
+            return data[row]
+        text = bytes(heap[data[row]:data[row + 1]]).decode('utf-8')
+        if kind == 'json':
+            return json.loads(text)
+        return text
+
+    def column(self, column):
+        """Return a whole column.
+
+        (self, int or str) -> memoryview or list
+
+        :param column: index or name of the column
+
+        int, float and bool columns are returned as read only memoryviews straight into the shared memory
+        (nulls read as 0, see null_mask()). Other columns are decoded into a list.
+        """
+        if not isinstance(column, int):
+            column = self.field_names.index(column)
+        kind, data, heap, nulls = self.columns[column]
+        if kind in NUMBER_FORMATS:
+            return data
+        return [self.value(row, column) for row in range(self.rows)]
+
+    def null_mask(self, column):
+        """Return a column's null mask (1 = null) or None if the column has no nulls.
+
+        (self, int or str) -> memoryview
+        """
+        if not isinstance(column, int):
+            column = self.field_names.index(column)
+        return self.columns[column][3]
+
+    def close(self):
+        """Detach from the shared memory.
+
+        (self) -> None
+
+        Every memoryview handed out by column() or null_mask() has to be released before closing.
+        """
+        for kind, data, heap, nulls in self.columns:
+            data.release()
+            if heap is not None:
+                heap.release()
+            if nulls is not None:
+                nulls.release()
+        self.columns = list()
+        self.buf.release()
+        self.shm.close()
@@ -0,0 +1,10 @@
+# coding=utf-8
+"""Shared setup of the jdf_lib and JDFeditor tests.
+
+The modules live in source/ and import each other by name (the way jdf_editor.py is run),
+so that directory is put on the import path.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source'))
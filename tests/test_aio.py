@@ -0,0 +1,72 @@
+# coding=utf-8
+"""Tests of the asyncio interface (jdf_aio, python 3 only)."""
+import threading
+import time
+
+import pytest
+
+import jdf_lib
+
+if jdf_lib.aio is None:
+    pytest.skip('the asyncio interface needs python 3', allow_module_level=True)
+import asyncio   # noqa: E402
+
+NAMES = ['Monster name', 'Damage']
+TYPES = ['str', 'int']
+ROWS = [[u'Monster ' + str(idx), idx] for idx in range(25)]
+
+
+def test_save_load(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+
+    async def main():
+        await jdf_lib.aio.save_database(path, NAMES, TYPES, ROWS, metadata=True)
+        return await jdf_lib.aio.load_database(path)
+    assert asyncio.run(main()) == (NAMES, TYPES, ROWS)
+    assert jdf_lib.inspect(path)['rows'] == len(ROWS)
+    assert asyncio.run(jdf_lib.aio.load_database(str(tmp_path / 'missing.jdf'))) == -1
+
+
+def test_iter_rows(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+
+    async def main(stop=None):
+        rows = list()
+        async for row in jdf_lib.aio.iter_rows(path, chunk_size=4):
+            rows.append(row)
+            if len(rows) == stop:
+                break
+        return rows
+    assert asyncio.run(main()) == ROWS
+    assert asyncio.run(main(stop=5)) == ROWS[:5]
+    with pytest.raises(IOError):
+        asyncio.run(jdf_lib.aio.iter_rows(str(tmp_path / 'missing.jdf')).__anext__())
+
+
+def test_cancelled_large_load_keeps_its_slot(tmp_path, monkeypatch):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+    monkeypatch.setattr(jdf_lib.aio, 'LARGE_FILE_SIZE', 0)   # every file is a large one
+    monkeypatch.setattr(jdf_lib.aio, 'MAX_LARGE_LOADS', 1)
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+    load = jdf_lib.load_database
+
+    def slow_load(file_name):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.2)
+        with lock:
+            state['running'] -= 1
+        return load(file_name)
+    monkeypatch.setattr(jdf_lib, 'load_database', slow_load)
+
+    async def main():
+        first = asyncio.ensure_future(jdf_lib.aio.load_database(path))
+        await asyncio.sleep(0.05)
+        first.cancel()   # its thread goes on parsing the file
+        return await jdf_lib.aio.load_database(path)
+    assert asyncio.run(main()) == (NAMES, TYPES, ROWS)
+    assert state['peak'] == 1
@@ -0,0 +1,69 @@
+# coding=utf-8
+"""Tests of the Arrow IPC and Parquet interchange (jdf_arrow, needs pyarrow)."""
+import pytest
+
+import jdf_lib
+
+pytest.importorskip('pyarrow')
+arrow = jdf_lib.arrow
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss', 'Loot']
+TYPES = ['str', 'int', 'float', 'bool', 'list']
+ROWS = [[u'Goblin', 2, 1.5, False, [u'gold', 1]],
+        [u'Żółw', None, None, None, None],
+        [u'Orc', -3, 0.25, True, {u'silver': 2}]]
+
+
+def test_arrow_round_trip(tmp_path):
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    arrow_path = str(tmp_path / 'monsters.arrow')
+    back_path = str(tmp_path / 'back.jdf')
+    jdf_lib.save_database(jdf_path, NAMES, TYPES, ROWS)
+    assert arrow.to_arrow(jdf_path, arrow_path, batch_size=2) == len(ROWS)
+    assert arrow.is_arrow(arrow_path) and not arrow.is_parquet(arrow_path)
+    assert arrow.from_arrow(arrow_path, back_path) == len(ROWS)
+    assert jdf_lib.load_database(back_path) == (NAMES, TYPES, ROWS)
+    assert arrow.load_arrow(arrow_path) == (NAMES, TYPES, ROWS)
+
+
+def test_parquet_round_trip(tmp_path):
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    parquet_path = str(tmp_path / 'monsters.parquet')
+    back_path = str(tmp_path / 'back.jdf')
+    jdf_lib.save_database(jdf_path, NAMES, TYPES, ROWS)
+    assert arrow.to_parquet(jdf_path, parquet_path, batch_size=2) == len(ROWS)
+    assert arrow.is_parquet(parquet_path) and not arrow.is_arrow(parquet_path)
+    assert arrow.from_parquet(parquet_path, back_path) == len(ROWS)
+    assert jdf_lib.load_database(back_path) == (NAMES, TYPES, ROWS)
+    arrow.save_parquet(parquet_path, NAMES, TYPES, ROWS)
+    assert arrow.load_parquet(parquet_path) == (NAMES, TYPES, ROWS)
+
+
+def test_parquet_of_another_program(tmp_path):
+    pa = pytest.importorskip('pyarrow')
+    parquet = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'other.parquet')
+    parquet.write_table(pa.table({'n': pa.array([1, None], pa.int32()), 'x': [0.5, 1.5], 's': ['a', None]}), path)
+    assert arrow.load_parquet(path) == (['n', 'x', 's'], ['int', 'float', 'str'], [[1, 0.5, u'a'], [None, 1.5, None]])
+
+
+def test_shared_memory_arrow(tmp_path):
+    jdf_shm = pytest.importorskip('jdf_shm')
+    shm = jdf_shm.publish_table(NAMES[:4], TYPES[:4], [row[:4] for row in ROWS])
+    try:
+        with jdf_shm.attach_table(shm.name) as table:
+            arrow_table = arrow.table_from_shared(table)
+            assert arrow_table.column(1).to_pylist() == [2, None, -3]
+            assert arrow_table.column(3).to_pylist() == [False, None, True]
+            assert arrow_table.column(0).to_pylist() == [u'Goblin', u'Żółw', u'Orc']
+            published = arrow.publish_arrow(arrow_table)
+            del arrow_table
+        try:
+            with jdf_shm.attach_table(published.name) as copied:
+                assert list(copied) == [row[:4] for row in ROWS]
+        finally:
+            published.close()
+            published.unlink()
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,132 @@
+# coding=utf-8
+"""Tests of jdf_lib.ColumnStore."""
+from array import array
+
+import pytest
+
+import jdf_lib
+
+TYPES = ['str', 'int', 'float', 'bool']
+ROWS = [[u'Goblin', 2, 1.5, False],
+        [u'Orc', 7, 0.25, True],
+        [u'Troll', 9, 2.0, False]]
+
+
+def make_store():
+    return jdf_lib.ColumnStore.from_rows(TYPES, ROWS)
+
+
+def test_from_rows():
+    store = make_store()
+    assert len(store) == len(ROWS)
+    assert list(store) == ROWS
+    assert store[1] == ROWS[1]
+    assert store.value(2, 3) is False
+    assert [type(each) for each in store.columns] == [list, array, array, array]
+
+
+def test_nulls_and_big_numbers_keep_a_list():
+    store = jdf_lib.ColumnStore.from_rows(['int', 'float'], [[1, None], [2 ** 70, 0.5]])
+    assert [type(each) for each in store.columns] == [list, list]
+    assert list(store) == [[1, None], [2 ** 70, 0.5]]
+    store = make_store()
+    store.set_value(0, 1, None)   # the typed column becomes a list
+    store.set_value(1, 3, None)
+    assert store[0][1] is None and store[1][3] is None
+    assert store.value(2, 3) is False
+
+
+def test_insert_append_remove():
+    store = make_store()
+    store.insert(1, [u'Imp', 1, 0.1, True])
+    store.append([u'Ent', None, 3.0, False])
+    assert len(store) == 5
+    assert store[1] == [u'Imp', 1, 0.1, True]
+    assert store[-1] == [u'Ent', None, 3.0, False]
+    store.remove(1)
+    assert list(store)[:3] == ROWS
+    store.extend([[u'A', u'B'], [1, 2], [0.5, 0.5], [True, False]])
+    assert len(store) == 6
+    assert store[5] == [u'B', 2, 0.5, False]
+
+
+def test_copy_is_independent():
+    store = make_store()
+    snapshot = store.copy()
+    store.set_value(0, 1, 100)
+    store.append([u'Imp', 1, 0.1, True])
+    assert list(snapshot) == ROWS
+    assert len(snapshot) == len(ROWS)
+
+
+def test_insert_remove_column():
+    store = make_store()
+    store.insert_column(1, 'int', 0)
+    assert store.field_types == ['str', 'int', 'int', 'float', 'bool']
+    assert [row[1] for row in store] == [0, 0, 0]
+    speed = store.remove_column(3)
+    assert store.field_types == ['str', 'int', 'int', 'bool']
+    assert list(speed) == [1.5, 0.25, 2.0]
+    store.insert_column(3, 'float', None, speed)   # put back without a copy
+    assert store.columns[3] is speed
+    store.remove_column(1)
+    assert list(store) == ROWS
+
+
+def test_set_column():
+    store = make_store()
+    old = store.set_column(1, 'str', [u'a', u'b', u'c'])
+    assert list(old) == [2, 7, 9]
+    assert store.field_types[1] == 'str'
+    assert [row[1] for row in store] == [u'a', u'b', u'c']
+    store.set_column(1, 'int', old)
+    assert list(store) == ROWS
+
+
+def test_convert_column():
+    store = make_store()
+    store.convert_column(1, 'str', str)
+    assert [row[1] for row in store] == ['2', '7', '9']
+    store.convert_column(1, 'float', float)
+    assert isinstance(store.columns[1], array)
+    assert [row[1] for row in store] == [2.0, 7.0, 9.0]
+    store.convert_column(3, 'int', int)   # bool values, not the array's bytes
+    assert [row[3] for row in store] == [0, 1, 0]
+
+
+def test_column_of_the_wrong_length():
+    store = make_store()
+    with pytest.raises(ValueError):
+        store.insert_column(0, 'int', None, [1, 2])
+    assert store.field_types == TYPES
+
+
+@pytest.mark.parametrize('rows', [[1, 2], [0, 2], [0, 1, 2], [2]])
+def test_take_remove_insert_rows(rows):
+    store = make_store()
+    store.set_value(1, 1, None)   # one list column next to the typed ones
+    expected = list(store)
+    taken = store.take_rows(rows)
+    assert [list(each) for each in taken] == [[expected[row][idx] for row in rows] for idx in range(len(TYPES))]
+    store.remove_rows(rows)
+    assert list(store) == [row for idx, row in enumerate(expected) if idx not in rows]
+    store.insert_rows(rows, taken)
+    assert list(store) == expected
+
+
+def test_insert_rows_that_do_not_fit_the_array():
+    store = make_store()
+    store.insert_rows([0, 2], [[u'A', u'B'], [None, 2 ** 70], [0.5, 0.5], [True, False]])
+    assert len(store) == 5
+    assert store[0] == [u'A', None, 0.5, True]
+    assert store[2] == [u'B', 2 ** 70, 0.5, False]
+    assert store[1] == ROWS[0]
+
+
+def test_set_rows():
+    store = make_store()
+    old = store.set_rows(1, [[u'A', u'B'], [1, None], [0.5, 0.5], [True, True]])
+    assert store[1] == [u'A', 1, 0.5, True]
+    assert store[2] == [u'B', None, 0.5, True]
+    store.set_rows(1, old)
+    assert list(store) == ROWS
@@ -0,0 +1,52 @@
+# coding=utf-8
+"""Tests of the csv import and export (jdf_lib)."""
+import io
+
+import jdf_lib
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss']
+TYPES = ['str', 'int', 'float', 'bool']
+ROWS = [[u'Goblin, the "green"', 2, 1.5, False],
+        [u'Żółw', None, 0.25, True],
+        [u'Orc', 7, None, None]]
+
+
+def write_text(path, text):
+    with io.open(path, 'w', encoding='utf-8', newline='') as text_file:
+        text_file.write(text)
+
+
+def test_csv_round_trip(tmp_path):
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    csv_path = str(tmp_path / 'monsters.csv')
+    back_path = str(tmp_path / 'back.jdf')
+    jdf_lib.save_database(jdf_path, NAMES, TYPES, ROWS)
+    assert jdf_lib.jdf_to_csv(jdf_path, csv_path) == len(ROWS)
+    report = jdf_lib.csv_to_jdf(csv_path, back_path)
+    assert report['rows'] == len(ROWS)
+    assert report['field_types'] == TYPES
+    assert report['failed'] == 0
+    assert jdf_lib.load_database(back_path) == (NAMES, TYPES, ROWS)   # empty cells come back as nulls
+    assert jdf_lib.inspect(back_path)['rows'] == len(ROWS)
+
+
+def test_csv_failed_values(tmp_path):
+    csv_path = str(tmp_path / 'monsters.csv')
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    write_text(csv_path, u'name,damage\nGoblin,2\nOrc,3\nTroll,lots\n')
+    report = jdf_lib.csv_to_jdf(csv_path, jdf_path, sample_size=2)
+    assert report['field_types'] == ['str', 'int']
+    assert report['failed'] == 1
+    assert report['failures'] == [(4, 'damage', 'lots')]
+    assert jdf_lib.load_database(jdf_path)[2][2] == [u'Troll', 0]
+
+
+def test_csv_extra_cells(tmp_path):
+    csv_path = str(tmp_path / 'monsters.csv')
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    write_text(csv_path, u'name,damage\nGoblin,2\nOrc,3,extra\nTroll\nImp,1,a,b\n')
+    report = jdf_lib.csv_to_jdf(csv_path, jdf_path)
+    assert report['rows'] == 4
+    assert report['extra_cells'] == 2
+    assert report['extra_lines'] == [3, 5]
+    assert jdf_lib.load_database(jdf_path)[2] == [[u'Goblin', 2], [u'Orc', 3], [u'Troll', None], [u'Imp', 1]]
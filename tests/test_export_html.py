@@ -0,0 +1,113 @@
+# coding=utf-8
+"""Tests of the html exports (export_html.py)."""
+import io
+import json
+import os
+
+import pytest
+
+import export_html
+
+NAMES = ['Monster name', 'Damage']
+TYPES = ['str', 'int']
+
+
+def read(path):
+    with io.open(path, encoding='utf-8') as html_file:
+        return html_file.read()
+
+
+def test_build_html_escapes_cells(tmp_path):
+    path = str(tmp_path / 'out.html')
+    export_html.build_html('monsters.jdf', path, NAMES, TYPES, [['<Goblin & co>', 2], [None, 3]], 'JDFeditor')
+    html = read(path)
+    assert '&lt;Goblin &amp; co&gt;' in html
+    assert '<td style="color: #1CFF00;">1</td><td></td><td>3</td>' in html   # a null is an empty cell
+
+
+def test_build_html_ragged_rows(tmp_path):
+    path = str(tmp_path / 'out.html')
+    export_html.build_html('x', path, NAMES, TYPES, [['a'], ['a', 1, 'extra'], []], 'v')
+    html = read(path)
+    assert '<td style="color: #1CFF00;">0</td><td>a</td></tr>' in html
+    assert '<td style="color: #1CFF00;">1</td><td>a</td><td>1</td><td>extra</td></tr>' in html
+    assert '<td style="color: #1CFF00;">2</td></tr>' in html
+
+
+def rows_of(amount):
+    return [[u'Monster ' + str(idx), idx] for idx in range(amount)]
+
+
+def mark_pages(tmp_path, pages):
+    for page in pages:
+        with io.open(export_html.page_path(str(tmp_path / 'out.html'), page), 'w', encoding='utf-8') as page_file:
+            page_file.write(u'not rewritten')
+
+
+def rewritten(tmp_path, pages):
+    return [read(export_html.page_path(str(tmp_path / 'out.html'), page)) != u'not rewritten' for page in pages]
+
+
+def export_pages(tmp_path, rows, processes=1):
+    return export_html.build_html_pages('x', str(tmp_path / 'out.html'), NAMES, TYPES, rows, 'v', 10,
+                                        processes=processes, incremental=True)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_build_html_pages(tmp_path, processes):
+    assert export_pages(tmp_path, rows_of(25), processes) == 3
+    html = read(export_html.page_path(str(tmp_path / 'out.html'), 1))
+    assert '<td style="color: #1CFF00;">10</td><td>Monster 10</td>' in html
+    assert 'out_page1.html' in html and 'out_page3.html' in html   # previous and next links
+    index = read(str(tmp_path / 'out.html'))
+    assert all('out_page' + str(page) + '.html' in index for page in (1, 2, 3))
+
+
+def test_incremental_export_unchanged(tmp_path):
+    export_pages(tmp_path, rows_of(25))
+    mark_pages(tmp_path, [0, 1, 2])
+    assert export_pages(tmp_path, rows_of(25)) == 3
+    assert rewritten(tmp_path, [0, 1, 2]) == [False, False, False]
+
+
+def test_incremental_export_changed_page(tmp_path):
+    export_pages(tmp_path, rows_of(25))
+    mark_pages(tmp_path, [0, 1, 2])
+    rows = rows_of(25)
+    rows[12][1] = -1
+    export_pages(tmp_path, rows)
+    assert rewritten(tmp_path, [0, 1, 2]) == [False, True, False]
+
+
+def test_incremental_export_shrunk(tmp_path):
+    export_pages(tmp_path, rows_of(25))
+    mark_pages(tmp_path, [0, 1, 2])
+    assert export_pages(tmp_path, rows_of(15)) == 2
+    assert rewritten(tmp_path, [0, 1]) == [False, True]   # the last page lost rows and its next link
+    assert not os.path.exists(export_html.page_path(str(tmp_path / 'out.html'), 2))
+    assert len(export_html.read_manifest(str(tmp_path / 'out.html'))) == 2
+
+
+def test_incremental_export_grown(tmp_path):
+    export_pages(tmp_path, rows_of(20))
+    mark_pages(tmp_path, [0, 1])
+    assert export_pages(tmp_path, rows_of(35)) == 4
+    assert rewritten(tmp_path, [0, 1, 2, 3]) == [False, True, True, True]   # page 2 gets a next link
+
+
+def test_incremental_export_missing_page_file(tmp_path):
+    export_pages(tmp_path, rows_of(25))
+    mark_pages(tmp_path, [0, 2])
+    os.remove(export_html.page_path(str(tmp_path / 'out.html'), 1))
+    export_pages(tmp_path, rows_of(25))
+    assert rewritten(tmp_path, [0, 1, 2]) == [False, True, False]
+
+
+def test_build_html_virtual(tmp_path):
+    path = str(tmp_path / 'out.html')
+    export_html.build_html_virtual('x', path, NAMES, TYPES, iter([[u'</script><b>', 1], [None, None]]), 'v')
+    html = read(path)
+    marker = '<script type="application/json" id="jdf-data">'
+    start = html.index(marker) + len(marker)
+    data = json.loads(html[start:html.index('</script>', start)])
+    assert data == {'names': NAMES, 'types': TYPES, 'columns': [[u'</script><b>', None], [1, None]]}
@@ -0,0 +1,99 @@
+# coding=utf-8
+"""Tests of the JDF file format, its metadata record and the memory-mapped access (jdf_lib)."""
+import io
+
+import jdf_lib
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss']
+TYPES = ['str', 'int', 'float', 'bool']
+ROWS = [[u'Goblin', 2, 1.5, False],
+        [u'Żółw', None, 0.25, True],
+        [u'[Orc], "the" {one}', 7, None, None]]
+
+
+def test_database_writer_round_trip(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    with jdf_lib.DatabaseWriter(path, NAMES, TYPES, metadata=True) as writer:
+        writer.write_row(ROWS[0])
+        writer.write_rows(iter(ROWS[1:]))
+    assert writer.rows == len(ROWS)
+    assert jdf_lib.load_database(path) == (NAMES, TYPES, ROWS)
+    names, types, rows = jdf_lib.stream_database(path)
+    assert list(rows) == ROWS
+
+
+def test_inspect(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS, metadata=True)
+    meta = jdf_lib.inspect(path)
+    assert meta['rows'] == len(ROWS)
+    assert meta['field_names'] == NAMES
+    assert meta['field_types'] == TYPES
+    assert meta['nulls'] == [0, 1, 1, 1]
+    assert meta['min'][1] == 2 and meta['max'][1] == 7
+    assert jdf_lib.inspect(path, verify=True) == meta
+
+
+def test_inspect_without_record(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+    assert jdf_lib.inspect(path) == -1
+    assert jdf_lib.load_database(path)[2] == ROWS
+
+
+def test_inspect_outdated_record(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS, metadata=True)
+    with io.open(path, 'rb') as jdf_file:
+        content = jdf_file.read()
+    with io.open(path, 'wb') as jdf_file:   # same length, other values
+        jdf_file.write(content.replace(b'"Goblin", 2', b'"Goblin", 3'))
+    assert jdf_lib.inspect(path) != -1   # only the length is checked
+    assert jdf_lib.inspect(path, verify=True) == -1
+    with io.open(path, 'wb') as jdf_file:
+        jdf_file.write(content.replace(b'"Goblin", 2', b'"Goblin", 23'))
+    assert jdf_lib.inspect(path) == -1
+
+
+def test_open_mmap_brackets_inside_strings(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    rows = [[u'[Orc]', u'a "quoted ] bracket', [1, [2, 3]]],
+            [u'\\\\', u'escaped \\" ] [', []],
+            [u'Żółw ]]', None, [u'[', u']']]]
+    jdf_lib.save_database(path, ['name', 'note', 'loot'], ['str', 'str', 'list'], rows)
+    table = jdf_lib.open_mmap(path)
+    try:
+        assert table.field_names == ['name', 'note', 'loot']
+        assert table.field_types == ['str', 'str', 'list']
+        assert len(table) == len(rows)
+        assert list(table) == rows
+        assert table[-1] == rows[-1]
+        assert table[1:] == rows[1:]
+    finally:
+        table.close()
+
+
+def test_open_mmap_changed_file(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+    with jdf_lib.open_mmap(path) as table:
+        assert list(table) == ROWS
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS + [[u'Troll', 9, 2.0, False]])
+    with jdf_lib.open_mmap(path) as table:   # the cached row index is not reused
+        assert len(table) == len(ROWS) + 1
+        assert table[-1] == [u'Troll', 9, 2.0, False]
+
+
+def test_open_mmap_index_cache_is_bounded(tmp_path):
+    for idx in range(jdf_lib.ROW_INDEX_CACHE + 3):
+        path = str(tmp_path / ('file' + str(idx) + '.jdf'))
+        jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+        jdf_lib.open_mmap(path).close()
+    assert len(jdf_lib._row_indices) <= jdf_lib.ROW_INDEX_CACHE
+
+
+def test_open_mmap_not_a_jdf_file(tmp_path):
+    path = str(tmp_path / 'other.jdf')
+    with io.open(path, 'wb') as other_file:
+        other_file.write(b'not a database\n')
+    assert jdf_lib.open_mmap(path) == -1
@@ -0,0 +1,152 @@
+# coding=utf-8
+"""Tests of the crash recovery journal and the undo history (jdf_journal)."""
+import io
+import json
+import os
+from array import array
+
+import jdf_journal
+
+
+def make_journal(directory, rows=None):
+    return jdf_journal.Journal(jdf_journal.new_header('monsters.jdf', ['name', 'damage'], ['str', 'int'], rows),
+                               directory=directory)
+
+
+def test_journal_write_and_read(tmp_path):
+    journal = make_journal(str(tmp_path), rows=[[u'Goblin', 2]])
+    journal.log('set', 0, 1, 5)
+    journal.log('insert', 1, [u'Orc', 7])
+    journal.log('set_column', 1, 'int', array('q', [5, 7]))   # typed columns are written as lists
+    journal.close()
+    assert journal.error is None
+    header, operations = jdf_journal.read_journal(journal.path)
+    assert header['file'] == 'monsters.jdf'
+    assert header['rows'] == [[u'Goblin', 2]]
+    assert header['pid'] == os.getpid()
+    assert operations == [[1, 'set', 0, 1, 5], [2, 'insert', 1, [u'Orc', 7]], [3, 'set_column', 1, 'int', [5, 7]]]
+
+
+def test_journal_saved_operations_are_left_out(tmp_path):
+    saved = tmp_path / 'saved.jdf'
+    saved.write_text(u'JDF1\n[]\n')
+    journal = make_journal(str(tmp_path))
+    journal.log('set', 0, 1, 5)
+    journal.log('set', 0, 1, 6)
+    journal.mark_saved(1, str(saved))
+    journal.log('remove', 0)
+    journal.close()
+    header, operations = jdf_journal.read_journal(journal.path)
+    assert header['file'] == str(saved)
+    assert header['state'] == jdf_journal.file_state(str(saved))
+    assert header['rows'] is None
+    assert [each[:2] for each in operations] == [[2, 'set'], [4, 'remove']]
+
+
+def test_journal_cut_short_by_a_crash(tmp_path):
+    journal = make_journal(str(tmp_path))
+    journal.log('set', 0, 1, 5)
+    journal.close()
+    with io.open(journal.path, 'ab') as journal_file:
+        journal_file.write(b'[2, "set", 0, 1')
+    assert jdf_journal.read_journal(journal.path)[1] == [[1, 'set', 0, 1, 5]]
+
+
+def test_journal_close_remove(tmp_path):
+    journal = make_journal(str(tmp_path))
+    journal.log('set', 0, 1, 5)
+    journal.close(remove=True)
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_journal_that_cannot_be_written(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text(u'')
+    journal = make_journal(str(blocker / 'recovery'))   # the directory cannot be made
+    journal.log('set', 0, 1, 5)
+    journal.close(remove=True)
+    assert journal.error is not None
+    assert journal.path is None
+
+
+def test_find_journals(tmp_path):
+    journal = make_journal(str(tmp_path))
+    journal.log('set', 0, 1, 5)
+    journal.close()
+    empty = make_journal(str(tmp_path))
+    empty.close()
+    assert jdf_journal.find_journals(str(tmp_path)) == []   # this process is still running
+    for path in (journal.path, empty.path):
+        with io.open(path, 'r', encoding='utf-8') as journal_file:
+            lines = journal_file.read().split(u'\n')
+        header = json.loads(lines[0])
+        header['pid'] = 999999999   # a process that has ended
+        lines[0] = json.dumps(header)
+        with io.open(path, 'w', encoding='utf-8') as journal_file:
+            journal_file.write(u'\n'.join(lines))
+    found = jdf_journal.find_journals(str(tmp_path))
+    assert [(path, operations) for path, header, operations in found] == [(journal.path, [[1, 'set', 0, 1, 5]])]
+    assert not os.path.exists(empty.path)   # a journal without operations is removed
+
+
+class Cells(object):
+    """A tiny table whose edits record their inverse into an UndoLog, like DataCells.apply_edit() does."""
+
+    def __init__(self, undo_log):
+        self.undo_log = undo_log
+        self.values = dict()
+
+    def apply(self, operation):
+        name, key, value = operation
+        self.undo_log.record([name, key, self.values.get(key)])
+        self.values[key] = value
+
+
+def test_undo_redo():
+    undo_log = jdf_journal.UndoLog(coalesce_delay=0)
+    cells = Cells(undo_log)
+    cells.apply(['set', 'a', 1])
+    cells.apply(['set', 'a', 2])
+    cells.apply(['set', 'b', 3])
+    assert undo_log.undo(cells.apply)
+    assert cells.values == {'a': 2, 'b': None}
+    assert undo_log.undo(cells.apply)
+    assert cells.values == {'a': 1, 'b': None}
+    assert undo_log.redo(cells.apply)
+    assert cells.values == {'a': 2, 'b': None}
+    cells.apply(['set', 'c', 4])   # a new edit clears the redo steps
+    assert not undo_log.redo(cells.apply)
+    while undo_log.undo(cells.apply):
+        pass
+    assert cells.values == {'a': None, 'b': None, 'c': None}
+
+
+def test_set_edits_of_a_row_coalesce():
+    undo_log = jdf_journal.UndoLog(coalesce_delay=60)
+    undo_log.record(['set', 0, 1, u'old name'])
+    undo_log.record(['set', 0, 2, 5])
+    undo_log.record(['set', 0, 1, u'typed in between'])   # the cell's first value is kept
+    undo_log.record(['set', 1, 1, u'other row'])
+    undo_log.record(['remove', 1])
+    steps = [each[0] for each in undo_log.undo_steps]
+    assert steps == [[['set', 0, 1, u'old name'], ['set', 0, 2, 5]], [['set', 1, 1, u'other row']], [['remove', 1]]]
+
+
+def test_memory_limit_drops_the_oldest_steps():
+    step = ['insert', 0, [u'x' * 1000]]
+    undo_log = jdf_journal.UndoLog(memory_limit=jdf_journal.operation_size(step) * 3, coalesce_delay=0)
+    for idx in range(10):
+        undo_log.record(['insert', idx, [u'x' * 1000]])
+    assert len(undo_log.undo_steps) == 3
+    assert [each[0][0][1] for each in undo_log.undo_steps] == [7, 8, 9]
+    assert undo_log.size == sum(each[1] for each in undo_log.undo_steps)
+    assert undo_log.size <= undo_log.memory_limit
+    undo_log.clear()
+    assert undo_log.size == 0 and not undo_log.undo_steps
+
+
+def test_operation_size_counts_the_values():
+    small = jdf_journal.operation_size(['remove_rows', [1], [[u'a']]])
+    large = jdf_journal.operation_size(['remove_rows', [1], [[u'a' * 10000]]])
+    assert large - small >= 9999
+    assert jdf_journal.operation_size(array('q', range(1000))) >= 8000
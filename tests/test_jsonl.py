@@ -0,0 +1,62 @@
+# coding=utf-8
+"""Tests of the JSONL files (jdf_lib)."""
+import io
+
+import jdf_lib
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss', 'Loot']
+TYPES = ['str', 'int', 'float', 'bool', 'list']
+ROWS = [[u'Goblin', 2, 1.5, False, [u'gold', 1]],
+        [u'Żółw', None, None, None, None],
+        [u'Orc\nline', -3, 0.25, True, []]]
+
+
+def test_jsonl_round_trip(tmp_path):
+    path = str(tmp_path / 'monsters.jsonl')
+    assert jdf_lib.save_jsonl(path, NAMES, TYPES, iter(ROWS)) == len(ROWS)
+    assert jdf_lib.is_jsonl(path)
+    assert jdf_lib.load_jsonl(path, processes=1) == (NAMES, TYPES, ROWS)
+    names, types, rows = jdf_lib.stream_jsonl(path)
+    assert (names, types, list(rows)) == (NAMES, TYPES, ROWS)
+
+
+def test_jsonl_append(tmp_path):
+    path = str(tmp_path / 'monsters.jsonl')
+    jdf_lib.save_jsonl(path, NAMES, TYPES, ROWS[:1])
+    assert jdf_lib.append_jsonl(path, ROWS[1:]) == len(ROWS) - 1
+    assert jdf_lib.load_jsonl(path, processes=1)[2] == ROWS
+
+
+def test_load_jsonl_in_parts(tmp_path, monkeypatch):
+    path = str(tmp_path / 'monsters.jsonl')
+    rows = [[u'Monster ' + str(idx), idx, idx * 0.5, idx % 2 == 0, [idx]] for idx in range(1000)]
+    jdf_lib.save_jsonl(path, NAMES, TYPES, rows)
+    monkeypatch.setattr(jdf_lib, 'JSONL_PARALLEL_SIZE', 0)   # split even a small file
+    assert jdf_lib.load_jsonl(path, processes=2)[2] == rows
+
+
+def test_jsonl_last_line_without_line_break(tmp_path):
+    path = str(tmp_path / 'monsters.jsonl')
+    jdf_lib.save_jsonl(path, NAMES, TYPES, ROWS[:1])
+    with io.open(path, 'ab') as jsonl_file:
+        jsonl_file.write(b'["Imp", 1, 0.5, false, []]')
+    assert jdf_lib.load_jsonl(path, processes=1)[2][-1] == [u'Imp', 1, 0.5, False, []]
+    assert list(jdf_lib.stream_jsonl(path)[2])[-1] == [u'Imp', 1, 0.5, False, []]
+
+
+def test_jsonl_jdf_conversion(tmp_path):
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    jsonl_path = str(tmp_path / 'monsters.jsonl')
+    back_path = str(tmp_path / 'back.jdf')
+    jdf_lib.save_database(jdf_path, NAMES, TYPES, ROWS)
+    assert jdf_lib.jdf_to_jsonl(jdf_path, jsonl_path) == len(ROWS)
+    assert jdf_lib.jsonl_to_jdf(jsonl_path, back_path) == len(ROWS)
+    assert jdf_lib.load_database(back_path) == (NAMES, TYPES, ROWS)
+
+
+def test_not_a_jsonl_file(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+    assert not jdf_lib.is_jsonl(path)
+    assert jdf_lib.load_jsonl(path) == -1
+    assert jdf_lib.stream_jsonl(path) == -1
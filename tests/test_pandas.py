@@ -0,0 +1,41 @@
+# coding=utf-8
+"""Tests of the pandas DataFrame bridge (jdf_lib, needs pandas)."""
+import pytest
+
+import jdf_lib
+
+pandas = pytest.importorskip('pandas')
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss']
+TYPES = ['str', 'int', 'float', 'bool']
+ROWS = [[u'Goblin', 2, 1.5, False],
+        [u'Żółw', None, 0.25, None],
+        [None, -3, None, True]]
+
+
+def test_dataframe_round_trip(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    back_path = str(tmp_path / 'back.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+    data_frame = jdf_lib.to_dataframe(path)
+    assert list(data_frame.columns) == NAMES
+    assert str(data_frame['Damage'].dtype) == 'Int64'   # int and bool columns with nulls
+    assert str(data_frame['Boss'].dtype) == 'boolean'
+    assert str(data_frame['Speed'].dtype) == 'float64'
+    assert jdf_lib.from_dataframe(data_frame, back_path) == len(ROWS)
+    assert jdf_lib.load_database(back_path) == (NAMES, TYPES, ROWS)
+
+
+def test_dataframe_columns_and_chunks(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    rows = [[u'Monster ' + str(idx), idx, idx * 0.5, idx % 2 == 0] for idx in range(10)]
+    jdf_lib.save_database(path, NAMES, TYPES, rows)
+    data_frame = jdf_lib.to_dataframe(path, columns=['Damage', 'Monster name'])
+    assert list(data_frame.columns) == ['Damage', 'Monster name']
+    assert str(data_frame['Damage'].dtype) == 'int64'
+    chunks = list(jdf_lib.to_dataframe(path, chunksize=4))
+    assert [len(each) for each in chunks] == [4, 4, 2]
+    assert list(chunks[1].index) == [4, 5, 6, 7]
+    assert pandas.concat(chunks)['Damage'].sum() == sum(range(10))
+    with pytest.raises(KeyError):
+        jdf_lib.to_dataframe(path, columns=['Nope'])
@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Tests of jdf_lib.SearchIndex."""
+import jdf_lib
+
+TYPES = ['str', 'int', 'str']
+ROWS = [[u'Goblin archer', 2, u'green'],
+        [u'Goblin king', 7, u'Gold crown'],
+        [u'Orc archer', 5, u'grey'],
+        [u'Żółw', 1, None],
+        [u'Gobbo', 0, u'goblin friend']]
+
+
+def make_index():
+    return jdf_lib.SearchIndex.build(jdf_lib.ColumnStore.from_rows(TYPES, ROWS))
+
+
+def search(index, text, column=None):
+    found = index.search(text, column)
+    return None if found is None else list(found)
+
+
+def test_prefix_search():
+    index = make_index()
+    assert search(index, 'gob') == [0, 1, 4]
+    assert search(index, 'GOBLIN') == [0, 1, 4]   # case is ignored
+    assert search(index, 'gobo') == []
+    assert search(index, 'żó') == [3]
+    assert search(index, '7') == []   # only the str columns are indexed
+
+
+def test_words_intersect():
+    index = make_index()
+    assert search(index, 'gob arch') == [0]
+    assert search(index, 'arch') == [0, 2]
+    assert search(index, 'g king') == [1]   # the words can be in different columns
+    assert search(index, 'goblin gold') == [1]
+    assert search(index, 'orc king') == []
+
+
+def test_search_one_column():
+    index = make_index()
+    assert search(index, 'gob', column=0) == [0, 1, 4]
+    assert search(index, 'gob', column=2) == [4]
+    assert search(index, 'gob', column=1) == []
+
+
+def test_no_words():
+    assert search(make_index(), ' ,.') is None
+
+
+def test_update():
+    index = make_index()
+    index.update(2, 0, ROWS[2][0], u'Goblin chief')
+    assert search(index, 'orc') == []
+    assert search(index, 'gob') == [0, 1, 2, 4]
+    assert search(index, 'chief') == [2]
+    index.update(3, 0, ROWS[3][0], b'\xc5\xbc\xc3\xb3\xc5\x82w morski')   # utf-8 bytes of a python 2 edit
+    assert search(index, b'morski') == [3]
+    assert search(index, 'żółw') == [3]
+    index.update(4, 1, 0, 5)   # not an indexed column
+    assert search(index, 'gob') == [0, 1, 2, 4]
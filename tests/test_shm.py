@@ -0,0 +1,73 @@
+# coding=utf-8
+"""Tests of the shared memory tables (jdf_shm)."""
+import multiprocessing
+
+import pytest
+
+pytest.importorskip('multiprocessing.shared_memory')   # python 3.8+
+import jdf_shm   # noqa: E402
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss', 'Loot']
+TYPES = ['str', 'int', 'float', 'bool', 'list']
+ROWS = [[u'Goblin', 2, 1.5, False, [u'gold', 1]],
+        [u'Żółw', None, None, None, None],
+        [None, -3, 0.25, True, []]]
+
+
+@pytest.fixture
+def published():
+    shm = jdf_shm.publish_table(NAMES, TYPES, ROWS)
+    yield shm
+    shm.close()
+    shm.unlink()
+
+
+def read_in_worker(name, results):
+    with jdf_shm.attach_table(name) as table:
+        results.put(list(table))
+
+
+def test_publish_attach(published):
+    with jdf_shm.attach_table(published.name) as table:
+        assert (table.field_names, table.field_types, len(table)) == (NAMES, TYPES, len(ROWS))
+        assert list(table) == ROWS
+        assert table[-1] == ROWS[-1]
+        assert table[0:2] == ROWS[0:2]
+        assert table.value(1, 0) == u'Żółw'
+        damage = table.column('Damage')
+        assert damage.tolist() == [2, 0, -3]   # a null reads as 0 in a numeric column
+        mask = table.null_mask(1)
+        assert mask.tolist() == [0, 1, 0]
+        assert table.null_mask('Monster name').tolist() == [0, 0, 1]
+        damage.release()
+        mask.release()
+        with pytest.raises(IndexError):
+            table[len(ROWS)]
+
+
+def test_empty_table():
+    shm = jdf_shm.publish_table(NAMES, TYPES, [])
+    try:
+        with jdf_shm.attach_table(shm.name) as table:
+            assert table.field_names == NAMES
+            assert len(table) == 0
+            assert list(table) == []
+            assert table.column('Monster name') == []
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+@pytest.mark.parametrize('method', ['fork', 'spawn'])
+def test_attach_from_worker(published, method):
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(method + ' is not available')
+    context = multiprocessing.get_context(method)
+    results = context.Queue()
+    worker = context.Process(target=read_in_worker, args=(published.name, results))
+    worker.start()
+    assert results.get(timeout=60) == ROWS
+    worker.join()
+    assert worker.exitcode == 0
+    with jdf_shm.attach_table(published.name) as table:   # the worker leaves the block in place
+        assert list(table) == ROWS
@@ -0,0 +1,52 @@
+# coding=utf-8
+"""Tests of jdf_lib.sql()."""
+import jdf_lib
+
+NAMES = ['Monster name', 'Damage', 'Boss']
+TYPES = ['str', 'int', 'bool']
+ROWS = [[u'Goblin', 2, False], [u'Troll', 7, False], [u'Dragon', 20, True], [u'Rat', 0, False]]
+
+
+def run(query, tables, parameters=()):
+    result = jdf_lib.sql(query, tables, parameters)
+    assert result != -1
+    return result[0], list(result[1])
+
+
+def test_where(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+    tables = {'monsters': path}
+    names, rows = run('SELECT "Monster name", Boss FROM monsters WHERE Damage > ? ORDER BY Damage', tables, (1,))
+    assert names == ['Monster name', 'Boss']
+    assert rows == [[u'Goblin', 0], [u'Troll', 0], [u'Dragon', 1]]   # bool columns come back as 0/1
+    assert ('monsters', 'Damage') in jdf_lib._sql_database().indexes
+    assert ('monsters', 'Monster name') not in jdf_lib._sql_database().indexes
+
+
+def test_join(tmp_path):
+    monsters = str(tmp_path / 'monsters.jdf')
+    loot = str(tmp_path / 'loot.jdf')
+    jdf_lib.save_database(monsters, NAMES, TYPES, ROWS)
+    jdf_lib.save_database(loot, ['Monster name', 'Item'], ['str', 'str'],
+                          [[u'Dragon', u'Gold'], [u'Goblin', u'Dagger'], [u'Dragon', u'Scale']])
+    names, rows = run('SELECT m."Monster name", l.Item FROM monsters m JOIN loot l USING ("Monster name") '
+                      'ORDER BY l.Item', {'monsters': monsters, 'loot': loot})
+    assert rows == [[u'Goblin', u'Dagger'], [u'Dragon', u'Gold'], [u'Dragon', u'Scale']]
+    assert ('loot', 'Monster name') in jdf_lib._sql_database().indexes
+
+
+def test_reload_after_change(tmp_path):
+    path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS)
+    tables = {'reloaded': path}
+    assert run('SELECT COUNT(*) FROM reloaded', tables)[1] == [[4]]
+    jdf_lib.save_database(path, NAMES, TYPES, ROWS + [[u'Bat', 1, False]])
+    assert run('SELECT COUNT(*) FROM reloaded', tables)[1] == [[5]]
+
+
+def test_load_error(tmp_path):
+    bad = tmp_path / 'bad.jdf'
+    bad.write_text(u'not a database')
+    assert jdf_lib.sql('SELECT * FROM bad', {'bad': str(bad)}) == -1
+    assert jdf_lib.sql('SELECT * FROM missing', {'missing': str(tmp_path / 'missing.jdf')}) == -1
@@ -0,0 +1,54 @@
+# coding=utf-8
+"""Tests of the sqlite import and export (jdf_lib)."""
+import sqlite3
+
+import pytest
+
+import jdf_lib
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss', 'Loot']
+TYPES = ['str', 'int', 'float', 'bool', 'list']
+ROWS = [[u'Goblin', 2, 1.5, False, [u'gold', 1]],
+        [u'Żółw', None, None, None, None],
+        [None, -3, 0.25, True, []]]
+
+
+def test_save_load_sqlite_round_trip(tmp_path):
+    db_path = str(tmp_path / 'monsters.sql')
+    assert jdf_lib.save_sqlite(db_path, 'monsters', NAMES, TYPES, ROWS) == len(ROWS)
+    names, types, rows = jdf_lib.load_sqlite(db_path)
+    assert names == NAMES
+    assert types == ['str', 'int', 'float', 'bool', 'str']   # the list column comes back as json text
+    assert [row[:4] for row in rows] == [row[:4] for row in ROWS]
+    assert [row[4] for row in rows] == [u'["gold", 1]', None, u'[]']   # a null list stays NULL
+
+
+def test_to_from_sqlite_jdf(tmp_path):
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    db_path = str(tmp_path / 'monsters.sql')
+    back_path = str(tmp_path / 'back.jdf')
+    jdf_lib.save_database(jdf_path, NAMES[:4], TYPES[:4], [row[:4] for row in ROWS])
+    assert jdf_lib.to_sqlite(jdf_path, db_path, 'monsters') == len(ROWS)
+    assert jdf_lib.from_sqlite(db_path, 'SELECT * FROM monsters WHERE Damage > 0', back_path) == 1
+    assert jdf_lib.load_database(back_path)[2] == [ROWS[0][:4]]
+
+
+def test_save_sqlite_keep_schema(tmp_path):
+    db_path = str(tmp_path / 'monsters.sql')
+    connection = sqlite3.connect(db_path)
+    connection.execute('CREATE TABLE monsters (name TEXT PRIMARY KEY, damage INTEGER NOT NULL)')
+    connection.execute('CREATE INDEX by_damage ON monsters (damage)')
+    connection.commit()
+    connection.close()
+    jdf_lib.save_sqlite(db_path, 'monsters', ['name', 'damage'], ['str', 'int'], [['Goblin', 2], ['Orc', 5]],
+                        keep_schema=True)
+    connection = sqlite3.connect(db_path)
+    schema = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'monsters'").fetchone()[0]
+    indexes = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    connection.close()
+    assert 'PRIMARY KEY' in schema
+    assert 'by_damage' in indexes
+    assert jdf_lib.load_sqlite(db_path)[2] == [[u'Goblin', 2], [u'Orc', 5]]
+    with pytest.raises(ValueError):
+        jdf_lib.save_sqlite(db_path, 'monsters', ['name'], ['str'], [['Goblin']], keep_schema=True)
+    assert jdf_lib.sqlite_columns(db_path, 'monsters') == ['name', 'damage']
@@ -0,0 +1,48 @@
+# coding=utf-8
+"""Tests of the xml import and export (jdf_lib)."""
+import io
+
+import jdf_lib
+
+NAMES = ['Monster name', 'Damage', 'Speed', 'Boss']
+TYPES = ['str', 'int', 'float', 'bool']
+ROWS = [[u'Goblin <&> "green"', 2, 1.5, False],
+        [u'Żółw\r\nline', None, 0.1, True],
+        [u'Orc', 7, None, None]]
+
+
+def test_xml_round_trip(tmp_path):
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    xml_path = str(tmp_path / 'monsters.xml')
+    back_path = str(tmp_path / 'back.jdf')
+    jdf_lib.save_database(jdf_path, NAMES, TYPES, ROWS)
+    assert jdf_lib.jdf_to_xml(jdf_path, xml_path) == len(ROWS)
+    report = jdf_lib.xml_to_jdf(xml_path, back_path, field_names=NAMES)
+    assert report['rows'] == len(ROWS)
+    assert report['failed'] == 0
+    assert jdf_lib.load_database(back_path) == (NAMES, TYPES, ROWS)
+
+
+def test_xml_renamed_columns(tmp_path):
+    xml_path = str(tmp_path / 'monsters.xml')
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.write_xml(xml_path, ['Monster name', '2nd'], [[u'Goblin', 2]])
+    jdf_lib.xml_to_jdf(xml_path, jdf_path)
+    assert jdf_lib.load_database(jdf_path)[0] == ['Monster_name', '_2nd']   # the element names
+
+
+def test_xml_illegal_characters(tmp_path):
+    xml_path = str(tmp_path / 'monsters.xml')
+    jdf_path = str(tmp_path / 'monsters.jdf')
+    jdf_lib.write_xml(xml_path, ['name'], [[u'bell\x07 and null\x00']])
+    jdf_lib.xml_to_jdf(xml_path, jdf_path)
+    assert jdf_lib.load_database(jdf_path)[2] == [[u'bell and null']]
+
+
+def test_stream_xml_attributes(tmp_path):
+    xml_path = str(tmp_path / 'feed.xml')
+    with io.open(xml_path, 'w', encoding='utf-8') as xml_file:
+        xml_file.write(u'<feed><channel><item id="1"><title>A</title></item>'
+                       u'<item id="2"><title>B</title><price>3</price></item></channel></feed>')
+    field_tags, rows = jdf_lib.stream_xml(xml_path, row_tag='item', field_tags=['id', 'title', 'price'])
+    assert list(rows) == [[u'1', u'A', u''], [u'2', u'B', u'3']]